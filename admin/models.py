@@ -5,14 +5,20 @@ import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'libs', 'flask-admin'))
 
 from flask_admin.contrib.sqla import ModelView
-from flask_admin import Admin, AdminIndexView
-from flask import redirect, url_for, request, flash
+from flask_admin import Admin, AdminIndexView, BaseView, expose
+from flask_admin.actions import action
+from flask import redirect, url_for, request, flash, current_app
 from models.base import db
 from models.user import User
 from models.book import Book
 from models.author import Author
 from models.genre import Genre
 from models.reservation import BookReservation
+from services.reservations import apply_status_change
+from services.open_library import get_open_library_service
+from services.passwords import get_password_hasher
+from services.web_versions import start_prefetch_job, get_prefetch_job
+from sqlalchemy import inspect
 import json
 from datetime import datetime
 
@@ -52,6 +58,10 @@ class BookModelView(ModelView):
         # Гарантируем, что available_copies не превышает total_copies
         if model.available_copies > model.total_copies:
             model.available_copies = model.total_copies
+    
+    @action('refresh_web_versions', 'Обновить электронные версии')
+    def action_refresh_web_versions(self, ids):
+        _start_web_versions_job(book_ids=[int(book_id) for book_id in ids], refresh_all=True)
 
 class UserModelView(ModelView):
     def is_accessible(self):
@@ -67,8 +77,7 @@ class UserModelView(ModelView):
     
     def on_model_change(self, form, model, is_created):
         if is_created and form.password_hash.data:
-            from werkzeug.security import generate_password_hash
-            model.password_hash = generate_password_hash(form.password_hash.data)
+            model.password_hash = get_password_hasher().hash(form.password_hash.data)
 
 class AuthorModelView(ModelView):
     def is_accessible(self):
@@ -102,15 +111,40 @@ class ReservationModelView(ModelView):
         if model.status == 'completed' and not model.return_date:
             model.return_date = datetime.utcnow()
         
-        # При отмене бронирования возвращаем книгу
-        if model.status == 'cancelled' and model.book:
-            model.book.available_copies += 1
-        # При завершении бронирования возвращаем книгу
-        elif model.status == 'completed' and model.book:
-            model.book.available_copies += 1
-        # При активации бронирования забираем книгу
-        elif model.status == 'active' and model.book and is_created:
-            model.book.available_copies -= 1
+        # Списываем или возвращаем копию только при смене активности бронирования
+        status_history = inspect(model).attrs.status.history
+        previous_status = status_history.deleted[0] if status_history.deleted else model.status
+        apply_status_change(model, previous_status, is_created)
     
     def after_model_change(self, form, model, is_created):
         db.session.commit()
+
+class WebVersionsView(BaseView):
+    """Состояние и запуск пакетного обновления веб-версий книг"""
+    
+    def is_accessible(self):
+        from flask import session
+        return session.get('user') and session.get('user').get('role') == 'admin'
+    
+    def inaccessible_callback(self, name, **kwargs):
+        flash('Для доступа к админке необходимо войти как администратор', 'error')
+        return redirect(url_for('web.login', next=request.url))
+    
+    @expose('/')
+    def index(self):
+        return self.render('admin/web_versions.html', job=get_prefetch_job())
+    
+    @expose('/refresh', methods=['POST'])
+    def refresh(self):
+        _start_web_versions_job(refresh_all=request.form.get('refresh_all') == '1')
+        return redirect(url_for('.index'))
+
+def _start_web_versions_job(**kwargs):
+    """Запуск фонового обновления веб-версий с сообщением администратору"""
+    service = get_open_library_service()
+    if service is None or not service.is_available():
+        flash('Сервис Open Library не настроен', 'error')
+    elif start_prefetch_job(current_app._get_current_object(), service, **kwargs):
+        flash('Обновление электронных версий запущено', 'success')
+    else:
+        flash('Обновление электронных версий уже выполняется', 'warning')
@@ -1,58 +1,123 @@
 from flask import Flask, jsonify
 from config import Config
 from services.database import init_db
+from services.read_replicas import init_read_replicas
+from services.http_client import init_http_client
+from services.async_http import init_async_http_client
 from services.open_library import init_open_library_service
 from services.captcha import init_captcha_service
-from services.seed_data import create_test_data
+from services.passwords import init_password_hasher
+from services.search import init_search_service
+from services.reservation_sweeper import init_reservation_sweeper
+from services.http_cache import init_http_cache
+from services.fragment_cache import init_fragment_cache
+from services.facets import init_facet_cache
+from services.instrumentation import init_instrumentation
+from services.startup import StartupTimer
+from services.bootstrap import bootstrap_app
+from commands import register_commands
 from routes.books import books_bp
 from routes.authors import authors_bp
+from routes.genres import genres_bp
 from routes.users import users_bp
 from routes.reservations import reservations_bp
 from routes.web import web_bp
 from routes.web_versions import web_versions_bp
 from routes.api_gateway import api_gateway_bp
-from admin.models import MyAdminIndexView, BookModelView, UserModelView, AuthorModelView, GenreModelView, ReservationModelView
+from routes.export import export_bp
+from routes.metrics import metrics_bp
+from admin.models import MyAdminIndexView, BookModelView, UserModelView, AuthorModelView, GenreModelView, ReservationModelView, WebVersionsView
 from flask_admin import Admin
 from models import db, User, Book, Author, Genre, BookReservation
 import logging
 
 def create_app():
-    app = Flask(__name__)
-    app.config.from_object(Config)
+    """
+    Фабрика приложения
+
+    Выполняет только дешевую настройку процесса и не обращается к сети.
+    Миграции, администратор и тестовые данные создаются отдельно через
+    flask bootstrap (или автоматически при AUTO_BOOTSTRAP=true).
+    """
+    timer = StartupTimer('create_app')
     
-    # Настройка логирования
-    logging.basicConfig(
-        level=app.config.get('LOG_LEVEL', 'INFO'),
-        format='%(asctime)s %(levelname)s %(name)s %(message)s'
-    )
+    with timer.phase('config'):
+        app = Flask(__name__)
+        app.config.from_object(Config)
+        
+        # Настройка логирования
+        logging.basicConfig(
+            level=app.config.get('LOG_LEVEL', 'INFO'),
+            format='%(asctime)s %(levelname)s %(name)s %(message)s'
+        )
     
     # Initialize database
-    init_db(app)
+    with timer.phase('database'):
+        init_db(app)
+        init_read_replicas(app)
+    
+    # Initialize SQL and request instrumentation
+    with timer.phase('instrumentation'):
+        init_instrumentation(app)
+    
+    # Initialize full-text search index
+    with timer.phase('search'):
+        init_search_service(app)
+    
+    # Initialize shared outbound HTTP clients
+    with timer.phase('http_client'):
+        init_http_client(app)
+        init_async_http_client(app)
     
     # Initialize Open Library service with API Gateway
-    init_open_library_service(app)
+    with timer.phase('open_library'):
+        init_open_library_service(app)
+    
+    # Initialize page fragment cache
+    with timer.phase('fragment_cache'):
+        init_fragment_cache(app)
+        init_facet_cache(app)
+    
+    # Initialize password hashing
+    with timer.phase('passwords'):
+        init_password_hasher(app)
     
     # Initialize Captcha service
-    init_captcha_service(app)
+    with timer.phase('captcha'):
+        init_captcha_service(app)
     
-    # Инициализация Flask-Admin
-    admin = Admin(app, name='Библиотека - Админка', template_mode='bootstrap3', index_view=MyAdminIndexView())
+    # Initialize expired reservations sweeper
+    with timer.phase('reservation_sweeper'):
+        init_reservation_sweeper(app)
     
-    # Добавляем представления для моделей
-    admin.add_view(BookModelView(Book, db.session, name='Книги'))
-    admin.add_view(UserModelView(User, db.session, name='Пользователи'))
-    admin.add_view(AuthorModelView(Author, db.session, name='Авторы'))
-    admin.add_view(GenreModelView(Genre, db.session, name='Жанры'))
-    admin.add_view(ReservationModelView(BookReservation, db.session, name='Бронирования'))
+    with timer.phase('admin'):
+        # Инициализация Flask-Admin
+        admin = Admin(app, name='Библиотека - Админка', template_mode='bootstrap3', index_view=MyAdminIndexView())
+        
+        # Добавляем представления для моделей
+        admin.add_view(BookModelView(Book, db.session, name='Книги'))
+        admin.add_view(UserModelView(User, db.session, name='Пользователи'))
+        admin.add_view(AuthorModelView(Author, db.session, name='Авторы'))
+        admin.add_view(GenreModelView(Genre, db.session, name='Жанры'))
+        admin.add_view(ReservationModelView(BookReservation, db.session, name='Бронирования'))
+        admin.add_view(WebVersionsView(name='Электронные версии', endpoint='web_versions_job'))
     
     # Register blueprints
-    app.register_blueprint(books_bp)
-    app.register_blueprint(authors_bp)
-    app.register_blueprint(users_bp)
-    app.register_blueprint(reservations_bp)
-    app.register_blueprint(web_bp)
-    app.register_blueprint(web_versions_bp)
-    app.register_blueprint(api_gateway_bp)
+    with timer.phase('blueprints'):
+        app.register_blueprint(books_bp)
+        app.register_blueprint(authors_bp)
+        app.register_blueprint(genres_bp)
+        app.register_blueprint(users_bp)
+        app.register_blueprint(reservations_bp)
+        app.register_blueprint(web_bp)
+        app.register_blueprint(web_versions_bp)
+        app.register_blueprint(api_gateway_bp)
+        app.register_blueprint(export_bp)
+        app.register_blueprint(metrics_bp)
+        init_http_cache(app)
+    
+    # CLI команды
+    register_commands(app)
     
     # Обработчик ошибок для 404
     @app.errorhandler(404)
@@ -70,52 +135,24 @@ def create_app():
             'success': False,
             'error': 'Внутренняя ошибка сервера'
         }), 500
-
-    with app.app_context():
-        # Проверяем, есть ли уже администраторы
-        admin_exists = User.query.filter_by(role='admin').first()
-        
-        if not admin_exists:
-            # Создаем первого администратора
-            admin_user = User(
-                email='admin@library.com',
-                first_name='Администратор',
-                last_name='Системы',
-                role='admin'
-            )
-            admin_user.set_password('admin123')
-            
-            db.session.add(admin_user)
-            db.session.commit()
-            app.logger.info('Первый администратор создан!')
-            app.logger.info('Email: admin@library.com')
-            app.logger.info('Пароль: admin123')
-        else:
-            app.logger.info('Администратор уже существует в системе.')
-        
-        # Создаем тестовые данные, если их нет
-        create_test_data()
-        
-        # Логируем статус сервисов
-        from services.open_library import get_open_library_service
-        from services.captcha import get_captcha_service
-        
-        ol_service = get_open_library_service()
-        if ol_service and ol_service.is_available():
-            health_status = "здоров" if ol_service.health_check() else "не здоров"
-            app.logger.info(f'Сервис Open Library инициализирован через API Gateway ({health_status})')
-        else:
-            app.logger.warning('Сервис Open Library недоступен')
-        
-        captcha_service = get_captcha_service()
-        if captcha_service and captcha_service.is_configured():
-            app.logger.info('Сервис Captcha инициализирован и доступен')
-        else:
-            app.logger.warning('Сервис Captcha недоступен')
+    
+    timer.report(app)
+    
+    if app.config.get('AUTO_BOOTSTRAP'):
+        bootstrap_app(app)
     
     return app
 
-app = create_app()
+def __getattr__(name):
+    # Экземпляр приложения создается при первом обращении (flask run, gunicorn app:app),
+    # а не при любом импорте модуля
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == '__main__':
+    app = create_app()
+    bootstrap_app(app)
     app.run(debug=True)
@@ -0,0 +1,88 @@
+"""
+Пропускная способность синхронных и асинхронных вызовов шлюза и капчи
+
+Одинаковое число вызовов к медленной заглушке выполняется пулом потоков
+через синхронные сервисы и в одном потоке через асинхронные.
+
+Запуск:
+    python -m benchmarks.async_outbound --calls 400 --threads 8 --delay 0.1
+"""
+import argparse
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import create_benchmark_app, timed
+from benchmarks.stub_gateway import StubGateway
+
+
+def run_sync(fn, calls, threads):
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(fn, range(calls)))
+
+
+def run_async(fn, calls):
+    async def main():
+        return await asyncio.gather(*(fn(index) for index in range(calls)))
+    return asyncio.run(main())
+
+
+def report(name, results, elapsed):
+    failed = sum(1 for result in results if not result.get('success'))
+    print(f'  {name:<36}{elapsed:>7.2f} с {len(results) / elapsed:>8.0f} вызовов/с, ошибок {failed}')
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--calls', type=int, default=400)
+    parser.add_argument('--threads', type=int, default=8, help='Потоков для синхронных вызовов')
+    parser.add_argument('--delay', type=float, default=0.1, help='Задержка ответа заглушки, секунды')
+    args = parser.parse_args()
+
+    stub = StubGateway(delay=args.delay).start()
+    os.environ['OPEN_LIBRARY_API_GATEWAY_URL'] = stub.url
+    os.environ['OPEN_LIBRARY_STARTUP_HEALTH_CHECK'] = 'false'
+    os.environ['OPEN_LIBRARY_CACHE_ENABLED'] = 'false'
+    os.environ['SMARTCAPTCHA_SERVER_KEY'] = 'benchmark'
+
+    app = create_benchmark_app()
+    from services.async_http import get_async_http_client
+    from services.captcha import get_captcha_service
+    from services.open_library import get_open_library_service
+
+    open_library = get_open_library_service()
+    captcha = get_captcha_service()
+    captcha.validation_url = stub.captcha_url
+
+    print(f'Вызовов: {args.calls}, задержка заглушки: {args.delay * 1000:.0f} мс')
+    failed = 0
+    with app.app_context():
+        # Уникальные названия, чтобы вызовы не объединялись
+        with timed() as timing:
+            results = run_sync(lambda i: open_library.search_books_by_title(f'sync {i}'), args.calls, args.threads)
+        failed += report(f'поиск, {args.threads} потоков', results, timing.elapsed)
+
+        with timed() as timing:
+            results = run_async(lambda i: open_library.search_books_by_title_async(f'async {i}'), args.calls)
+        failed += report('поиск, async в одном потоке', results, timing.elapsed)
+
+        with timed() as timing:
+            results = run_sync(lambda i: captcha.verify_captcha(f'token {i}', '127.0.0.1'), args.calls, args.threads)
+        failed += report(f'капча, {args.threads} потоков', results, timing.elapsed)
+
+        with timed() as timing:
+            results = run_async(lambda i: captcha.verify_captcha_async(f'token {i}', '127.0.0.1'), args.calls)
+        failed += report('капча, async в одном потоке', results, timing.elapsed)
+
+    stats = get_async_http_client().get_stats()
+    print(f'Одновременных асинхронных запросов максимум: {stats["max_in_flight_seen"]} из {stats["max_in_flight"]}')
+
+    stub.stop()
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
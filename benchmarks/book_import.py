@@ -0,0 +1,190 @@
+"""
+Скорость массового импорта книг
+
+Сравнивается добавление книг по одной через POST /api/books и массовый
+импорт NDJSON и CSV через POST /api/books/import. Часть строк намеренно
+некорректна: импорт должен сообщить о них и продолжить. Отдельно
+проверяется файл, в одном пакете которого смешаны корректные строки,
+строки с нескалярными значениями полей и строка, которую отклоняет сама
+база: корректные строки должны импортироваться.
+
+Запуск:
+    python -m benchmarks.book_import --rows 50000 --chunk-size 1000
+"""
+import argparse
+import csv
+import io
+import json
+import random
+import sys
+
+from benchmarks.common import create_benchmark_app, timed
+
+BAD_ROW_EVERY = 1000
+
+
+def generate_rows(count, prefix, seed=1):
+    """Строки импорта: авторы и жанры повторяются, каждая BAD_ROW_EVERY-я строка без названия"""
+    rng = random.Random(seed)
+    for index in range(count):
+        row = {
+            'title': f'{prefix} {index}' if index % BAD_ROW_EVERY != BAD_ROW_EVERY - 1 else '',
+            'description': f'Описание книги {prefix} {index}',
+            'publication_year': rng.randint(1800, 2024),
+            'isbn': f'{prefix[:3]}-{index:09d}',
+            'total_copies': 3,
+            'available_copies': 2,
+            'authors': [f'Имя{rng.randint(0, 2000)} Фамилия{rng.randint(0, 500)}'],
+            'genres': [f'Жанр {rng.randint(0, 40)}'],
+        }
+        yield row
+
+
+def as_ndjson(rows):
+    return ''.join(json.dumps(row, ensure_ascii=False) + '\n' for row in rows)
+
+
+def as_csv(rows):
+    output = io.StringIO()
+    writer = csv.DictWriter(output, fieldnames=[
+        'title', 'description', 'publication_year', 'isbn', 'total_copies', 'available_copies', 'authors', 'genres'
+    ])
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(dict(row, authors=';'.join(row['authors']), genres=';'.join(row['genres'])))
+    return output.getvalue()
+
+
+def import_over_http(client, body, content_type, chunk_size):
+    response = client.post(f'/api/books/import?chunk_size={chunk_size}', data=body, content_type=content_type)
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    return lines[-1]
+
+
+def check_mixed_file(app, client):
+    """Корректные строки пакета импортируются вместе с некорректными; возвращает описание ошибок"""
+    from models import db
+
+    rows = [
+        {'title': 'Mixed good 1', 'isbn': 'mix-000001', 'authors': ['Имя Фамилия'], 'genres': ['Смешанный']},
+        {'title': 'Mixed bad description', 'description': ['x'], 'isbn': 'mix-000002'},
+        {'title': {'ru': 'Объект'}, 'isbn': 'mix-000003'},
+        {'title': 'Mixed bad author', 'authors': [['Имя', 'Фамилия']], 'isbn': 'mix-000004'},
+        {'title': 'Mixed bad year', 'publication_year': 10 ** 20, 'isbn': 'mix-000005'},
+        {'title': 'Mixed rejected by database', 'isbn': 'mix-000006'},
+        {'title': 'Mixed good 2', 'description': 'Описание', 'isbn': 'mix-000007',
+         'authors': [{'first_name': 'Имя', 'last_name': 'Фамилия'}]},
+    ]
+    # Строку, прошедшую проверку, отклоняет триггер базы: весь пакет откатывается
+    with app.app_context():
+        db.session.execute(db.text(
+            "CREATE TRIGGER reject_import_row BEFORE INSERT ON books "
+            "WHEN NEW.title = 'Mixed rejected by database' BEGIN SELECT RAISE(ABORT, 'rejected'); END"
+        ))
+        db.session.commit()
+    try:
+        response = client.post('/api/books/import?chunk_size=100', data=as_ndjson(rows),
+                               content_type='application/x-ndjson')
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    finally:
+        with app.app_context():
+            db.session.execute(db.text('DROP TRIGGER reject_import_row'))
+            db.session.commit()
+
+    failures = []
+    summary = lines[-1]
+    failed_lines = sorted(error['line'] for line in lines if line['type'] == 'chunk' for error in line['errors'])
+    if summary['imported'] != 2 or failed_lines != [2, 3, 4, 5, 6]:
+        failures.append(f'смешанный файл: импортировано {summary["imported"]}, ошибки в строках {failed_lines}')
+    found = client.get('/api/books?isbn=mix-000007').get_json()
+    if not found['books']:
+        failures.append('смешанный файл: корректная строка не записана')
+    print(f'Смешанный файл: импортировано {summary["imported"]}, ошибок {summary["failed"]}')
+    return failures
+
+
+def check_invalid_encoding(client):
+    """Строки с некорректным UTF-8 и слишком длинное поле CSV - ошибки строк, а не обрыв ответа"""
+    failures = []
+    ndjson = (
+        '{"title": "Encoding good 1", "isbn": "enc-000001"}\n'.encode('utf-8')
+        + b'{"title": "\xff\xfe"}\n'
+        + '{"title": "Encoding good 2", "isbn": "enc-000002"}\n'.encode('utf-8')
+    )
+    csv_body = (
+        'title,isbn\n"Encoding good 3",enc-000003\n'.encode('utf-8')
+        + b'"\xff",enc-000004\n'
+        + f'"{"x" * 200000}",enc-000005\n"Encoding good 4",enc-000006\n'.encode('utf-8')
+    )
+    for name, content_type, body, expected_lines in (
+        ('NDJSON', 'application/x-ndjson', ndjson, [2]),
+        ('CSV', 'text/csv', csv_body, [3, 4]),
+    ):
+        response = client.post('/api/books/import', data=body, content_type=content_type)
+        lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        summary = lines[-1]
+        failed_lines = sorted(error['line'] for line in lines if line['type'] == 'chunk' for error in line['errors'])
+        if summary.get('type') != 'summary' or summary['imported'] != 2 or failed_lines != expected_lines:
+            failures.append(f'{name} с ошибками кодировки: импортировано {summary.get("imported")}, '
+                            f'ошибки в строках {failed_lines}')
+    print(f'Ошибки кодировки и CSV: {"OK" if not failures else "ОШИБКА"}')
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=50000, help='Строк в каждом файле импорта')
+    parser.add_argument('--single-rows', type=int, default=300, help='Книг, добавляемых по одной')
+    parser.add_argument('--chunk-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    client = app.test_client()
+    failures = []
+
+    with app.app_context():
+        from models import Author, Genre
+        author_ids = [author.id for author in Author.query.limit(2)]
+        genre_ids = [genre.id for genre in Genre.query.limit(1)]
+
+    with timed() as timing:
+        for index in range(args.single_rows):
+            client.post('/api/books', json={
+                'title': f'Single {index}', 'description': 'Описание', 'isbn': f'sgl-{index:09d}',
+                'total_copies': 3, 'author_ids': author_ids, 'genre_ids': genre_ids,
+            })
+    print(f'POST /api/books по одной: {args.single_rows / timing.elapsed:>10.0f} строк/с')
+
+    expected_errors = args.rows // BAD_ROW_EVERY
+    for name, content_type, body in (
+        ('NDJSON', 'application/x-ndjson', as_ndjson(generate_rows(args.rows, 'Ndjson'))),
+        ('CSV', 'text/csv', as_csv(generate_rows(args.rows, 'Csv'))),
+    ):
+        summary = import_over_http(client, body, content_type, args.chunk_size)
+        print(
+            f'Импорт {name:<7}{summary["rows_per_second"]:>20.0f} строк/с: импортировано {summary["imported"]}, '
+            f'ошибок {summary["failed"]}, авторов создано {summary["authors_created"]}, {summary["seconds"]:.1f} с'
+        )
+        if summary['failed'] != expected_errors or summary['imported'] != args.rows - expected_errors:
+            failures.append(f'{name}: ожидалось {expected_errors} ошибок')
+
+    # Повторный импорт тех же ISBN не создает дубликатов
+    summary = import_over_http(client, as_ndjson(generate_rows(10, 'Ndjson')), 'application/x-ndjson', args.chunk_size)
+    if summary['imported']:
+        failures.append('повторный импорт создал дубликаты')
+
+    failures.extend(check_mixed_file(app, client))
+    failures.extend(check_invalid_encoding(client))
+
+    found = client.get('/api/books/search?q=Ndjson').get_json()
+    if not found['total']:
+        failures.append('импортированные книги не найдены поиском')
+
+    for failure in failures:
+        print(f'ОШИБКА: {failure}')
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
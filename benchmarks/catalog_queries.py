@@ -0,0 +1,83 @@
+"""
+Проверка числа SQL запросов на страницах каталога
+
+Число запросов на один HTTP запрос не должно расти вместе с размером страницы.
+
+Запуск:
+    python -m benchmarks.catalog_queries
+"""
+import sys
+
+from benchmarks.common import create_benchmark_app, count_queries
+from models import db, Book, Author, Genre
+
+PAGE_SIZES = [5, 20, 100]
+
+ENDPOINTS = [
+    '/api/books?per_page={size}',
+    '/api/books/search?q=Book',
+    '/',
+    '/books',
+]
+
+
+def populate(total_books=120):
+    """Добавление книг, у каждой из которых есть авторы и жанры"""
+    authors = [Author(first_name=f'Имя{i}', last_name=f'Фамилия{i}') for i in range(10)]
+    genres = [Genre(name=f'Жанр {i}') for i in range(6)]
+    db.session.add_all(authors + genres)
+
+    for i in range(total_books):
+        book = Book(
+            title=f'Book {i}',
+            description=f'Описание книги {i}',
+            publication_year=1800 + i,
+            total_copies=2,
+            available_copies=1
+        )
+        book.authors = [authors[i % 10], authors[(i + 3) % 10]]
+        book.genres = [genres[i % 6], genres[(i + 1) % 6]]
+        db.session.add(book)
+
+    db.session.commit()
+
+
+def main():
+    app = create_benchmark_app()
+
+    # Считаются запросы отрисовки страниц, а не попадания в кэш фрагментов
+    from services.fragment_cache import init_fragment_cache
+    app.config['FRAGMENT_CACHE_ENABLED'] = False
+    init_fragment_cache(app)
+
+    with app.app_context():
+        populate()
+        engine = db.engine
+
+    client = app.test_client()
+    failures = []
+
+    for endpoint in ENDPOINTS:
+        # Прогрев кэшей (например, общего числа книг), чтобы сравнивать установившийся режим
+        client.get(endpoint.format(size=PAGE_SIZES[0]))
+        counts = {}
+        for size in PAGE_SIZES:
+            url = endpoint.format(size=size)
+            with count_queries(engine) as counter:
+                response = client.get(url)
+            assert response.status_code == 200, f'{url}: {response.status_code}'
+            counts[size] = counter.count
+
+        print(f'{endpoint:40} ' + ' '.join(f'{size}:{count}' for size, count in counts.items()))
+        if len(set(counts.values())) != 1:
+            failures.append(endpoint)
+
+    if failures:
+        print('Число запросов зависит от размера страницы:', ', '.join(failures))
+        sys.exit(1)
+
+    print('OK: число запросов не зависит от размера страницы')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Общие утилиты для бенчмарков"""
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+
+def create_benchmark_app(db_path=None):
+    """
+    Создание приложения с отдельной SQLite базой для бенчмарка, база подготавливается через bootstrap
+
+    Args:
+        db_path (str): Путь к файлу базы, по умолчанию временный файл
+
+    Returns:
+        Flask: Экземпляр приложения
+    """
+    if db_path is None:
+        fd, db_path = tempfile.mkstemp(prefix='library-bench-', suffix='.db')
+        os.close(fd)
+        os.remove(db_path)
+
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+    from config import Config
+    Config.SQLALCHEMY_DATABASE_URI = os.environ['DATABASE_URL']
+
+    from app import create_app
+    from services.bootstrap import bootstrap_app
+    app = create_app()
+    bootstrap_app(app)
+    return app
+
+
+class QueryCounter:
+    """Счетчик SQL запросов, выполненных через движок"""
+
+    def __init__(self):
+        self.count = 0
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(engine):
+    """Подсчет SQL запросов внутри блока"""
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter)
+
+
+@contextmanager
+def timed():
+    """Замер времени выполнения блока, результат в поле elapsed"""
+    result = type('Timing', (), {})()
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result.elapsed = time.perf_counter() - start
@@ -0,0 +1,171 @@
+"""
+Конкурентные записи бронирований при разных профилях движка SQLite
+
+Писатели в нескольких потоках бронируют и сразу отменяют случайные книги
+(POST и DELETE /api/reservations), читатели одновременно листают каталог.
+Каждый профиль запускается в отдельном процессе на своей базе, так как
+параметры движка читаются при создании приложения. Для профиля выводятся
+операции записи в секунду, задержки, ошибки 5xx («database is locked»),
+повторы при блокировке и ожидание соединения пула.
+
+Профили:
+    rollback-journal  журнал DELETE, synchronous=FULL, без повторов (прежнее поведение,
+                      busy_timeout 5 с - значение драйвера sqlite3 по умолчанию)
+    wal               профиль по умолчанию: WAL, synchronous=NORMAL, busy_timeout 5 с, повторы
+    wal-no-wait       WAL без ожидания блокировки: конфликты разрешаются только повторами
+
+Запуск:
+    python -m benchmarks.concurrent_writes --writers 8 --readers 4 --seconds 10
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+
+from benchmarks.common import create_benchmark_app
+
+PROFILES = {
+    'rollback-journal': {
+        'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL',
+        'SQLITE_BUSY_TIMEOUT_MS': '5000', 'DB_LOCK_RETRIES': '0',
+    },
+    'wal': {},
+    'wal-no-wait': {'SQLITE_BUSY_TIMEOUT_MS': '0', 'DB_LOCK_RETRIES': '5'},
+}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)] if values else 0.0
+
+
+def writer(app, book_ids, user_ids, deadline, seed, result):
+    client = app.test_client()
+    rng = random.Random(seed)
+    while time.monotonic() < deadline:
+        start = time.perf_counter()
+        response = client.post('/api/reservations', json={
+            'book_id': rng.choice(book_ids), 'user_id': rng.choice(user_ids),
+        })
+        if response.status_code == 201:
+            response = client.delete(f"/api/reservations/{response.get_json()['id']}")
+        result['latencies'].append(time.perf_counter() - start)
+        result['statuses'][response.status_code] = result['statuses'].get(response.status_code, 0) + 1
+
+
+def reader(app, book_ids, deadline, seed, result):
+    client = app.test_client()
+    rng = random.Random(seed)
+    while time.monotonic() < deadline:
+        client.get(f'/api/books?page={rng.randint(1, 50)}&facets=false')
+        client.get(f'/api/books/{rng.choice(book_ids)}')
+        result['reads'] += 2
+
+
+def run_profile(args):
+    """Прогон одного профиля в текущем процессе, результат - JSON в stdout"""
+    app = create_benchmark_app()
+
+    from models import db, Book, User
+    from services.dataset import DatasetGenerator
+    from services.engine_profiles import engine_stats
+
+    with app.app_context():
+        DatasetGenerator(seed=1, books=args.books, authors=args.books // 5, users=args.users,
+                         reservations=args.books).generate()
+        book_ids = [book_id for (book_id,) in db.session.query(Book.id)]
+        user_ids = [user_id for (user_id,) in db.session.query(User.id).filter(User.role == 'reader')]
+        journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+
+    deadline = time.monotonic() + args.seconds
+    writes = [{'latencies': [], 'statuses': {}} for _ in range(args.writers)]
+    reads = [{'reads': 0} for _ in range(args.readers)]
+    threads = [
+        threading.Thread(target=writer, args=(app, book_ids, user_ids, deadline, index, writes[index]))
+        for index in range(args.writers)
+    ] + [
+        threading.Thread(target=reader, args=(app, book_ids, deadline, 1000 + index, reads[index]))
+        for index in range(args.readers)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [value for result in writes for value in result['latencies']]
+    statuses = {}
+    for result in writes:
+        for status, count in result['statuses'].items():
+            statuses[status] = statuses.get(status, 0) + count
+    with app.app_context():
+        stats = engine_stats()
+    pool = stats['pools'].get('primary', {})
+    print(json.dumps({
+        'journal_mode': journal_mode,
+        'writes_per_second': len(latencies) / elapsed,
+        'reads_per_second': sum(result['reads'] for result in reads) / elapsed,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'errors': sum(count for status, count in statuses.items() if status >= 500),
+        'statuses': statuses,
+        'lock_retries': stats['lock_retries'],
+        'pool_wait_max_ms': pool.get('wait_seconds_max', 0) * 1000,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', type=int, default=8)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--books', type=int, default=2000)
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--profiles', nargs='*', default=list(PROFILES), choices=list(PROFILES))
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_profile(args)
+        return
+
+    print(f'Писателей: {args.writers}, читателей: {args.readers}, {args.seconds:.0f} с на профиль')
+    print(f'  {"профиль":<18}{"журнал":>8}{"зап/с":>8}{"чт/с":>8}{"p50":>8}{"p95":>9}'
+          f'{"5xx":>6}{"повторы":>9}{"отказы":>8}{"пул max":>9}')
+    failures = []
+    for name in args.profiles:
+        env = dict(os.environ, LOG_LEVEL='ERROR', OPEN_LIBRARY_STARTUP_HEALTH_CHECK='false', **PROFILES[name])
+        completed = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.concurrent_writes', '--worker',
+             '--writers', str(args.writers), '--readers', str(args.readers), '--seconds', str(args.seconds),
+             '--books', str(args.books), '--users', str(args.users)],
+            env=env, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            print(completed.stderr[-2000:])
+            failures.append(f'{name}: прогон завершился с кодом {completed.returncode}')
+            continue
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        print(
+            f"  {name:<18}{result['journal_mode']:>8}{result['writes_per_second']:>8.0f}"
+            f"{result['reads_per_second']:>8.0f}{result['p50_ms']:>8.1f}{result['p95_ms']:>9.1f}"
+            f"{result['errors']:>6}{result['lock_retries']['retries']:>9}{result['lock_retries']['failures']:>8}"
+            f"{result['pool_wait_max_ms']:>9.1f}"
+        )
+        # Профиль по умолчанию не должен терять записи; wal-no-wait показывает работу повторов
+        if name == 'wal' and result['errors']:
+            failures.append(f'{name}: {result["errors"]} ошибок записи')
+
+    for failure in failures:
+        print(f'ОШИБКА: {failure}')
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,205 @@
+"""
+Бенчмарк горячих эндпоинтов с бюджетами задержки и числа SQL запросов
+
+Приложение собирается на синтетических данных (DatasetGenerator), запросы
+выполняются через тестовый клиент Flask. Для каждого эндпоинта выводятся
+p50/p95/p99, запросов в секунду и SQL запросов на один HTTP запрос.
+Результаты сравниваются с бюджетами из benchmarks/budgets.json: превышение
+p95 или максимального числа SQL запросов завершает запуск с кодом 1.
+
+Запуск:
+    python -m benchmarks.endpoints
+    python -m benchmarks.endpoints --requests 500 --books 50000
+    python -m benchmarks.endpoints --write-budgets    # пересчитать бюджеты с запасом
+    python -m benchmarks.endpoints --only фильтры --write-budgets
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+from benchmarks.common import create_benchmark_app, count_queries
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), 'budgets.json')
+
+# Запас по задержке при пересчете бюджетов: замеры на разных машинах и прогонах шумят
+LATENCY_HEADROOM = 3.0
+
+# Имя, метод, шаблон адреса, выполняется ли запрос вошедшим пользователем
+ENDPOINTS = [
+    ('GET /api/books', 'GET', '/api/books?page={page}&per_page=20', False),
+    ('GET /api/books (фильтры)', 'GET',
+     '/api/books?genre_id={genre_id}&year_from={decade}&year_to={decade_end}&status=available', False),
+    ('GET /api/books/search', 'GET', '/api/books/search?q={word}', False),
+    ('GET /api/books/<id>', 'GET', '/api/books/{book_id}', False),
+    ('POST /api/reservations', 'POST', '/api/reservations', False),
+    ('GET /api/reservations/user/<id>', 'GET', '/api/reservations/user/{user_id}', False),
+    ('GET /', 'GET', '/', True),
+    ('GET /books', 'GET', '/books?page={page}', True),
+    ('GET /books (аноним, кэш)', 'GET', '/books?page={page}', False),
+    ('GET /books/<id>', 'GET', '/books/{book_id}', True),
+    ('GET /profile', 'GET', '/profile', True),
+]
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(int(len(sorted_values) * fraction), len(sorted_values) - 1)]
+
+
+def build_dataset(app, args):
+    from models import db, Book, User
+    from services.dataset import DatasetGenerator, TITLE_WORDS, ZipfSampler
+
+    with app.app_context():
+        generator = DatasetGenerator(
+            seed=args.seed, books=args.books, authors=args.books // 5, genres=30,
+            users=args.users, reservations=args.reservations, chunk_size=10000
+        )
+        generator.generate()
+        book_ids = [book_id for (book_id,) in db.session.query(Book.id)]
+        user_ids = [user_id for (user_id,) in db.session.query(User.id).filter(User.role == 'reader')]
+
+    rng = random.Random(args.seed)
+    books = ZipfSampler(book_ids, 1.1, rng)
+    users = ZipfSampler(user_ids, 0.9, rng)
+    def params():
+        decade = rng.randrange(1800, 2020, 10)
+        return {
+            'page': rng.randint(1, 50),
+            'genre_id': rng.randint(1, 30),
+            'decade': decade,
+            'decade_end': decade + 9,
+            'word': rng.choice(TITLE_WORDS),
+            'book_id': books.sample(),
+            'user_id': users.sample(),
+        }
+    return params
+
+
+def run_endpoint(engine, client, method, template, params, requests):
+    """Задержки и число SQL запросов по каждому HTTP запросу"""
+    timings = []
+    queries = []
+    statuses = {}
+    started = time.perf_counter()
+    for _ in range(requests):
+        values = params()
+        url = template.format(**values)
+        kwargs = {'json': {'book_id': values['book_id'], 'user_id': values['user_id']}} if method == 'POST' else {}
+        with count_queries(engine) as counter:
+            start = time.perf_counter()
+            response = client.open(url, method=method, **kwargs)
+            timings.append(time.perf_counter() - start)
+        queries.append(counter.count)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    elapsed = time.perf_counter() - started
+
+    timings.sort()
+    return {
+        'p50_ms': percentile(timings, 0.50) * 1000,
+        'p95_ms': percentile(timings, 0.95) * 1000,
+        'p99_ms': percentile(timings, 0.99) * 1000,
+        'rps': requests / elapsed,
+        'queries_mean': statistics.mean(queries),
+        'queries_max': max(queries),
+        'statuses': statuses,
+    }
+
+
+def check_budget(name, result, budget):
+    """Нарушения бюджета эндпоинта"""
+    violations = []
+    if budget is None:
+        return [f'{name}: нет бюджета']
+    if result['p95_ms'] > budget['p95_ms']:
+        violations.append(f"{name}: p95 {result['p95_ms']:.2f} мс > бюджета {budget['p95_ms']} мс")
+    if result['queries_max'] > budget['queries']:
+        violations.append(f"{name}: {result['queries_max']} SQL запросов > бюджета {budget['queries']}")
+    return violations
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200, help='Запросов к каждому эндпоинту')
+    parser.add_argument('--books', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--reservations', type=int, default=40000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--budgets', default=BUDGETS_PATH, help='Файл бюджетов')
+    parser.add_argument('--write-budgets', action='store_true', help='Записать бюджеты по текущему прогону')
+    parser.add_argument('--only', nargs='*', help='Только эндпоинты, имена которых содержат подстроку')
+    args = parser.parse_args()
+
+    os.environ['OPEN_LIBRARY_STARTUP_HEALTH_CHECK'] = 'false'
+    app = create_benchmark_app()
+    params = build_dataset(app, args)
+
+    from models import db, User
+    with app.app_context():
+        engine = db.engine
+        reader = db.session.get(User, params()['user_id'])
+        session_user = {'id': reader.id, 'email': reader.email, 'first_name': reader.first_name,
+                        'last_name': reader.last_name, 'role': reader.role}
+
+    anonymous = app.test_client()
+    logged_in = app.test_client()
+    with logged_in.session_transaction() as session:
+        session['user_id'] = session_user['id']
+        session['user'] = session_user
+
+    budgets = {}
+    if os.path.exists(args.budgets):
+        with open(args.budgets, encoding='utf-8') as budgets_file:
+            budgets = json.load(budgets_file)
+
+    print(f'Книг: {args.books}, пользователей: {args.users}, бронирований: {args.reservations}, '
+          f'запросов к эндпоинту: {args.requests}')
+    print(f'  {"эндпоинт":<36}{"p50":>8}{"p95":>8}{"p99":>8}{"зап/с":>9}{"SQL":>7}{"SQL max":>9}  статусы')
+
+    results = {}
+    violations = []
+    for name, method, template, needs_login in ENDPOINTS:
+        if args.only and not any(part in name for part in args.only):
+            continue
+        client = logged_in if needs_login else anonymous
+        # Прогрев: шаблоны, кэши числа книг и фрагментов
+        run_endpoint(engine, client, method, template, params, min(20, args.requests))
+        result = run_endpoint(engine, client, method, template, params, args.requests)
+        results[name] = result
+        print(
+            f"  {name:<36}{result['p50_ms']:>8.2f}{result['p95_ms']:>8.2f}{result['p99_ms']:>8.2f}"
+            f"{result['rps']:>9.0f}{result['queries_mean']:>7.1f}{result['queries_max']:>9}  "
+            + ' '.join(f'{status}x{count}' for status, count in sorted(result['statuses'].items()))
+        )
+        if not args.write_budgets:
+            violations.extend(check_budget(name, result, budgets.get(name)))
+
+    if args.write_budgets:
+        # Бюджеты эндпоинтов, не вошедших в прогон (--only), сохраняются
+        measured = {
+            name: {
+                'p95_ms': round(result['p95_ms'] * LATENCY_HEADROOM, 1),
+                'queries': result['queries_max'],
+            }
+            for name, result in results.items()
+        }
+        budgets = {name: measured.get(name, budgets.get(name)) for name, *_ in ENDPOINTS
+                   if name in measured or name in budgets}
+        with open(args.budgets, 'w', encoding='utf-8') as budgets_file:
+            json.dump(budgets, budgets_file, ensure_ascii=False, indent=2)
+            budgets_file.write('\n')
+        print(f'Бюджеты записаны в {args.budgets}')
+        return
+
+    for violation in violations:
+        print(f'ПРЕВЫШЕН БЮДЖЕТ: {violation}')
+    if violations:
+        sys.exit(1)
+    print('OK: все эндпоинты в пределах бюджетов')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Память и скорость потоковой выгрузки
+
+Каталог наполняется импортом, затем выгрузка книг выполняется при разном
+размере каталога. Пиковая память (tracemalloc) не должна расти вместе с
+числом книг. Выгруженный CSV повторно импортируется для проверки формата.
+
+Запуск:
+    python -m benchmarks.export --sizes 10000 50000
+"""
+import argparse
+import json
+import sys
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.book_import import generate_rows
+from benchmarks.common import create_benchmark_app, timed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 50000], help='Размеры каталога')
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    from services.book_import import BookImporter, read_csv
+    from services.export import export_lines
+
+    failures = []
+    peaks = []
+    imported = 0
+    with app.app_context():
+        importer = BookImporter(chunk_size=2000)
+        for size in sorted(args.sizes):
+            rows = generate_rows(size - imported, f'Export{size}', seed=size)
+            importer.import_rows(enumerate(rows, 1))
+            imported = size
+
+            for export_format in ('ndjson', 'csv'):
+                tracemalloc.start()
+                with timed() as timing:
+                    total_bytes = sum(len(part) for part in export_lines('books', export_format))
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                peaks.append(peak)
+                print(
+                    f'  книг ~{size:<8} {export_format:<7}{total_bytes / 1e6:>8.1f} МБ за {timing.elapsed:5.2f} с, '
+                    f'пик памяти {peak / 1e6:6.2f} МБ'
+                )
+
+        # Инкрементальная выгрузка после отметки времени содержит только новые книги
+        mark = datetime.utcnow()
+        importer.import_rows(enumerate(generate_rows(5, 'Incremental'), 1))
+        incremental = [json.loads(line) for part in export_lines('books', since=mark) for line in part.splitlines()]
+        if len(incremental) != 5:
+            failures.append(f'since: ожидалось 5 книг, выгружено {len(incremental)}')
+
+        # CSV выгрузки совместим с импортом: все строки - дубликаты по ISBN
+        csv_text = ''.join(export_lines('books', 'csv'))
+        reimport = BookImporter(chunk_size=2000).import_rows(read_csv(csv_text.splitlines(keepends=True)))
+        if reimport['imported'] or reimport['rows'] != len(csv_text.splitlines()) - 1:
+            failures.append('CSV выгрузки не читается импортом')
+
+        users = ''.join(export_lines('users'))
+        if 'password' in users:
+            failures.append('выгрузка пользователей содержит хэши паролей')
+
+    if max(peaks) > 2 * min(peaks) + 1e6:
+        failures.append('пиковая память растет с размером каталога')
+    for failure in failures:
+        print(f'ОШИБКА: {failure}')
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
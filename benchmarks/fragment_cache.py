@@ -0,0 +1,96 @@
+"""
+Время отрисовки страниц каталога без кэша фрагментов и с ним
+
+Анонимные запросы к главной, списку книг и странице книги выполняются
+с выключенным и включенным кэшем. Затем проверяется, что правка книги
+сбрасывает кэш, а вошедший пользователь получает страницу без кэша.
+
+Запуск:
+    python -m benchmarks.fragment_cache --requests 300
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from benchmarks.catalog_queries import populate
+from benchmarks.common import create_benchmark_app
+from models import db, Book
+
+PAGES = ['/', '/books', '/books?page=2', '/books/{book_id}']
+
+
+def measure(client, urls, requests):
+    """Среднее и p95 времени ответа по каждому адресу, миллисекунды"""
+    results = {}
+    for url in urls:
+        timings = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            response = client.get(url)
+            timings.append(time.perf_counter() - start)
+            assert response.status_code == 200, (url, response.status_code)
+        timings.sort()
+        results[url] = (statistics.mean(timings) * 1000, timings[int(len(timings) * 0.95)] * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=300, help='Запросов к каждой странице')
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    import services.fragment_cache as fragment_cache_module
+
+    with app.app_context():
+        populate()
+        book_id = db.session.query(db.func.max(Book.id)).scalar()
+
+    urls = [page.format(book_id=book_id) for page in PAGES]
+    client = app.test_client()
+
+    app.config['FRAGMENT_CACHE_ENABLED'] = False
+    fragment_cache_module.init_fragment_cache(app)
+    without_cache = measure(client, urls, args.requests)
+
+    app.config['FRAGMENT_CACHE_ENABLED'] = True
+    fragment_cache_module.init_fragment_cache(app)
+    with_cache = measure(client, urls, args.requests)
+    fragment_cache = fragment_cache_module.get_fragment_cache()
+
+    print(f'Запросов к каждой странице: {args.requests}')
+    print(f'  {"страница":<20}{"без кэша, мс":>22}{"с кэшем, мс":>22}')
+    for url in urls:
+        before, after = without_cache[url], with_cache[url]
+        print(f'  {url:<20}{before[0]:>10.2f} (p95 {before[1]:5.2f}){after[0]:>10.2f} (p95 {after[1]:5.2f})')
+
+    stats = fragment_cache.get_stats()
+    print(f'Попаданий: {stats["hits"]}, промахов: {stats["misses"]}, доля попаданий: {stats["hit_rate"]:.1%}')
+
+    failures = []
+
+    # Правка книги должна сбросить кэш
+    detail_url = urls[-1]
+    with app.app_context():
+        book = db.session.get(Book, book_id)
+        book.title = 'Переименованная книга'
+        db.session.commit()
+    if 'Переименованная книга' not in client.get(detail_url).get_data(as_text=True):
+        failures.append('страница книги не обновилась после правки')
+
+    # Вошедший пользователь видит кнопки бронирования, которых нет в кэше
+    with client.session_transaction() as session:
+        session['user_id'] = 1
+        session['user'] = {'id': 1, 'first_name': 'Bench', 'role': 'reader'}
+    if 'Забронировать' not in client.get('/books').get_data(as_text=True):
+        failures.append('вошедшему пользователю отдан фрагмент из кэша')
+
+    for failure in failures:
+        print(f'ОШИБКА: {failure}')
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""
+Пропускная способность входа и отзывчивость воркера во время хэширования паролей
+
+Несколько потоков непрерывно выполняют вход через POST /login, а отдельный
+поток в это время замеряет задержку дешевого запроса. Прогоны повторяются
+без пула процессов и с пулом. Пароли пользователей предварительно хэшируются
+с устаревшими параметрами, поэтому первый вход каждого пользователя
+пересчитывает хэш - бенчмарк проверяет, что это произошло.
+
+Запуск:
+    python -m benchmarks.login --users 8 --threads 8 --seconds 5 --pool-sizes 0 2
+"""
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+from benchmarks.common import create_benchmark_app
+
+PASSWORD = 'benchmark-password'
+
+
+def create_users(app, count, method):
+    """Пользователи с хэшем пароля, вычисленным с параметрами method"""
+    from models import db, User
+    from services.passwords import PasswordHasher
+
+    password_hash = PasswordHasher(method=method).hash(PASSWORD)
+    with app.app_context():
+        emails = [f'login-bench-{index}@library.local' for index in range(count)]
+        User.query.filter(User.email.in_(emails)).delete(synchronize_session=False)
+        db.session.add_all(
+            User(email=email, first_name='Bench', last_name=str(index), password_hash=password_hash)
+            for index, email in enumerate(emails)
+        )
+        db.session.commit()
+    return emails
+
+
+def stored_hashes(app, emails):
+    from models import User
+    with app.app_context():
+        return {user.email: user.password_hash for user in User.query.filter(User.email.in_(emails))}
+
+
+def run(app, emails, threads, seconds):
+    """Входы из threads потоков в течение seconds секунд и задержки дешевого запроса"""
+    stop = threading.Event()
+    logins = []
+    failures = []
+    probe_latencies = []
+
+    def login_worker(index):
+        client = app.test_client()
+        email = emails[index % len(emails)]
+        while not stop.is_set():
+            response = client.post('/login', data={'email': email, 'password': PASSWORD})
+            # Успешный вход перенаправляет, неуспешный снова показывает форму
+            (logins if response.status_code == 302 else failures).append(1)
+            client.get('/logout')
+
+    def probe_worker():
+        client = app.test_client()
+        while not stop.is_set():
+            start = time.perf_counter()
+            client.get('/api/web-versions/sort-options')
+            probe_latencies.append(time.perf_counter() - start)
+            time.sleep(0.01)
+
+    workers = [threading.Thread(target=login_worker, args=(index,)) for index in range(threads)]
+    workers.append(threading.Thread(target=probe_worker))
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    time.sleep(seconds)
+    stop.set()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    probe_latencies.sort()
+    return {
+        'logins_per_second': len(logins) / elapsed,
+        'failures': len(failures),
+        'probe_p50_ms': statistics.median(probe_latencies) * 1000 if probe_latencies else None,
+        'probe_p95_ms': probe_latencies[int(len(probe_latencies) * 0.95)] * 1000 if probe_latencies else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=8)
+    parser.add_argument('--threads', type=int, default=8, help='Потоков, выполняющих вход')
+    parser.add_argument('--seconds', type=float, default=5.0, help='Длительность прогона')
+    parser.add_argument('--pool-sizes', type=int, nargs='+', default=[0, os.cpu_count() or 1],
+                        help='Размеры пула процессов для сравнения, 0 - без пула')
+    parser.add_argument('--method', default='pbkdf2:sha256:600000', help='Текущие параметры хэширования')
+    parser.add_argument('--old-method', default='pbkdf2:sha256:260000', help='Параметры, с которыми созданы хэши')
+    args = parser.parse_args()
+
+    os.environ['OPEN_LIBRARY_STARTUP_HEALTH_CHECK'] = 'false'
+    os.environ['SMARTCAPTCHA_SERVER_KEY'] = ''
+    os.environ['PASSWORD_HASH_METHOD'] = args.method
+
+    app = create_benchmark_app()
+    app.config['PASSWORD_HASH_METHOD'] = args.method
+    import services.passwords as passwords
+
+    emails = create_users(app, args.users, args.old_method)
+    print(f'Пользователей: {args.users}, потоков: {args.threads}, CPU: {os.cpu_count()}, '
+          f'хэширование: {args.method} (было {args.old_method})')
+
+    failed = False
+    for index, pool_size in enumerate(args.pool_sizes):
+        app.config['PASSWORD_HASH_POOL_SIZE'] = pool_size
+        passwords.init_password_hasher(app)
+        hasher = passwords.get_password_hasher()
+        if pool_size:
+            # Процессы пула запускаются до замера
+            hasher.hash('')
+
+        result = run(app, emails, args.threads, args.seconds)
+        hasher.shutdown()
+        name = f'пул {pool_size}' if pool_size else 'без пула'
+        print(f'  {name:<12}{result["logins_per_second"]:>8.1f} входов/с, ошибок {result["failures"]}, '
+              f'дешевый запрос p50 {result["probe_p50_ms"]:.1f} мс, p95 {result["probe_p95_ms"]:.1f} мс')
+        failed = failed or bool(result['failures'])
+
+        if index == 0:
+            outdated = [email for email, value in stored_hashes(app, emails).items() if hasher.needs_rehash(value)]
+            print(f'  Хэшей с устаревшими параметрами после первого прогона: {len(outdated)}')
+            failed = failed or bool(outdated)
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""
+Параллельное бронирование: пропускная способность и проверка перебронирования
+
+Каждый клиент работает в своем потоке со своим тестовым клиентом Flask и
+пытается забронировать случайные книги через POST /api/reservations.
+
+Запуск:
+    python -m benchmarks.reservations --clients 50 --attempts 40
+    python -m benchmarks.reservations --legacy   # прежняя схема: чтение, проверка, запись
+"""
+import argparse
+import random
+import sys
+import threading
+from collections import Counter
+
+from flask import jsonify, request
+from sqlalchemy import func
+
+from benchmarks.common import create_benchmark_app, timed
+from models import db, Book, User, BookReservation
+
+
+def populate(books, copies, users):
+    db.session.add_all([
+        Book(title=f'Книга {i}', total_copies=copies, available_copies=copies)
+        for i in range(books)
+    ])
+    db.session.add_all([
+        User(email=f'bench{i}@example.com', password_hash='-', first_name='Bench', last_name=str(i))
+        for i in range(users)
+    ])
+    db.session.commit()
+    book_ids = [row[0] for row in db.session.query(Book.id).filter(Book.title.like('Книга %'))]
+    user_ids = [row[0] for row in db.session.query(User.id).filter(User.email.like('bench%'))]
+    return book_ids, user_ids
+
+
+def register_legacy_endpoint(app):
+    """Прежняя реализация бронирования для сравнения"""
+    @app.route('/bench/legacy-reservations', methods=['POST'])
+    def legacy_reservation():
+        data = request.get_json()
+        book = db.session.get(Book, data['book_id'])
+        if not book or book.available_copies <= 0:
+            return jsonify({'error': 'Книга недоступна для бронирования'}), 400
+        existing = BookReservation.query.filter_by(
+            book_id=data['book_id'], user_id=data['user_id'], status='active'
+        ).first()
+        if existing:
+            return jsonify({'error': 'Пользователь уже забронировал эту книгу'}), 400
+        db.session.add(BookReservation(book_id=data['book_id'], user_id=data['user_id']))
+        book.available_copies -= 1
+        db.session.commit()
+        return jsonify({}), 201
+
+
+def check_consistency(book_ids):
+    """Поиск перебронированных книг и расхождений счетчика копий"""
+    active = dict(
+        db.session.query(BookReservation.book_id, func.count(BookReservation.id))
+        .filter(BookReservation.status == 'active', BookReservation.book_id.in_(book_ids))
+        .group_by(BookReservation.book_id)
+    )
+    oversold = 0
+    drifted = 0
+    for book in Book.query.filter(Book.id.in_(book_ids)):
+        reserved = active.get(book.id, 0)
+        if reserved > book.total_copies or book.available_copies < 0:
+            oversold += 1
+        if book.available_copies + reserved != book.total_copies:
+            drifted += 1
+    return oversold, drifted
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=50)
+    parser.add_argument('--attempts', type=int, default=40, help='Попыток на клиента')
+    parser.add_argument('--books', type=int, default=20)
+    parser.add_argument('--copies', type=int, default=5)
+    parser.add_argument('--legacy', action='store_true')
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    register_legacy_endpoint(app)
+    url = '/bench/legacy-reservations' if args.legacy else '/api/reservations'
+
+    with app.app_context():
+        book_ids, user_ids = populate(args.books, args.copies, args.clients)
+
+    statuses = Counter()
+    statuses_lock = threading.Lock()
+    start_barrier = threading.Barrier(args.clients)
+
+    def client_worker(user_id, seed):
+        rng = random.Random(seed)
+        client = app.test_client()
+        local = Counter()
+        start_barrier.wait()
+        for _ in range(args.attempts):
+            response = client.post(url, json={'book_id': rng.choice(book_ids), 'user_id': user_id})
+            local[response.status_code] += 1
+        with statuses_lock:
+            statuses.update(local)
+
+    threads = [
+        threading.Thread(target=client_worker, args=(user_id, index))
+        for index, user_id in enumerate(user_ids)
+    ]
+    with timed() as timing:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    total = sum(statuses.values())
+    with app.app_context():
+        oversold, drifted = check_consistency(book_ids)
+
+    print(f'Режим: {"legacy" if args.legacy else "atomic"}, клиентов: {args.clients}')
+    print(f'Запросов: {total} за {timing.elapsed:.2f} с ({total / timing.elapsed:.0f} запросов/с)')
+    print(f'Успешных бронирований: {statuses[201]} ({statuses[201] / timing.elapsed:.0f} в секунду)')
+    print(f'Коды ответов: {dict(statuses)}')
+    print(f'Доступно копий всего: {args.books * args.copies}')
+    print(f'Перебронированных книг: {oversold}, расхождений счетчика: {drifted}')
+
+    if oversold or drifted:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Сравнение полнотекстового индекса с поиском через ILIKE
+
+Запуск:
+    python -m benchmarks.search --books 100000
+"""
+import argparse
+import random
+import statistics
+
+from sqlalchemy import insert
+
+from benchmarks.common import create_benchmark_app, timed
+from models import db, Book, Author, book_authors
+from services.catalog import catalog_query, serialize_books
+from services.search import get_search_service
+
+WORDS = [
+    'война', 'мир', 'преступление', 'наказание', 'сад', 'душа', 'дочь', 'брат',
+    'остров', 'море', 'город', 'звезда', 'ночь', 'дорога', 'история', 'тайна',
+    'science', 'garden', 'history', 'night', 'river', 'empire', 'winter', 'journey',
+]
+
+QUERIES = ['тайна', 'история ночь', 'river', 'Фамилия42', 'empire winter', 'звезд']
+
+
+def populate(total_books, chunk_size=10000):
+    """Быстрое заполнение каталога через executemany"""
+    rng = random.Random(42)
+
+    db.session.execute(insert(Author), [
+        {'first_name': f'Имя{i}', 'last_name': f'Фамилия{i}'} for i in range(1000)
+    ])
+    author_ids = [row[0] for row in db.session.query(Author.id)]
+    next_id = (db.session.query(db.func.max(Book.id)).scalar() or 0) + 1
+
+    for start in range(0, total_books, chunk_size):
+        size = min(chunk_size, total_books - start)
+        books = []
+        links = []
+        for offset in range(size):
+            book_id = next_id + start + offset
+            books.append({
+                'id': book_id,
+                'title': ' '.join(rng.choices(WORDS, k=3)).capitalize(),
+                'description': ' '.join(rng.choices(WORDS, k=20)),
+                'publication_year': rng.randint(1800, 2024),
+                'total_copies': 1,
+                'available_copies': 1,
+            })
+            links.append({'book_id': book_id, 'author_id': rng.choice(author_ids)})
+        db.session.execute(insert(Book), books)
+        db.session.execute(insert(book_authors), links)
+    db.session.commit()
+
+
+def legacy_search(query):
+    """Прежняя реализация: ILIKE по всей таблице без пагинации"""
+    books = catalog_query().filter(
+        Book.title.ilike(f'%{query}%') |
+        Book.description.ilike(f'%{query}%')
+    ).all()
+    return serialize_books(books)
+
+
+def indexed_search(query, per_page=10):
+    book_ids, total = get_search_service().search(query, page=1, per_page=per_page)
+    books = catalog_query().filter(Book.id.in_(book_ids)).all()
+    return serialize_books(books)
+
+
+def measure(fn, query, repeat):
+    samples = []
+    for _ in range(repeat):
+        with timed() as timing:
+            fn(query)
+        samples.append(timing.elapsed * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--books', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    app = create_benchmark_app()
+    with app.app_context():
+        print(f'Заполнение каталога: {args.books} книг')
+        with timed() as timing:
+            populate(args.books)
+            get_search_service().rebuild()
+        print(f'Готово за {timing.elapsed:.1f} с')
+
+        print(f'{"запрос":20} {"ILIKE, мс":>12} {"FTS, мс":>12} {"ускорение":>10}')
+        for query in QUERIES:
+            legacy_ms = measure(legacy_search, query, args.repeat)
+            indexed_ms = measure(indexed_search, query, args.repeat)
+            print(f'{query:20} {legacy_ms:12.1f} {indexed_ms:12.1f} {legacy_ms / indexed_ms:9.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Проверка объединения одновременных запросов веб-версий одной книги
+
+100 одновременных запросов к /api/books/<id>/web-versions должны привести
+к одному вызову шлюза. С --processes N запросы выполняются из N процессов
+с общим SQLite кэшем.
+
+Запуск:
+    python -m benchmarks.single_flight
+    python -m benchmarks.single_flight --processes 4
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+
+from benchmarks.common import timed
+from benchmarks.stub_gateway import StubGateway
+
+
+def fire_requests(app, book_id, concurrency):
+    """Одновременные запросы веб-версий; возвращает число неуспешных ответов"""
+    barrier = threading.Barrier(concurrency)
+    failures = []
+
+    def worker():
+        client = app.test_client()
+        barrier.wait()
+        response = client.get(f'/api/books/{book_id}/web-versions')
+        if response.status_code != 200 or not response.get_json().get('success'):
+            failures.append(response.status_code)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(failures)
+
+
+def worker_process(db_path, book_id, concurrency, ready, results):
+    from benchmarks.common import create_benchmark_app
+    app = create_benchmark_app(db_path)
+    ready.wait()
+    results.put(fire_requests(app, book_id, concurrency))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--processes', type=int, default=1)
+    parser.add_argument('--delay', type=float, default=0.5, help='Задержка ответа шлюза, секунды')
+    args = parser.parse_args()
+
+    gateway = StubGateway(delay=args.delay).start()
+    fd, db_path = tempfile.mkstemp(prefix='library-bench-', suffix='.db')
+    os.close(fd)
+    os.remove(db_path)
+
+    os.environ['OPEN_LIBRARY_API_GATEWAY_URL'] = gateway.url
+    os.environ['OPEN_LIBRARY_STARTUP_HEALTH_CHECK'] = 'false'
+    os.environ['OPEN_LIBRARY_CACHE_BACKEND'] = 'sqlite'
+    os.environ['OPEN_LIBRARY_CACHE_PATH'] = db_path + '.cache'
+
+    from benchmarks.common import create_benchmark_app
+    from models import Book
+
+    app = create_benchmark_app(db_path)
+    with app.app_context():
+        book_id = Book.query.order_by(Book.id).first().id
+
+    if args.processes == 1:
+        with timed() as timing:
+            failures = fire_requests(app, book_id, args.requests)
+    else:
+        context = multiprocessing.get_context('fork')
+        # Процессы начинают запросы одновременно, когда все приложения созданы
+        ready = context.Barrier(args.processes + 1)
+        results = context.Queue()
+        per_process = args.requests // args.processes
+        processes = [
+            context.Process(
+                target=worker_process,
+                args=(db_path, book_id, per_process, ready, results)
+            )
+            for _ in range(args.processes)
+        ]
+        for process in processes:
+            process.start()
+        ready.wait()
+        with timed() as timing:
+            failures = sum(results.get() for _ in processes)
+        for process in processes:
+            process.join()
+
+    print(f'Процессов: {args.processes}, запросов: {args.requests}, время: {timing.elapsed:.2f} с')
+    print(f'Неуспешных ответов: {failures}')
+    print(f'Вызовов шлюза: {gateway.search_calls}')
+
+    gateway.stop()
+    if failures or gateway.search_calls != 1:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
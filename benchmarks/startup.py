@@ -0,0 +1,72 @@
+"""
+Замер холодного запуска воркера: импорт модулей и фазы create_app
+
+Каждый запуск выполняется в отдельном процессе, как у воркера предфоркающего
+сервера. База подготавливается через bootstrap один раз заранее и в замер не входит.
+
+Запуск:
+    python -m benchmarks.startup --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+WORKER_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+application = app_module.create_app()
+finished = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (finished - imported) * 1000,
+    'phases': application.extensions['startup_timings']['create_app']['phases'],
+}))
+"""
+
+
+def run_worker(env):
+    output = subprocess.run(
+        [sys.executable, '-c', WORKER_SCRIPT],
+        env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(prefix='library-bench-', suffix='.db')
+    os.close(fd)
+    os.remove(db_path)
+
+    env = dict(os.environ)
+    env['DATABASE_URL'] = f'sqlite:///{db_path}'
+    env.setdefault('LOG_LEVEL', 'WARNING')
+    env['AUTO_BOOTSTRAP'] = 'false'
+
+    subprocess.run(
+        [sys.executable, '-m', 'flask', '--app', 'app', 'bootstrap'],
+        env=env, capture_output=True, check=True
+    )
+
+    runs = [run_worker(env) for _ in range(args.runs)]
+
+    print(f'Запусков: {args.runs}, медиана в мс')
+    print(f'{"импорт модулей":<24}{statistics.median(run["import_ms"] for run in runs):>10.1f}')
+    print(f'{"create_app":<24}{statistics.median(run["create_app_ms"] for run in runs):>10.1f}')
+    for phase in runs[0]['phases']:
+        print(f'  {phase:<22}{statistics.median(run["phases"][phase] for run in runs):>10.1f}')
+
+    os.remove(db_path)
+
+
+if __name__ == '__main__':
+    main()
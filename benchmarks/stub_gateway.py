@@ -0,0 +1,153 @@
+"""
+Локальная заглушка Open Library API Gateway для бенчмарков
+
+Отвечает на /open-library/search и /health, а также на POST /validate
+как сервис SmartCaptcha. Считает обращения к поиску и может задерживать
+ответы, имитируя медленный шлюз. Ответы берутся из
+файла фикстур (JSON: название -> ответ) или строятся по названию.
+
+Запуск отдельным процессом:
+    python -m benchmarks.stub_gateway --port 18080 --delay 0.2 --fixtures fixtures.json
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+
+class _Server(ThreadingHTTPServer):
+    # Очередь по умолчанию (5) переполняется сотнями одновременных подключений
+    request_queue_size = 512
+    daemon_threads = True
+
+
+def build_search_response(title, sort='new'):
+    """Детерминированный ответ поиска для названия книги"""
+    slug = '-'.join(title.lower().split()) or 'untitled'
+    results = [
+        {
+            'title': title,
+            'authors': [f'Автор {title}'],
+            'publish_year': 1900 + len(title),
+            'edition_count': 2,
+            'cover_url': f'https://covers.example/{slug}.jpg',
+            'ebook_count': 1,
+            'borrow_links': [{'borrow_url': f'https://archive.example/details/{slug}-{sort}'}],
+            'openlibrary_url': f'https://openlibrary.example/works/{slug}',
+        }
+    ]
+    return {
+        'success': True,
+        'results': results,
+        'total_results': len(results),
+        'results_with_ia': len(results),
+    }
+
+
+class StubGateway:
+    """
+    Заглушка шлюза в фоновом потоке
+
+    Args:
+        port (int): Порт, 0 - любой свободный
+        delay (float): Задержка ответа на поиск, секунды
+        fixtures (dict): Готовые ответы по названию книги
+    """
+
+    def __init__(self, port=0, delay=0.0, fixtures=None):
+        self.delay = delay
+        self.fixtures = fixtures or {}
+        self.search_calls = 0
+        self.captcha_calls = 0
+        self._lock = threading.Lock()
+        self.server = _Server(('127.0.0.1', port), self._handler_class())
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server.server_address[1]}/open-library/search'
+
+    @property
+    def captcha_url(self):
+        return f'http://127.0.0.1:{self.server.server_address[1]}/validate'
+
+    def _handler_class(self):
+        gateway = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Заголовки и тело пишутся отдельно, без этого ответ ждет отложенного ACK
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path.endswith('/health'):
+                    body = {'status': 'ok'}
+                else:
+                    with gateway._lock:
+                        gateway.search_calls += 1
+                    if gateway.delay:
+                        time.sleep(gateway.delay)
+                    params = parse_qs(parts.query)
+                    title = params.get('title', [''])[0]
+                    body = gateway.fixtures.get(title) or build_search_response(
+                        title, params.get('sort', ['new'])[0]
+                    )
+
+                self._send_json(body)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                form = parse_qs(self.rfile.read(length).decode())
+                with gateway._lock:
+                    gateway.captcha_calls += 1
+                if gateway.delay:
+                    time.sleep(gateway.delay)
+                token = form.get('token', [''])[0]
+                self._send_json({'status': 'ok' if token != 'invalid' else 'failed', 'message': '', 'host': ''})
+
+            def _send_json(self, body):
+                payload = json.dumps(body, ensure_ascii=False).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name='stub-gateway', daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--delay', type=float, default=0.0)
+    parser.add_argument('--fixtures', help='JSON файл: название книги -> ответ шлюза')
+    args = parser.parse_args()
+
+    fixtures = None
+    if args.fixtures:
+        with open(args.fixtures, encoding='utf-8') as fixtures_file:
+            fixtures = json.load(fixtures_file)
+
+    gateway = StubGateway(port=args.port, delay=args.delay, fixtures=fixtures)
+    print(f'Заглушка API Gateway: {gateway.url}')
+    try:
+        gateway.server.serve_forever()
+    except KeyboardInterrupt:
+        gateway.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Пакетное обновление веб-версий против заглушки API Gateway без сети
+
+Сравнивает скорость обновления при разном размере пула потоков, а затем
+время ответа /api/books/<id>/web-versions из сохраненных записей и при
+живом запросе к шлюзу.
+
+Запуск:
+    python -m benchmarks.web_versions --books 500 --delay 0.05
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import insert
+
+from benchmarks.common import create_benchmark_app
+from benchmarks.stub_gateway import StubGateway
+
+
+def populate(total_books):
+    from models import db, Book
+    db.session.execute(insert(Book), [
+        {'title': f'Книга {i}', 'total_copies': 1, 'available_copies': 1} for i in range(total_books)
+    ])
+    db.session.commit()
+
+
+def measure_requests(client, book_ids):
+    """Время ответа в миллисекундах для каждой книги"""
+    durations = []
+    for book_id in book_ids:
+        start = time.perf_counter()
+        response = client.get(f'/api/books/{book_id}/web-versions')
+        durations.append((time.perf_counter() - start) * 1000)
+        if response.status_code != 200 or not response.get_json().get('success'):
+            raise RuntimeError(f'Ошибка ответа для книги {book_id}: {response.status_code}')
+    return durations
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--books', type=int, default=500)
+    parser.add_argument('--delay', type=float, default=0.05, help='Задержка ответа шлюза, секунды')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=200, help='Запросов страницы для сравнения')
+    args = parser.parse_args()
+
+    gateway = StubGateway(delay=args.delay).start()
+    os.environ['OPEN_LIBRARY_API_GATEWAY_URL'] = gateway.url
+    os.environ['OPEN_LIBRARY_STARTUP_HEALTH_CHECK'] = 'false'
+    # Без кэша каждое обновление действительно обращается к шлюзу
+    os.environ['OPEN_LIBRARY_CACHE_ENABLED'] = 'false'
+
+    app = create_benchmark_app()
+    from models import db, Book, BookWebVersion
+    from services.open_library import get_open_library_service
+    from services.web_versions import create_prefetcher
+
+    with app.app_context():
+        populate(args.books)
+        prefetcher = create_prefetcher(app, get_open_library_service())
+
+        print(f'Книг: {Book.query.count()}, задержка шлюза: {args.delay * 1000:.0f} мс')
+        for workers in args.workers:
+            prefetcher.max_workers = workers
+            calls_before = gateway.search_calls
+            stats = prefetcher.prefetch(refresh_all=True)
+            print(
+                f'  потоков {workers:>3}: {stats["seconds"]:.2f} с, '
+                f'{stats["books"] / stats["seconds"]:.0f} книг/с, '
+                f'сохранено {stats["stored"]}, ошибок {stats["failed"]}, '
+                f'вызовов шлюза {gateway.search_calls - calls_before}'
+            )
+            if stats['failed']:
+                sys.exit(1)
+
+        book_ids = [row[0] for row in db.session.query(Book.id).order_by(Book.id).limit(args.requests)]
+
+    client = app.test_client()
+
+    calls_before = gateway.search_calls
+    stored = measure_requests(client, book_ids)
+    stored_calls = gateway.search_calls - calls_before
+
+    with app.app_context():
+        db.session.query(BookWebVersion).delete()
+        db.session.commit()
+
+    calls_before = gateway.search_calls
+    live = measure_requests(client, book_ids)
+    live_calls = gateway.search_calls - calls_before
+
+    print(f'Просмотры страницы ({len(book_ids)} запросов), медиана / p95 в мс:')
+    for name, durations, calls in (('сохраненные', stored, stored_calls), ('живой запрос', live, live_calls)):
+        p95 = statistics.quantiles(durations, n=20)[-1]
+        print(f'  {name:<14}{statistics.median(durations):>8.1f} / {p95:.1f}, вызовов шлюза: {calls}')
+
+    gateway.stop()
+    if stored_calls:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
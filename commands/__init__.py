@@ -0,0 +1,19 @@
+from .reservations import reservations_cli
+from .database import bootstrap_command, check_query_plans_command
+from .web_versions import web_versions_cli
+from .books import books_cli
+from .export import export_command
+from .dataset import dataset_cli
+from .replicas import replicas_cli
+
+
+def register_commands(app):
+    """Регистрация CLI команд приложения"""
+    app.cli.add_command(reservations_cli)
+    app.cli.add_command(bootstrap_command)
+    app.cli.add_command(check_query_plans_command)
+    app.cli.add_command(web_versions_cli)
+    app.cli.add_command(books_cli)
+    app.cli.add_command(export_command)
+    app.cli.add_command(dataset_cli)
+    app.cli.add_command(replicas_cli)
@@ -0,0 +1,42 @@
+import sys
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from services.book_import import READERS, create_importer
+
+books_cli = AppGroup('books', help='Массовые операции с каталогом книг')
+
+
+@books_cli.command('import')
+@click.argument('source', type=click.File('rb', lazy=False))
+@click.option('--format', 'import_format', type=click.Choice(sorted(READERS)), default=None,
+              help='Формат файла, по умолчанию по расширению')
+@click.option('--chunk-size', type=int, default=None, help='Строк в одном пакете')
+def import_command(source, import_format, chunk_size):
+    """Импорт книг из NDJSON или CSV файла (- для стандартного ввода)"""
+    if import_format is None:
+        import_format = 'csv' if source.name.endswith('.csv') else 'ndjson'
+
+    importer = create_importer(current_app)
+    if chunk_size:
+        importer.chunk_size = chunk_size
+
+    stats = importer.import_rows(
+        READERS[import_format](source),
+        progress=lambda current: click.echo(
+            f"Обработано строк: {current['rows']}, импортировано: {current['imported']}, "
+            f"ошибок: {current['failed']} ({current['rows_per_second']:.0f} строк/с)"
+        )
+    )
+    for error in stats['errors']:
+        click.echo(f"Строка {error['line']}: {error['error']}", err=True)
+    if stats['failed'] > len(stats['errors']):
+        click.echo(f"... и еще {stats['failed'] - len(stats['errors'])} ошибок", err=True)
+
+    click.echo(
+        f"Строк: {stats['rows']}, импортировано: {stats['imported']}, ошибок: {stats['failed']}, "
+        f"создано авторов: {stats['authors_created']}, жанров: {stats['genres_created']}, "
+        f"{stats['seconds']:.1f} с ({stats['rows_per_second']:.0f} строк/с)"
+    )
+    if stats['failed']:
+        sys.exit(1)
@@ -0,0 +1,41 @@
+import sys
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from services.bootstrap import bootstrap_app
+from services.query_plans import check_query_plans
+
+
+@click.command('bootstrap')
+@click.option('--seed/--no-seed', default=None, help='Создавать ли тестовые данные (по умолчанию SEED_TEST_DATA)')
+@with_appcontext
+def bootstrap_command(seed):
+    """Однократная подготовка базы: миграции, поисковый индекс, администратор и тестовые данные"""
+    timings = bootstrap_app(current_app._get_current_object(), seed=seed)
+    for name, duration in timings['phases'].items():
+        click.echo(f"{name}: {duration} ms")
+    click.echo(f"Всего: {timings['total_ms']} ms")
+
+
+@click.command('check-query-plans')
+@with_appcontext
+def check_query_plans_command():
+    """Проверка, что горячие запросы не выполняются полным сканированием таблиц"""
+    try:
+        results = check_query_plans()
+    except RuntimeError as e:
+        click.echo(str(e))
+        sys.exit(2)
+
+    failed = 0
+    for name, plan, full_scans in results:
+        status = 'FAIL' if full_scans else 'OK'
+        click.echo(f"[{status}] {name}")
+        for step in plan:
+            click.echo(f"       {step}")
+        if full_scans:
+            failed += 1
+
+    if failed:
+        click.echo(f"Запросов с полным сканированием: {failed}")
+        sys.exit(1)
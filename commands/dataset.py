@@ -0,0 +1,25 @@
+import click
+from flask.cli import AppGroup
+from services.dataset import DatasetGenerator
+
+dataset_cli = AppGroup('dataset', help='Синтетические данные для нагрузочного тестирования')
+
+
+@dataset_cli.command('generate')
+@click.option('--seed', type=int, default=42, help='Начальное значение генератора случайных чисел')
+@click.option('--books', type=int, default=10000)
+@click.option('--authors', type=int, default=2000)
+@click.option('--genres', type=int, default=30)
+@click.option('--users', type=int, default=5000)
+@click.option('--reservations', type=int, default=50000)
+@click.option('--zipf', 'zipf_exponent', type=float, default=1.1, help='Показатель распределения популярности')
+@click.option('--chunk-size', type=int, default=5000, help='Строк в одном executemany')
+def generate_command(seed, books, authors, genres, users, reservations, zipf_exponent, chunk_size):
+    """Генерация каталога, пользователей и истории бронирований (в дополнение к существующим данным)"""
+    generator = DatasetGenerator(
+        seed=seed, books=books, authors=authors, genres=genres, users=users,
+        reservations=reservations, zipf_exponent=zipf_exponent, chunk_size=chunk_size
+    )
+    stats = generator.generate(progress=lambda name, inserted: click.echo(f"{name}: {inserted}"))
+    click.echo(', '.join(f"{name}: {value}" for name, value in stats.items() if name not in ('seconds', 'rows_per_second')))
+    click.echo(f"{stats['seconds']:.1f} с ({stats['rows_per_second']:.0f} строк/с)")
@@ -0,0 +1,24 @@
+import click
+from flask import current_app
+from services.export import CONTENT_TYPES, EXPORTS, InvalidSinceError, export_lines, parse_since
+
+
+@click.command('export')
+@click.argument('name', type=click.Choice(sorted(EXPORTS)))
+@click.option('--format', 'export_format', type=click.Choice(sorted(CONTENT_TYPES)), default='ndjson',
+              help='Формат вывода')
+@click.option('--since', default=None, help='Только строки, измененные начиная с момента (ISO 8601, UTC)')
+@click.option('--output', type=click.File('w', encoding='utf-8'), default='-', help='Файл, по умолчанию stdout')
+@click.option('--chunk-size', type=int, default=None, help='Строк в одной порции запроса')
+def export_command(name, export_format, since, output, chunk_size):
+    """Потоковая выгрузка книг, пользователей или бронирований"""
+    try:
+        since = parse_since(since)
+    except InvalidSinceError as e:
+        raise click.BadParameter(str(e), param_hint='--since')
+
+    for line in export_lines(
+        name, export_format, since=since,
+        chunk_size=chunk_size or current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+    ):
+        output.write(line)
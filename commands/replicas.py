@@ -0,0 +1,23 @@
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from services.read_replicas import ReplicaSyncError, sync_sqlite_replicas
+
+replicas_cli = AppGroup('replicas', help='Реплики только для чтения')
+
+
+@replicas_cli.command('sync')
+@click.option('--interval', type=float, default=0, help='Повторять каждые N секунд (0 - один раз)')
+def sync_command(interval):
+    """Копирование основной SQLite базы в файлы реплик (локальная проверка маршрутизации)"""
+    while True:
+        start = time.perf_counter()
+        try:
+            paths = sync_sqlite_replicas(current_app)
+        except ReplicaSyncError as e:
+            raise click.ClickException(str(e))
+        click.echo(f"Реплики обновлены за {time.perf_counter() - start:.2f} с: {', '.join(paths)}")
+        if not interval:
+            return
+        time.sleep(interval)
@@ -0,0 +1,42 @@
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from services.reservation_sweeper import get_reservation_sweeper
+
+reservations_cli = AppGroup('reservations', help='Обслуживание бронирований')
+
+
+@reservations_cli.command('expire')
+@click.option('--batch-size', type=int, default=None, help='Размер пакета')
+@click.option('--max-batches', type=int, default=None, help='Максимум пакетов за запуск')
+@click.option('--loop', 'interval', type=int, default=None,
+              help='Повторять каждые N секунд вместо однократного запуска')
+@click.option('--loop-from-config', is_flag=True,
+              help='Повторять с интервалом RESERVATION_SWEEP_INTERVAL')
+def expire_command(batch_size, max_batches, interval, loop_from_config):
+    """Перевод просроченных бронирований в статус 'expired'"""
+    sweeper = get_reservation_sweeper()
+    if batch_size:
+        sweeper.batch_size = batch_size
+    if interval is None and loop_from_config:
+        interval = current_app.config.get('RESERVATION_SWEEP_INTERVAL', 0)
+
+    while True:
+        try:
+            expired = sweeper.sweep(max_batches=max_batches)
+        except Exception as e:
+            # В режиме цикла ошибка одного запуска не останавливает обработку
+            if not interval:
+                raise
+            current_app.logger.error(f"Ошибка обработки истекших бронирований: {str(e)}")
+            time.sleep(interval)
+            continue
+        metrics = sweeper.get_metrics()
+        click.echo(
+            f"Истекло бронирований: {expired}, пакетов всего: {metrics['batches']}, "
+            f"среднее время пакета: {(metrics['batch_seconds_avg'] or 0) * 1000:.1f} мс"
+        )
+        if not interval:
+            break
+        time.sleep(interval)
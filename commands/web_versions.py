@@ -0,0 +1,43 @@
+import sys
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from services.open_library import get_open_library_service
+from services.web_versions import SORT_VALUES, create_prefetcher
+
+web_versions_cli = AppGroup('web-versions', help='Сохраненные веб-версии книг из Open Library')
+
+
+@web_versions_cli.command('prefetch')
+@click.option('--sort', type=click.Choice(SORT_VALUES), default='new', help='Способ сортировки результатов')
+@click.option('--all', 'refresh_all', is_flag=True, help='Обновить и свежие записи')
+@click.option('--book-id', 'book_ids', type=int, multiple=True, help='Только указанные книги')
+@click.option('--limit', type=int, default=None, help='Максимум книг за запуск')
+@click.option('--workers', type=int, default=None, help='Размер пула потоков')
+def prefetch_command(sort, refresh_all, book_ids, limit, workers):
+    """Загрузка веб-версий для книг без записи или с устаревшей записью"""
+    service = get_open_library_service()
+    if service is None or not service.is_available():
+        click.echo('Сервис Open Library не настроен')
+        sys.exit(2)
+
+    prefetcher = create_prefetcher(current_app, service)
+    if workers:
+        prefetcher.max_workers = workers
+
+    stats = prefetcher.prefetch(
+        sort=sort,
+        book_ids=list(book_ids),
+        refresh_all=refresh_all,
+        limit=limit,
+        progress=lambda current: click.echo(
+            f"Обработано {current['stored'] + current['failed']} из {current['books']}"
+        )
+    )
+    rate = stats['books'] / stats['seconds'] if stats['seconds'] else 0
+    click.echo(
+        f"Книг: {stats['books']}, сохранено: {stats['stored']}, ошибок: {stats['failed']}, "
+        f"{stats['seconds']:.1f} с ({rate:.1f} книг/с)"
+    )
+    if stats['failed']:
+        sys.exit(1)
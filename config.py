@@ -6,17 +6,148 @@ load_dotenv()
 class Config:
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///library.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    
+    # Реплики только для чтения: адреса через запятую становятся привязками replica_0, replica_1, ...
+    # GET/HEAD запросы к путям READ_REPLICA_PATHS читают с реплики; после записи сессия браузера
+    # читает с основной базы READ_REPLICA_PIN_SECONDS секунд (0 - не закреплять)
+    READ_REPLICA_URLS = [url.strip() for url in os.getenv('READ_REPLICA_URLS', '').split(',') if url.strip()]
+    SQLALCHEMY_BINDS = {f'replica_{index}': url for index, url in enumerate(READ_REPLICA_URLS)}
+    READ_REPLICA_PATHS = tuple(
+        path.strip() for path in os.getenv(
+            'READ_REPLICA_PATHS', '/api/books,/books,/api/authors,/api/genres,/api/web-versions'
+        ).split(',') if path.strip()
+    )
+    READ_REPLICA_PIN_SECONDS = float(os.getenv('READ_REPLICA_PIN_SECONDS', '5'))
+    
+    # Профиль SQLite: прагмы каждого соединения. WAL позволяет читать во время записи,
+    # busy_timeout - ждать блокировку (мс), cache_size < 0 - размер кэша страниц в KiB
+    SQLITE_JOURNAL_MODE = os.getenv('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+    SQLITE_MMAP_SIZE = int(os.getenv('SQLITE_MMAP_SIZE', '268435456'))
+    SQLITE_CACHE_SIZE = int(os.getenv('SQLITE_CACHE_SIZE', '-65536'))
+    
+    # Профиль серверных СУБД (PostgreSQL, MySQL): пул соединений на процесс, ожидание свободного
+    # соединения и пересоздание соединений, секунды; проверка соединения перед выдачей
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '10'))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '20'))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() == 'true'
+    
+    # Повторы бронирования и его закрытия при блокировке базы: число повторов и начальная пауза, секунды
+    DB_LOCK_RETRIES = int(os.getenv('DB_LOCK_RETRIES', '3'))
+    DB_LOCK_RETRY_BACKOFF = float(os.getenv('DB_LOCK_RETRY_BACKOFF', '0.05'))
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
     
+    # Запуск: выполнять bootstrap (миграции, администратор, тестовые данные) в create_app
+    # и создавать ли тестовые данные при bootstrap
+    AUTO_BOOTSTRAP = os.getenv('AUTO_BOOTSTRAP', 'false').lower() == 'true'
+    SEED_TEST_DATA = os.getenv('SEED_TEST_DATA', 'true').lower() == 'true'
+    
+    # Хэширование паролей: метод werkzeug с параметрами, длина соли и число процессов пула (0 - без пула).
+    # Хэши с другими параметрами пересчитываются при входе пользователя
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+    PASSWORD_HASH_SALT_LENGTH = int(os.getenv('PASSWORD_HASH_SALT_LENGTH', '16'))
+    PASSWORD_HASH_POOL_SIZE = int(os.getenv('PASSWORD_HASH_POOL_SIZE', '0'))
+    
+    # Заголовок Cache-Control для GET ответов по блюпринтам; ETag и Last-Modified позволяют
+    # клиентам перепроверять данные условным запросом и получать 304
+    CACHE_CONTROL = {
+        'books': os.getenv('CACHE_CONTROL_BOOKS', 'public, max-age=0, must-revalidate'),
+        'authors': os.getenv('CACHE_CONTROL_AUTHORS', 'public, max-age=60, must-revalidate'),
+        'genres': os.getenv('CACHE_CONTROL_GENRES', 'public, max-age=60, must-revalidate'),
+        'users': os.getenv('CACHE_CONTROL_USERS', 'private, no-cache'),
+    }
+    
+    # Время жизни кэша общего числа книг, секунды
+    BOOKS_COUNT_CACHE_TTL = int(os.getenv('BOOKS_COUNT_CACHE_TTL', '60'))
+    
+    # Кэш фрагментов страниц каталога для анонимных посетителей: сбрасывается при изменении
+    # каталога в процессе, TTL ограничивает расхождение между воркерами, секунды
+    FRAGMENT_CACHE_ENABLED = os.getenv('FRAGMENT_CACHE_ENABLED', 'true').lower() == 'true'
+    FRAGMENT_CACHE_MAX_ENTRIES = int(os.getenv('FRAGMENT_CACHE_MAX_ENTRIES', '500'))
+    FRAGMENT_CACHE_TTL = int(os.getenv('FRAGMENT_CACHE_TTL', '60'))
+    
+    # Кэш счетчиков фасетов и числа отфильтрованных книг в /api/books, сбрасывается так же
+    FACET_CACHE_ENABLED = os.getenv('FACET_CACHE_ENABLED', 'true').lower() == 'true'
+    FACET_CACHE_MAX_ENTRIES = int(os.getenv('FACET_CACHE_MAX_ENTRIES', '1000'))
+    FACET_CACHE_TTL = int(os.getenv('FACET_CACHE_TTL', '60'))
+    
+    # Массовый импорт книг: строк в одном пакете (транзакции) и сколько ошибок строк возвращать
+    BOOK_IMPORT_CHUNK_SIZE = int(os.getenv('BOOK_IMPORT_CHUNK_SIZE', '1000'))
+    BOOK_IMPORT_MAX_ERRORS = int(os.getenv('BOOK_IMPORT_MAX_ERRORS', '1000'))
+    
+    # Потоковая выгрузка: строк в одной порции запроса
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))
+    
+    # Обработка просроченных бронирований: интервал для flask reservations expire --loop-from-config
+    # (0 - однократный запуск; в воркерах приложения фоновый поток не запускается) и размер пакета
+    RESERVATION_SWEEP_INTERVAL = int(os.getenv('RESERVATION_SWEEP_INTERVAL', '0'))
+    RESERVATION_SWEEP_BATCH_SIZE = int(os.getenv('RESERVATION_SWEEP_BATCH_SIZE', '500'))
+    
+    # Исходящие HTTP запросы: пул keep-alive соединений, таймауты и повторы
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '10'))
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '20'))
+    HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '3.05'))
+    HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '15'))
+    HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '2'))
+    HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', '0.2'))
+    HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', '2.0'))
+    
+    # Асинхронные исходящие запросы (async представления): лимиты соединений и одновременных запросов,
+    # таймауты и повторы общие с синхронным клиентом
+    ASYNC_HTTP_MAX_CONNECTIONS = int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS', '100'))
+    ASYNC_HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv('ASYNC_HTTP_MAX_CONNECTIONS_PER_HOST', '50'))
+    ASYNC_HTTP_MAX_IN_FLIGHT = int(os.getenv('ASYNC_HTTP_MAX_IN_FLIGHT', '200'))
+    
     # Yandex API Gateway URL
     OPEN_LIBRARY_API_GATEWAY_URL = os.getenv(
         'OPEN_LIBRARY_API_GATEWAY_URL', 
         'https://<api-gateway-id>.apigw.yandexcloud.net/open-library/search'
     )
     
+    # Кэш результатов поиска Open Library
+    # Хранилище: 'memory' (в процессе) или 'sqlite' (общий файл для всех воркеров узла)
+    OPEN_LIBRARY_CACHE_ENABLED = os.getenv('OPEN_LIBRARY_CACHE_ENABLED', 'true').lower() == 'true'
+    OPEN_LIBRARY_CACHE_BACKEND = os.getenv('OPEN_LIBRARY_CACHE_BACKEND', 'memory')
+    OPEN_LIBRARY_CACHE_PATH = os.getenv('OPEN_LIBRARY_CACHE_PATH')  # По умолчанию в instance/
+    OPEN_LIBRARY_CACHE_MAX_ENTRIES = int(os.getenv('OPEN_LIBRARY_CACHE_MAX_ENTRIES', '5000'))
+    OPEN_LIBRARY_CACHE_TTL = int(os.getenv('OPEN_LIBRARY_CACHE_TTL', '86400'))
+    OPEN_LIBRARY_CACHE_NEGATIVE_TTL = int(os.getenv('OPEN_LIBRARY_CACHE_NEGATIVE_TTL', '300'))
+    OPEN_LIBRARY_CACHE_STALE_TTL = int(os.getenv('OPEN_LIBRARY_CACHE_STALE_TTL', '604800'))
+    # Сколько секунд воркеры ждут загрузку того же запроса другим воркером (только 'sqlite', 0 - не ждать)
+    OPEN_LIBRARY_CACHE_LOCK_TIMEOUT = float(os.getenv('OPEN_LIBRARY_CACHE_LOCK_TIMEOUT', '20'))
+    
+    # Проверка здоровья API Gateway в фоне при запуске
+    OPEN_LIBRARY_STARTUP_HEALTH_CHECK = os.getenv('OPEN_LIBRARY_STARTUP_HEALTH_CHECK', 'true').lower() == 'true'
+    
+    # Сохраненные веб-версии книг: срок актуальности записи, секунды, и параметры пакетного обновления
+    WEB_VERSIONS_MAX_AGE = int(os.getenv('WEB_VERSIONS_MAX_AGE', '604800'))
+    WEB_VERSIONS_PREFETCH_WORKERS = int(os.getenv('WEB_VERSIONS_PREFETCH_WORKERS', '8'))
+    WEB_VERSIONS_PREFETCH_BATCH_SIZE = int(os.getenv('WEB_VERSIONS_PREFETCH_BATCH_SIZE', '200'))
+    
+    # Автоматический выключатель Open Library API Gateway
+    OPEN_LIBRARY_BREAKER_FAILURE_RATE = float(os.getenv('OPEN_LIBRARY_BREAKER_FAILURE_RATE', '0.5'))
+    OPEN_LIBRARY_BREAKER_SLOW_CALL_SECONDS = float(os.getenv('OPEN_LIBRARY_BREAKER_SLOW_CALL_SECONDS', '5'))
+    OPEN_LIBRARY_BREAKER_SLOW_CALL_RATE = float(os.getenv('OPEN_LIBRARY_BREAKER_SLOW_CALL_RATE', '0.5'))
+    OPEN_LIBRARY_BREAKER_WINDOW_SIZE = int(os.getenv('OPEN_LIBRARY_BREAKER_WINDOW_SIZE', '20'))
+    OPEN_LIBRARY_BREAKER_MINIMUM_CALLS = int(os.getenv('OPEN_LIBRARY_BREAKER_MINIMUM_CALLS', '5'))
+    OPEN_LIBRARY_BREAKER_OPEN_SECONDS = float(os.getenv('OPEN_LIBRARY_BREAKER_OPEN_SECONDS', '30'))
+    OPEN_LIBRARY_BREAKER_HALF_OPEN_CALLS = int(os.getenv('OPEN_LIBRARY_BREAKER_HALF_OPEN_CALLS', '2'))
+    
     # Yandex SmartCaptcha
     SMARTCAPTCHA_SERVER_KEY = os.getenv('SMARTCAPTCHA_SERVER_KEY', '')
     SMARTCAPTCHA_CLIENT_KEY = os.getenv('SMARTCAPTCHA_CLIENT_KEY', '')
     
     # Настройки логирования
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    
+    # Инструментирование запросов: заголовок Server-Timing, строка лога на запрос и /metrics;
+    # SQL запросы дольше SLOW_QUERY_SECONDS логируются (0 - отключено), значения параметров
+    # попадают в лог только при SLOW_QUERY_LOG_PARAMETERS=true, иначе только их типы
+    INSTRUMENTATION_ENABLED = os.getenv('INSTRUMENTATION_ENABLED', 'true').lower() == 'true'
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+    REQUEST_LOG_ENABLED = os.getenv('REQUEST_LOG_ENABLED', 'true').lower() == 'true'
+    SLOW_QUERY_SECONDS = float(os.getenv('SLOW_QUERY_SECONDS', '0.25'))
+    SLOW_QUERY_LOG_PARAMETERS = os.getenv('SLOW_QUERY_LOG_PARAMETERS', 'false').lower() == 'true'
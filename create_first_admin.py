@@ -1,28 +1,18 @@
 from app import create_app
-from models import db, User
+from services.bootstrap import ensure_first_admin, FIRST_ADMIN_EMAIL, FIRST_ADMIN_PASSWORD
+from services.database import upgrade_db
 
 def create_first_admin():
     app = create_app()
     
     with app.app_context():
-        # Проверяем, есть ли уже администраторы
-        admin_exists = User.query.filter_by(role='admin').first()
+        upgrade_db()
+        admin, created = ensure_first_admin()
         
-        if not admin_exists:
-            # Создаем первого администратора
-            admin = User(
-                email='admin@library.com',
-                first_name='Администратор',
-                last_name='Системы',
-                role='admin'
-            )
-            admin.set_password('admin123')  # Смените пароль после первого входа!
-            
-            db.session.add(admin)
-            db.session.commit()
+        if created:
             print('Первый администратор создан!')
-            print('Email: admin@library.com')
-            print('Пароль: admin123')
+            print(f'Email: {FIRST_ADMIN_EMAIL}')
+            print(f'Пароль: {FIRST_ADMIN_PASSWORD}')
             print('Обязательно смените пароль после первого входа!')
         else:
             print('Администратор уже существует в системе.')
@@ -0,0 +1,82 @@
+"""reservation uniqueness and expiry indexes
+
+Revision ID: 0002_reservation_indexes
+Revises: 0001_initial_schema
+Create Date: 2026-10-18 12:10:00.000000
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0002_reservation_indexes'
+down_revision = '0001_initial_schema'
+branch_labels = None
+depends_on = None
+
+
+reservations = sa.table(
+    'book_reservations',
+    sa.column('id', sa.Integer), sa.column('book_id', sa.Integer), sa.column('user_id', sa.Integer),
+    sa.column('status', sa.String), sa.column('updated_at', sa.DateTime),
+)
+books = sa.table('books', sa.column('id', sa.Integer), sa.column('available_copies', sa.Integer))
+
+
+def cancel_duplicate_active_reservations():
+    """
+    Отмена повторных активных бронирований одной книги одним пользователем
+
+    Прежняя проверка перед вставкой допускала гонку, и в базе могут быть
+    дубликаты, на которых уникальный индекс не создастся. Остается самое
+    новое бронирование пары, остальные отменяются, их копии возвращаются.
+    """
+    connection = op.get_bind()
+    newer = reservations.alias('newer')
+    duplicates = connection.execute(
+        sa.select(reservations.c.id, reservations.c.book_id)
+        .where(
+            reservations.c.status == 'active',
+            sa.exists().where(
+                newer.c.book_id == reservations.c.book_id,
+                newer.c.user_id == reservations.c.user_id,
+                newer.c.status == 'active',
+                newer.c.id > reservations.c.id,
+            )
+        )
+    ).all()
+    if not duplicates:
+        return
+
+    released = {}
+    for _, book_id in duplicates:
+        released[book_id] = released.get(book_id, 0) + 1
+    connection.execute(
+        reservations.update()
+        .where(reservations.c.id.in_([reservation_id for reservation_id, _ in duplicates]))
+        .values(status='cancelled', updated_at=datetime.utcnow())
+    )
+    for book_id, count in released.items():
+        connection.execute(
+            books.update()
+            .where(books.c.id == book_id)
+            .values(available_copies=books.c.available_copies + count)
+        )
+
+
+def upgrade():
+    cancel_duplicate_active_reservations()
+
+    with op.batch_alter_table('book_reservations', schema=None) as batch_op:
+        batch_op.create_index('uq_book_reservations_active_book_user', ['book_id', 'user_id'], unique=True,
+                              sqlite_where=sa.text("status = 'active'"),
+                              postgresql_where=sa.text("status = 'active'"))
+        batch_op.create_index('ix_book_reservations_status_expiry', ['status', 'expiry_date'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('book_reservations', schema=None) as batch_op:
+        batch_op.drop_index('ix_book_reservations_status_expiry')
+        batch_op.drop_index('uq_book_reservations_active_book_user')
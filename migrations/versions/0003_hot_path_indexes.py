@@ -0,0 +1,58 @@
+"""hot path indexes
+
+Revision ID: 0003_hot_path_indexes
+Revises: 0002_reservation_indexes
+Create Date: 2026-10-18 12:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0003_hot_path_indexes'
+down_revision = '0002_reservation_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('book_reservations', schema=None) as batch_op:
+        batch_op.create_index('ix_book_reservations_user_status', ['user_id', 'status'], unique=False)
+        batch_op.create_index('ix_book_reservations_book_user_status', ['book_id', 'user_id', 'status'], unique=False)
+
+    with op.batch_alter_table('book_authors', schema=None) as batch_op:
+        batch_op.create_index('ix_book_authors_book_author', ['book_id', 'author_id'], unique=False)
+        batch_op.create_index('ix_book_authors_author_book', ['author_id', 'book_id'], unique=False)
+
+    with op.batch_alter_table('book_genres', schema=None) as batch_op:
+        batch_op.create_index('ix_book_genres_book_genre', ['book_id', 'genre_id'], unique=False)
+        batch_op.create_index('ix_book_genres_genre_book', ['genre_id', 'book_id'], unique=False)
+
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_books_isbn'), ['isbn'], unique=False)
+        batch_op.create_index(batch_op.f('ix_books_updated_at'), ['updated_at'], unique=False)
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_role'), ['role'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_role'))
+
+    with op.batch_alter_table('books', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_books_updated_at'))
+        batch_op.drop_index(batch_op.f('ix_books_isbn'))
+
+    with op.batch_alter_table('book_genres', schema=None) as batch_op:
+        batch_op.drop_index('ix_book_genres_genre_book')
+        batch_op.drop_index('ix_book_genres_book_genre')
+
+    with op.batch_alter_table('book_authors', schema=None) as batch_op:
+        batch_op.drop_index('ix_book_authors_author_book')
+        batch_op.drop_index('ix_book_authors_book_author')
+
+    with op.batch_alter_table('book_reservations', schema=None) as batch_op:
+        batch_op.drop_index('ix_book_reservations_book_user_status')
+        batch_op.drop_index('ix_book_reservations_user_status')
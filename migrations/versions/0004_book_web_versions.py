@@ -0,0 +1,43 @@
+"""book web versions mirror
+
+Revision ID: 0004_book_web_versions
+Revises: 0003_hot_path_indexes
+Create Date: 2026-10-18 17:25:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0004_book_web_versions'
+down_revision = '0003_hot_path_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('book_web_versions',
+    sa.Column('book_id', sa.Integer(), nullable=False),
+    sa.Column('sort', sa.String(length=20), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('editions', sa.JSON(), nullable=False),
+    sa.Column('total_results', sa.Integer(), nullable=True),
+    sa.Column('results_with_ia', sa.Integer(), nullable=True),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['book_id'], ['books.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('book_id', 'sort', name='uq_book_web_versions_book_sort')
+    )
+    with op.batch_alter_table('book_web_versions', schema=None) as batch_op:
+        batch_op.create_index('ix_book_web_versions_refreshed_at', ['refreshed_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('book_web_versions', schema=None) as batch_op:
+        batch_op.drop_index('ix_book_web_versions_refreshed_at')
+
+    op.drop_table('book_web_versions')
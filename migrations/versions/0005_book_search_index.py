@@ -0,0 +1,34 @@
+"""book full-text search index
+
+Revision ID: 0005_book_search_index
+Revises: 0004_book_web_versions
+Create Date: 2026-10-18 19:40:00.000000
+
+"""
+from alembic import op
+from services.search import BACKENDS
+
+
+# revision identifiers, used by Alembic.
+revision = '0005_book_search_index'
+down_revision = '0004_book_web_versions'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Индекс для текущей СУБД: FTS5 на SQLite, tsvector на PostgreSQL; для остальных поиск идет через ILIKE
+    connection = op.get_bind()
+    backend_class = BACKENDS.get(connection.dialect.name)
+    if backend_class is None:
+        return
+    backend = backend_class()
+    backend.create_schema(connection)
+    backend.rebuild(connection)
+
+
+def downgrade():
+    backend_class = BACKENDS.get(op.get_bind().dialect.name)
+    if backend_class is None:
+        return
+    op.execute(f'DROP TABLE IF EXISTS {backend_class.table_name}')
@@ -4,5 +4,6 @@ from .author import Author
 from .genre import Genre
 from .user import User
 from .reservation import BookReservation
+from .web_version import BookWebVersion
 
-__all__ = ['db', 'Book', 'Author', 'Genre', 'User', 'BookReservation', 'book_authors', 'book_genres']
+__all__ = ['db', 'Book', 'Author', 'Genre', 'User', 'BookReservation', 'BookWebVersion', 'book_authors', 'book_genres']
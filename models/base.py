@@ -1,7 +1,9 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from .session import RoutingSession
 
-db = SQLAlchemy()
+# Сессия направляет чтения GET запросов на реплики, если они настроены (services/read_replicas.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class BaseModel(db.Model):
     __abstract__ = True
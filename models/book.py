@@ -1,15 +1,20 @@
 from .base import db, BaseModel
+from sqlalchemy import event, case
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 import json
 from datetime import datetime
 
 class Book(BaseModel):
     __tablename__ = 'books'
+    __table_args__ = (
+        db.Index('ix_books_updated_at', 'updated_at'),
+    )
     
     title = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
     publication_year = db.Column(db.Integer)
-    isbn = db.Column(db.String(20))
+    isbn = db.Column(db.String(20), index=True)
     file_stub_metadata = db.Column(db.Text)  # JSON stored as TEXT
     total_copies = db.Column(db.Integer, default=1)  # Общее количество копий
     available_copies = db.Column(db.Integer, default=1)  # Доступные копии
@@ -19,7 +24,7 @@ class Book(BaseModel):
     genres = relationship('Genre', secondary='book_genres', back_populates='books')
     reservations = relationship('BookReservation', back_populates='book')
     
-    @property
+    @hybrid_property
     def status(self):
         """Вычисляемый статус на основе доступных копий"""
         if self.available_copies > 0:
@@ -27,6 +32,12 @@ class Book(BaseModel):
         else:
             return 'reserved'
     
+    @status.inplace.expression
+    @classmethod
+    def _status_expression(cls):
+        # Тот же статус в SQL: по нему фильтруются и группируются книги
+        return case((cls.available_copies > 0, 'available'), else_='reserved')
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -47,12 +58,25 @@ book_authors = db.Table('book_authors',
     db.Column('id', db.Integer, primary_key=True),
     db.Column('book_id', db.Integer, db.ForeignKey('books.id', ondelete='CASCADE')),
     db.Column('author_id', db.Integer, db.ForeignKey('authors.id', ondelete='CASCADE')),
-    db.Column('created_at', db.DateTime, default=datetime.utcnow)
+    db.Column('created_at', db.DateTime, default=datetime.utcnow),
+    db.Index('ix_book_authors_book_author', 'book_id', 'author_id'),
+    db.Index('ix_book_authors_author_book', 'author_id', 'book_id')
 )
 
 book_genres = db.Table('book_genres',
     db.Column('id', db.Integer, primary_key=True),
     db.Column('book_id', db.Integer, db.ForeignKey('books.id', ondelete='CASCADE')),
     db.Column('genre_id', db.Integer, db.ForeignKey('genres.id', ondelete='CASCADE')),
-    db.Column('created_at', db.DateTime, default=datetime.utcnow)
+    db.Column('created_at', db.DateTime, default=datetime.utcnow),
+    db.Index('ix_book_genres_book_genre', 'book_id', 'genre_id'),
+    db.Index('ix_book_genres_genre_book', 'genre_id', 'book_id')
 )
+
+# Авторы и жанры входят в представление книги, но хранятся в связующих таблицах:
+# при их изменении обновляем updated_at книги, чтобы сменился ее ETag
+@event.listens_for(Book.authors, 'append')
+@event.listens_for(Book.authors, 'remove')
+@event.listens_for(Book.genres, 'append')
+@event.listens_for(Book.genres, 'remove')
+def touch_book(book, value, initiator):
+    book.updated_at = datetime.utcnow()
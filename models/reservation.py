@@ -4,6 +4,20 @@ from datetime import datetime, timedelta
 
 class BookReservation(BaseModel):
     __tablename__ = 'book_reservations'
+    __table_args__ = (
+        # Не больше одного активного бронирования книги на пользователя
+        db.Index(
+            'uq_book_reservations_active_book_user', 'book_id', 'user_id',
+            unique=True,
+            sqlite_where=db.text("status = 'active'"),
+            postgresql_where=db.text("status = 'active'")
+        ),
+        # Поиск просроченных активных бронирований
+        db.Index('ix_book_reservations_status_expiry', 'status', 'expiry_date'),
+        # Бронирования пользователя в профиле и проверка активного бронирования книги
+        db.Index('ix_book_reservations_user_status', 'user_id', 'status'),
+        db.Index('ix_book_reservations_book_user_status', 'book_id', 'user_id', 'status'),
+    )
     
     book_id = db.Column(db.Integer, db.ForeignKey('books.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
@@ -0,0 +1,66 @@
+from contextlib import contextmanager
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select, event
+from sqlalchemy.sql.dml import UpdateBase
+
+
+class RoutingSession(Session):
+    """
+    Сессия, читающая с реплики, пока в ней не было записи
+
+    Реплика используется, только если она назначена сессии на время запроса:
+    info['read_replica'] - ключ привязки реплики в SQLALCHEMY_BINDS. На основную
+    базу всегда идут flush, DML, SELECT ... FOR UPDATE, текстовые запросы,
+    session.connection() и все чтения после первой записи в сессии, поэтому
+    запрос видит собственные изменения.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if isinstance(clause, UpdateBase):
+                self.info['wrote'] = True
+            elif (
+                isinstance(clause, Select)
+                and clause._for_update_arg is None
+                and not self._flushing
+                and not self.info.get('wrote')
+                and self.info.get('read_replica') is not None
+            ):
+                return self._db.engines[self.info['read_replica']]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@contextmanager
+def primary_reads(session):
+    """
+    Чтения внутри блока идут с основной базы
+
+    Для значений, которые сохраняются в общих кэшах: сразу после сброса
+    кэша реплика может еще не получить запись, и устаревшее значение
+    вернулось бы в кэш на весь TTL, в том числе для сессий, закрепленных
+    за основной базой.
+    """
+    replica = session.info.get('read_replica')
+    session.info['read_replica'] = None
+    try:
+        yield
+    finally:
+        session.info['read_replica'] = replica
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'before_commit')
+def _before_commit(session):
+    # Запись через Core с пометкой для инвалидации (mark_tables_changed) тоже считается записью
+    if session.info.get('changed_tables'):
+        session.info['wrote'] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _after_commit(session):
+    if session.info.get('wrote'):
+        session.info['committed_write'] = True
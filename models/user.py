@@ -1,7 +1,7 @@
 from .base import db, BaseModel
 from sqlalchemy.orm import relationship
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from services.passwords import get_password_hasher
 
 class User(BaseModel):
     __tablename__ = 'users'
@@ -10,17 +10,29 @@ class User(BaseModel):
     password_hash = db.Column(db.String(255), nullable=False)
     first_name = db.Column(db.String(100), nullable=False)
     last_name = db.Column(db.String(100), nullable=False)
-    role = db.Column(db.String(50), default='reader')
+    role = db.Column(db.String(50), default='reader', index=True)
     membership_status = db.Column(db.String(50), default='active')
     join_date = db.Column(db.Date, default=datetime.utcnow)
     
     reservations = relationship('BookReservation', back_populates='user')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = get_password_hasher().hash(password)
     
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        return get_password_hasher().verify(self.password_hash, password)
+    
+    async def set_password_async(self, password):
+        self.password_hash = await get_password_hasher().hash_async(password)
+    
+    async def check_password_async(self, password):
+        """Проверка пароля; хэш с устаревшими параметрами пересчитывается (сохранение - за вызывающим)"""
+        hasher = get_password_hasher()
+        if not await hasher.verify_async(self.password_hash, password):
+            return False
+        if hasher.needs_rehash(self.password_hash):
+            self.password_hash = await hasher.hash_async(password)
+        return True
     
     def is_admin(self):
         return self.role == 'admin'
@@ -0,0 +1,33 @@
+from .base import db, BaseModel
+from sqlalchemy.orm import relationship
+from datetime import datetime
+
+class BookWebVersion(BaseModel):
+    """Сохраненные результаты поиска электронных версий книги в Open Library"""
+    __tablename__ = 'book_web_versions'
+    __table_args__ = (
+        db.UniqueConstraint('book_id', 'sort', name='uq_book_web_versions_book_sort'),
+        # Выбор устаревших записей для обновления
+        db.Index('ix_book_web_versions_refreshed_at', 'refreshed_at'),
+    )
+    
+    book_id = db.Column(db.Integer, db.ForeignKey('books.id', ondelete='CASCADE'), nullable=False)
+    sort = db.Column(db.String(20), nullable=False, default='new')
+    title = db.Column(db.String(255), nullable=False)  # Название, по которому выполнялся поиск
+    editions = db.Column(db.JSON, nullable=False, default=list)
+    total_results = db.Column(db.Integer, default=0)
+    results_with_ia = db.Column(db.Integer, default=0)
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    book = relationship('Book')
+    
+    def to_dict(self):
+        """Ответ в формате API Gateway"""
+        return {
+            'success': True,
+            'results': self.editions,
+            'total_results': self.total_results,
+            'results_with_ia': self.results_with_ia,
+            'refreshed_at': self.refreshed_at.isoformat(),
+            'service_type': 'mirror'
+        }
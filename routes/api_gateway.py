@@ -1,5 +1,7 @@
 from flask import Blueprint, jsonify
 from services.open_library import get_open_library_service
+from services.http_client import get_http_client
+from services.async_http import get_async_http_client
 
 api_gateway_bp = Blueprint('api_gateway', __name__)
 
@@ -21,6 +23,12 @@ def get_gateway_status():
         status_info['gateway_url'] = open_library_service.api_gateway_url
         status_info['health_status'] = open_library_service.health_check()
         status_info['timestamp'] = '2024-01-01T00:00:00Z'  # Можно добавить реальное время
+        status_info['cache'] = open_library_service.cache.get_stats() if open_library_service.cache else None
+        status_info['circuit_breaker'] = open_library_service.breaker.get_state()
+        status_info['single_flight'] = open_library_service.single_flight.get_stats()
+    
+    status_info['http_client'] = get_http_client().get_stats()
+    status_info['async_http_client'] = get_async_http_client().get_stats()
     
     return jsonify(status_info)
 
@@ -1,19 +1,73 @@
 from flask import Blueprint, request, jsonify
 from models.base import db
 from models.author import Author
+from models.book import Book, book_authors
+from services.catalog import counted_page, linked_books_page, serialize_books
+from services.pagination import InvalidCursorError
+from services.http_cache import conditional, table_state
 
 authors_bp = Blueprint('authors', __name__)
 
+AUTHORS_ORDER = [Author.last_name, Author.first_name, Author.id]
+
+def author_books_states(author_id):
+    # Книги автора меняются вместе с updated_at книги (touch_book)
+    return table_state(Author, Author.id == author_id) + table_state(Book)
+
 @authors_bp.route('/api/authors', methods=['GET'])
+@conditional(lambda: table_state(Author) + table_state(Book))
 def get_authors():
-    authors = Author.query.all()
-    return jsonify([author.to_dict() for author in authors])
+    """
+    Авторы с числом книг у каждого
+
+    Без page и per_page - прежний ответ: список всех авторов по id.
+    С ними - страница авторов по фамилии и имени с общим числом.
+    """
+    if 'page' not in request.args and 'per_page' not in request.args:
+        rows = counted_page(Author, book_authors.c.author_id, [Author.id], per_page=None)
+        return jsonify([dict(author.to_dict(), book_count=book_count) for author, book_count in rows])
+    
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 20, type=int), 1), 100)
+    
+    rows = counted_page(Author, book_authors.c.author_id, AUTHORS_ORDER, page=page, per_page=per_page)
+    total = db.session.query(db.func.count(Author.id)).scalar()
+    
+    return jsonify({
+        'authors': [dict(author.to_dict(), book_count=book_count) for author, book_count in rows],
+        'total': total,
+        'pages': (total + per_page - 1) // per_page,
+        'current_page': page,
+        'per_page': per_page
+    })
 
 @authors_bp.route('/api/authors/<int:author_id>', methods=['GET'])
+@conditional(lambda author_id: table_state(Author, Author.id == author_id))
 def get_author(author_id):
     author = Author.query.get_or_404(author_id)
     return jsonify(author.to_dict())
 
+@authors_bp.route('/api/authors/<int:author_id>/books', methods=['GET'])
+@conditional(author_books_states)
+def get_author_books(author_id):
+    """Книги автора по возрастанию id с курсорной пагинацией (?cursor=...)"""
+    author = Author.query.get_or_404(author_id)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)
+    
+    try:
+        books, next_cursor = linked_books_page(
+            book_authors.c.author_id, author_id, cursor=request.args.get('cursor'), limit=per_page
+        )
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'author': author.to_dict(),
+        'books': serialize_books(books),
+        'next_cursor': next_cursor,
+        'per_page': per_page
+    })
+
 @authors_bp.route('/api/authors', methods=['POST'])
 def create_author():
     data = request.get_json()
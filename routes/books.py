@@ -1,31 +1,106 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
 from models.base import db
-from models.book import Book
+from models.book import Book, book_authors, book_genres
 from models.author import Author
 from models.genre import Genre
+from services.catalog import catalog_query, serialize_books, get_books_total
+from services.pagination import keyset_paginate, InvalidCursorError
+from services.search import get_search_service
+from services.http_cache import conditional, table_state
+from services.facets import InvalidFilterError, parse_book_filters, book_criteria, get_book_facets, get_filtered_total
+from services.book_import import CONTENT_TYPES, READERS, create_importer
+import io
 import json
+import time
 
 books_bp = Blueprint('books', __name__)
 
+# Допустимые порядки для курсорной пагинации: ключ всегда заканчивается на id
+KEYSET_ORDERS = {
+    'id': [Book.id],
+    'title': [Book.title, Book.id],
+}
+
+def books_states():
+    # Ответ содержит авторов и жанров книг, поэтому их изменения тоже учитываются
+    return table_state(Book) + table_state(Author) + table_state(Genre)
+
+def book_states(book_id):
+    return (
+        table_state(Book, Book.id == book_id)
+        + table_state(Author, Author.id.in_(
+            db.select(book_authors.c.author_id).where(book_authors.c.book_id == book_id)
+        ))
+        + table_state(Genre, Genre.id.in_(
+            db.select(book_genres.c.genre_id).where(book_genres.c.book_id == book_id)
+        ))
+    )
+
 @books_bp.route('/api/books', methods=['GET'])
+@conditional(books_states)
 def get_books():
+    """
+    Список книг с фильтрами и счетчиками фасетов
+
+    Фильтры: genre_id, genre, author_id, year_from, year_to, status, isbn.
+    Счетчики по жанрам, десятилетиям и доступности возвращаются в facets,
+    ?facets=false отключает их.
+    """
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)
+    cursor = request.args.get('cursor')
+    
+    try:
+        filters = parse_book_filters(request.args)
+    except InvalidFilterError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    query = catalog_query().filter(*book_criteria(filters))
+    total = get_filtered_total(filters) if filters else get_books_total()
+    facets = get_book_facets(filters) if request.args.get('facets', 'true').lower() != 'false' else None
+    
+    # Курсорная пагинация: ?cursor=... или ?pagination=cursor для первой страницы
+    if cursor is not None or request.args.get('pagination') == 'cursor':
+        order = request.args.get('order', 'id')
+        if order not in KEYSET_ORDERS:
+            return jsonify({'error': f'Неизвестный порядок сортировки: {order}'}), 400
+        
+        try:
+            books, next_cursor = keyset_paginate(
+                query, KEYSET_ORDERS[order], order,
+                cursor=cursor, limit=per_page
+            )
+        except InvalidCursorError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return jsonify({
+            'books': serialize_books(books),
+            'total': total,
+            'next_cursor': next_cursor,
+            'per_page': per_page,
+            'filters': filters,
+            'facets': facets
+        })
+    
     page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
     
-    books = Book.query.paginate(
-        page=page, per_page=per_page, error_out=False
+    books = query.paginate(
+        page=page, per_page=per_page, error_out=False, count=False
     )
+    books.total = total
     
     return jsonify({
-        'books': [book.to_dict() for book in books.items],
+        'books': serialize_books(books.items),
         'total': books.total,
         'pages': books.pages,
-        'current_page': page
+        'current_page': page,
+        'filters': filters,
+        'facets': facets
     })
 
 @books_bp.route('/api/books/<int:book_id>', methods=['GET'])
+@conditional(book_states)
 def get_book(book_id):
-    book = Book.query.get_or_404(book_id)
+    book = catalog_query().filter(Book.id == book_id).first_or_404()
     return jsonify(book.to_dict())
 
 @books_bp.route('/api/books', methods=['POST'])
@@ -57,6 +132,40 @@ def create_book():
     
     return jsonify(book.to_dict()), 201
 
+@books_bp.route('/api/books/import', methods=['POST'])
+def import_books():
+    """
+    Потоковый импорт книг из NDJSON или CSV
+
+    Тело читается по мере импорта, ответ - NDJSON: строка с результатом и
+    ошибками строк после каждого пакета и итоговая строка со статистикой.
+    """
+    import_format = request.args.get('format') or CONTENT_TYPES.get(request.mimetype)
+    if import_format not in READERS:
+        return jsonify({'error': 'Ожидается NDJSON (application/x-ndjson) или CSV (text/csv)'}), 415
+    
+    importer = create_importer(current_app)
+    chunk_size = request.args.get('chunk_size', type=int)
+    if chunk_size:
+        importer.chunk_size = min(max(chunk_size, 1), 10000)
+    
+    # Строки в байтах: читатели декодируют их по одной, ошибка кодировки относится к строке
+    lines = io.BufferedReader(request.stream)
+    
+    @stream_with_context
+    def generate():
+        stats = importer.empty_stats()
+        start = time.perf_counter()
+        for result in importer.run(READERS[import_format](lines)):
+            importer.accumulate(stats, result, time.perf_counter() - start)
+            yield json.dumps(dict(result, type='chunk'), ensure_ascii=False) + '\n'
+        
+        # Ошибки строк уже переданы в результатах пакетов
+        stats.pop('errors')
+        yield json.dumps(dict(stats, type='summary'), ensure_ascii=False) + '\n'
+    
+    return current_app.response_class(generate(), mimetype='application/x-ndjson')
+
 @books_bp.route('/api/books/<int:book_id>', methods=['PUT'])
 def update_book(book_id):
     book = Book.query.get_or_404(book_id)
@@ -95,15 +204,33 @@ def delete_book(book_id):
 @books_bp.route('/api/books/search', methods=['GET'])
 def search_books():
     query = request.args.get('q', '')
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)
+    
     if not query:
         return jsonify({'books': [], 'total': 0})
     
-    books = Book.query.filter(
-        Book.title.ilike(f'%{query}%') | 
-        Book.description.ilike(f'%{query}%')
-    ).all()
+    search_service = get_search_service()
+    
+    if search_service:
+        # Ранжированный поиск по полнотекстовому индексу
+        book_ids, total = search_service.search(query, page=page, per_page=per_page)
+        books_by_id = {
+            book.id: book
+            for book in catalog_query().filter(Book.id.in_(book_ids)).all()
+        } if book_ids else {}
+        books = [books_by_id[book_id] for book_id in book_ids if book_id in books_by_id]
+    else:
+        # Индекс недоступен для текущей СУБД или еще не создан миграцией - используем ILIKE
+        pagination = catalog_query().filter(
+            Book.title.ilike(f'%{query}%') | 
+            Book.description.ilike(f'%{query}%')
+        ).order_by(Book.id).paginate(page=page, per_page=per_page, error_out=False)
+        books, total = pagination.items, pagination.total
     
     return jsonify({
-        'books': [book.to_dict() for book in books],
-        'total': len(books)
+        'books': serialize_books(books),
+        'total': total,
+        'pages': (total + per_page - 1) // per_page,
+        'current_page': page
     })
@@ -0,0 +1,31 @@
+from flask import Blueprint, request, jsonify, current_app, stream_with_context
+from services.export import CONTENT_TYPES, EXPORTS, InvalidSinceError, export_lines, parse_since
+
+export_bp = Blueprint('export', __name__)
+
+@export_bp.route('/api/export/<name>', methods=['GET'])
+def export(name):
+    """
+    Потоковая выгрузка книг, пользователей или бронирований в NDJSON или CSV
+
+    ?since=<ISO 8601> - только строки, измененные начиная с этого момента.
+    """
+    if name not in EXPORTS:
+        return jsonify({'error': f'Неизвестный набор: {name}'}), 404
+    
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in CONTENT_TYPES:
+        return jsonify({'error': f'Неизвестный формат: {export_format}'}), 400
+    
+    try:
+        since = parse_since(request.args.get('since'))
+    except InvalidSinceError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    lines = export_lines(
+        name, export_format, since=since,
+        chunk_size=current_app.config.get('EXPORT_CHUNK_SIZE', 1000)
+    )
+    response = current_app.response_class(stream_with_context(lines), mimetype=CONTENT_TYPES[export_format])
+    response.headers['Content-Disposition'] = f'attachment; filename={name}.{export_format}'
+    return response
@@ -0,0 +1,60 @@
+from flask import Blueprint, request, jsonify
+from models.base import db
+from models.genre import Genre
+from models.book import Book, book_genres
+from services.catalog import counted_page, linked_books_page, serialize_books
+from services.pagination import InvalidCursorError
+from services.http_cache import conditional, table_state
+
+genres_bp = Blueprint('genres', __name__)
+
+GENRES_ORDER = [Genre.name, Genre.id]
+
+def genre_books_states(genre_id):
+    # Книги жанра меняются вместе с updated_at книги (touch_book)
+    return table_state(Genre, Genre.id == genre_id) + table_state(Book)
+
+@genres_bp.route('/api/genres', methods=['GET'])
+@conditional(lambda: table_state(Genre) + table_state(Book))
+def get_genres():
+    """Жанры по названию постранично, с числом книг у каждого"""
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = min(max(request.args.get('per_page', 50, type=int), 1), 100)
+    
+    rows = counted_page(Genre, book_genres.c.genre_id, GENRES_ORDER, page=page, per_page=per_page)
+    total = db.session.query(db.func.count(Genre.id)).scalar()
+    
+    return jsonify({
+        'genres': [dict(genre.to_dict(), book_count=book_count) for genre, book_count in rows],
+        'total': total,
+        'pages': (total + per_page - 1) // per_page,
+        'current_page': page,
+        'per_page': per_page
+    })
+
+@genres_bp.route('/api/genres/<int:genre_id>', methods=['GET'])
+@conditional(lambda genre_id: table_state(Genre, Genre.id == genre_id))
+def get_genre(genre_id):
+    genre = Genre.query.get_or_404(genre_id)
+    return jsonify(genre.to_dict())
+
+@genres_bp.route('/api/genres/<int:genre_id>/books', methods=['GET'])
+@conditional(genre_books_states)
+def get_genre_books(genre_id):
+    """Книги жанра по возрастанию id с курсорной пагинацией (?cursor=...)"""
+    genre = Genre.query.get_or_404(genre_id)
+    per_page = min(max(request.args.get('per_page', 10, type=int), 1), 100)
+    
+    try:
+        books, next_cursor = linked_books_page(
+            book_genres.c.genre_id, genre_id, cursor=request.args.get('cursor'), limit=per_page
+        )
+    except InvalidCursorError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({
+        'genre': genre.to_dict(),
+        'books': serialize_books(books),
+        'next_cursor': next_cursor,
+        'per_page': per_page
+    })
@@ -0,0 +1,15 @@
+from flask import Blueprint, current_app, jsonify
+from services.instrumentation import get_instrumentation
+from services.engine_profiles import render_engine_metrics
+
+metrics_bp = Blueprint('metrics', __name__)
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Метрики HTTP и SQL запросов и пулов соединений процесса в текстовом формате Prometheus"""
+    instrumentation = get_instrumentation()
+    if instrumentation is None:
+        return jsonify({'error': 'Инструментирование запросов отключено'}), 404
+    return current_app.response_class(
+        instrumentation.metrics.render() + render_engine_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
@@ -1,10 +1,12 @@
 from flask import Blueprint, request, jsonify
 from models.base import db
 from models.user import User
+from services.http_cache import conditional, table_state
 
 users_bp = Blueprint('users', __name__)
 
 @users_bp.route('/api/users', methods=['GET'])
+@conditional(lambda: table_state(User))
 def get_users():
     users = User.query.all()
     return jsonify([user.to_dict() for user in users])
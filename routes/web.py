@@ -1,11 +1,15 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app, jsonify
+from markupsafe import Markup
 from models.base import db
 from models.user import User
 from models.book import Book
 from models.author import Author
 from models.reservation import BookReservation
 from services.captcha import get_captcha_service
-from datetime import datetime
+from services.catalog import catalog_query, reservations_query, get_books_total
+from services import reservations as reservation_service
+from services.reservations import ReservationError
+from services.fragment_cache import get_fragment_cache
 
 web_bp = Blueprint('web', __name__)
 
@@ -17,15 +21,31 @@ def get_captcha_context():
         'captcha_client_key': current_app.config.get('SMARTCAPTCHA_CLIENT_KEY', '')
     }
 
+def render_fragment(key, render):
+    """
+    Фрагмент страницы, не зависящий от сессии
+
+    Для анонимных посетителей фрагмент берется из кэша, для вошедших
+    пользователей (кнопки бронирования) отрисовывается заново.
+    """
+    fragment_cache = get_fragment_cache()
+    if fragment_cache is None or session.get('user'):
+        return render()
+    return fragment_cache.get_or_render(key, render)
+
 # Главная страница
 @web_bp.route('/')
 def index():
-    books = Book.query.limit(10).all()
-    return render_template('index.html', books=books, user=session.get('user'))
+    def render():
+        books = catalog_query().limit(10).all()
+        return Markup(render_template('fragments/book_cards.html',
+                                      books=books, description_length=100, user=session.get('user')))
+    
+    return render_template('index.html', books_html=render_fragment(('index',), render), user=session.get('user'))
 
 # Страница регистрации
 @web_bp.route('/register', methods=['GET', 'POST'])
-def register():
+async def register():
     captcha_context = get_captcha_context()
     
     if request.method == 'POST':
@@ -39,7 +59,7 @@ def register():
                 return render_template('register.html', **captcha_context)
             
             # Проверяем токен капчи
-            captcha_result = captcha_service.verify_captcha(captcha_token)
+            captcha_result = await captcha_service.verify_captcha_async(captcha_token)
             if not captcha_result['success']:
                 flash('Не удалось подтвердить, что вы не робот. Пожалуйста, попробуйте еще раз.', 'error')
                 return render_template('register.html', **captcha_context)
@@ -63,7 +83,7 @@ def register():
             last_name=last_name,
             role=role
         )
-        user.set_password(password)
+        await user.set_password_async(password)
         
         db.session.add(user)
         db.session.commit()
@@ -75,7 +95,7 @@ def register():
 
 # Страница входа
 @web_bp.route('/login', methods=['GET', 'POST'])
-def login():
+async def login():
     captcha_context = get_captcha_context()
     
     if request.method == 'POST':
@@ -89,7 +109,7 @@ def login():
                 return render_template('login.html', **captcha_context)
             
             # Проверяем токен капчи
-            captcha_result = captcha_service.verify_captcha(captcha_token)
+            captcha_result = await captcha_service.verify_captcha_async(captcha_token)
             if not captcha_result['success']:
                 flash('Не удалось подтвердить, что вы не робот. Пожалуйста, попробуйте еще раз.', 'error')
                 return render_template('login.html', **captcha_context)
@@ -100,7 +120,11 @@ def login():
         
         user = User.query.filter_by(email=email).first()
         
-        if user and user.check_password(password):
+        if user and await user.check_password_async(password):
+            # Сохраняем хэш, пересчитанный с текущими параметрами
+            if db.session.is_modified(user):
+                db.session.commit()
+            
             session['user_id'] = user.id
             session['user'] = {
                 'id': user.id,
@@ -133,20 +157,36 @@ def books():
     page = request.args.get('page', 1, type=int)
     per_page = 12
     
-    books_pagination = Book.query.paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    def render():
+        books_pagination = catalog_query().paginate(
+            page=page, per_page=per_page, error_out=False, count=False
+        )
+        books_pagination.total = get_books_total()
+        return Markup(render_template('fragments/books_page.html',
+                                      books=books_pagination.items,
+                                      pagination=books_pagination,
+                                      user=session.get('user')))
     
     return render_template('books.html', 
-                         books=books_pagination.items,
-                         pagination=books_pagination,
+                         content=render_fragment(('books', page), render),
                          user=session.get('user'))
 
 # Детали книги
 @web_bp.route('/books/<int:book_id>')
 def book_detail(book_id):
-    book = Book.query.get_or_404(book_id)
-    return render_template('book_detail.html', book=book, user=session.get('user'))
+    def render():
+        book = catalog_query().filter(Book.id == book_id).first_or_404()
+        content = Markup(render_template('fragments/book_detail.html', book=book, user=session.get('user')))
+        return book.title, content
+    
+    title, content = render_fragment(('book_detail', book_id), render)
+    return render_template('book_detail.html', title=title, content=content, user=session.get('user'))
+
+# Метрики кэша фрагментов страниц
+@web_bp.route('/api/fragment-cache/status')
+def fragment_cache_status():
+    fragment_cache = get_fragment_cache()
+    return jsonify(fragment_cache.get_stats() if fragment_cache else {})
 
 # Бронирование книги
 @web_bp.route('/books/<int:book_id>/reserve', methods=['POST'])
@@ -155,36 +195,17 @@ def reserve_book(book_id):
         flash('Для бронирования книги необходимо войти в систему', 'error')
         return redirect(url_for('web.login'))
     
-    book = Book.query.get_or_404(book_id)
-    
-    # Проверяем, доступна ли книга
-    if book.available_copies <= 0:
-        flash('Все экземпляры этой книги сейчас забронированы', 'error')
-        return redirect(url_for('web.book_detail', book_id=book_id))
-    
-    # Проверяем, не забронировал ли пользователь уже эту книгу
-    existing_reservation = BookReservation.query.filter_by(
-        book_id=book_id, 
-        user_id=session['user_id'],
-        status='active'
-    ).first()
+    Book.query.get_or_404(book_id)
     
-    if existing_reservation:
-        flash('Вы уже забронировали эту книгу', 'error')
+    try:
+        reservation_service.reserve_book(book_id, session['user_id'])
+    except ReservationError as e:
+        if e.code == 'duplicate':
+            flash('Вы уже забронировали эту книгу', 'error')
+        else:
+            flash('Все экземпляры этой книги сейчас забронированы', 'error')
         return redirect(url_for('web.book_detail', book_id=book_id))
     
-    # Создаем бронирование
-    reservation = BookReservation(
-        book_id=book_id,
-        user_id=session['user_id']
-    )
-    
-    # Уменьшаем количество доступных копий
-    book.available_copies -= 1
-    
-    db.session.add(reservation)
-    db.session.commit()
-    
     flash('Книга успешно забронирована!', 'success')
     return redirect(url_for('web.profile'))
 
@@ -196,7 +217,7 @@ def profile():
         return redirect(url_for('web.login'))
     
     user_id = session['user_id']
-    reservations = BookReservation.query.filter_by(user_id=user_id).order_by(
+    reservations = reservations_query().filter_by(user_id=user_id).order_by(
         BookReservation.created_at.desc()
     ).all()
     
@@ -218,11 +239,11 @@ def cancel_reservation(reservation_id):
         flash('У вас нет прав для отмены этого бронирования', 'error')
         return redirect(url_for('web.profile'))
     
-    # Возвращаем книгу в доступные
-    reservation.book.available_copies += 1
-    reservation.status = 'cancelled'
-    
-    db.session.commit()
+    try:
+        reservation_service.close_reservation(reservation, 'cancelled')
+    except ReservationError:
+        flash('Это бронирование уже завершено или отменено', 'error')
+        return redirect(url_for('web.profile'))
     
     flash('Бронирование отменено', 'success')
     return redirect(url_for('web.profile'))
@@ -241,18 +262,12 @@ def return_book(reservation_id):
         flash('У вас нет прав для возврата этой книги', 'error')
         return redirect(url_for('web.profile'))
     
-    # Проверяем, что бронирование активно
-    if reservation.status != 'active':
+    try:
+        reservation_service.close_reservation(reservation, 'completed')
+    except ReservationError:
         flash('Это бронирование уже завершено или отменено', 'error')
         return redirect(url_for('web.profile'))
     
-    # Возвращаем книгу в доступные
-    reservation.book.available_copies += 1
-    reservation.status = 'completed'
-    reservation.return_date = datetime.utcnow()
-    
-    db.session.commit()
-    
     flash('Книга успешно возвращена!', 'success')
     return redirect(url_for('web.profile'))
 
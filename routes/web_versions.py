@@ -1,40 +1,49 @@
 from flask import Blueprint, request, jsonify, current_app
 from services.open_library import get_open_library_service
+from services.web_versions import SORT_OPTIONS, SORT_VALUES, find_web_versions, save_web_versions
 from models.book import Book
 
 web_versions_bp = Blueprint('web_versions', __name__)
 
 @web_versions_bp.route('/api/books/<int:book_id>/web-versions', methods=['GET'])
-def get_book_web_versions(book_id):
-    """Получение веб-версий книги из Open Library"""
-    
-    open_library_service = get_open_library_service()
-    
-    if not open_library_service or not open_library_service.is_available():
-        current_app.logger.warning("Сервис Open Library не доступен")
-        return jsonify({
-            'success': False,
-            'error': 'Сервис поиска электронных версий временно недоступен',
-            'service_available': False
-        }), 503
+async def get_book_web_versions(book_id):
+    """Получение веб-версий книги: из сохраненных результатов или из Open Library"""
     
     # Получаем параметр сортировки
     sort = request.args.get('sort', 'new')
+    if sort not in SORT_VALUES:
+        return jsonify(_invalid_sort_response(sort)), 400
+    
+    # Получаем книгу из базы данных
+    book = Book.query.get_or_404(book_id)
     
     try:
-        # Получаем книгу из базы данных
-        book = Book.query.get_or_404(book_id)
-        current_app.logger.info(f"Поиск электронных версий для книги: {book.title}")
+        stored, is_fresh = find_web_versions(book, sort, current_app.config.get('WEB_VERSIONS_MAX_AGE', 604800))
+        if is_fresh:
+            return jsonify(_book_web_versions_response(stored.to_dict(), book))
         
-        # Получаем веб-версии
-        result = open_library_service.get_book_web_versions(book, sort=sort)
+        open_library_service = get_open_library_service()
         
-        # Добавляем информацию о сервисе
-        result['service_available'] = True
-        result['book_id'] = book_id
-        result['book_title'] = book.title
+        if not open_library_service or not open_library_service.is_available() or open_library_service.is_circuit_open():
+            # Устаревшие результаты лучше, чем их отсутствие
+            if stored is not None:
+                return jsonify(_book_web_versions_response(stored.to_dict(), book))
+            current_app.logger.warning("Сервис Open Library не доступен")
+            return jsonify(_service_unavailable_response()), 503
         
-        return jsonify(result)
+        current_app.logger.info(f"Поиск электронных версий для книги: {book.title}")
+        
+        # Получаем веб-версии и сохраняем их для следующих просмотров
+        result = await open_library_service.get_book_web_versions_async(book, sort=sort)
+        if result.get('success'):
+            save_web_versions([(book.id, book.title, sort, result)])
+        elif stored is not None:
+            result = stored.to_dict()
+        elif result.get('circuit_open'):
+            # Выключатель отклонил вызов (нет пробных слотов или открылся во время запроса)
+            return jsonify(_service_unavailable_response()), 503
+        
+        return jsonify(_book_web_versions_response(result, book))
         
     except Exception as e:
         current_app.logger.error(f"Ошибка при получении веб-версий для книги {book_id}: {str(e)}")
@@ -45,22 +54,45 @@ def get_book_web_versions(book_id):
             'book_id': book_id
         }), 500
 
+def _service_unavailable_response():
+    """Ответ 503: сервис не настроен или выключатель отклоняет вызовы"""
+    return {
+        'success': False,
+        'error': 'Сервис поиска электронных версий временно недоступен',
+        'service_available': False
+    }
+
+def _invalid_sort_response(sort):
+    """Ответ на неизвестный способ сортировки"""
+    return {
+        'success': False,
+        'error': f'Неизвестный способ сортировки: {sort}. Допустимые: {", ".join(SORT_VALUES)}',
+        'service_available': True
+    }
+
+def _book_web_versions_response(result, book):
+    """Добавление информации о сервисе и книге к результату"""
+    result['service_available'] = True
+    result['book_id'] = book.id
+    result['book_title'] = book.title
+    result['search_query'] = book.title
+    return result
+
 @web_versions_bp.route('/api/web-versions/search', methods=['GET'])
-def search_web_versions():
+async def search_web_versions():
     """Поиск веб-версий по названию книги"""
     
+    sort = request.args.get('sort', 'new')
+    if sort not in SORT_VALUES:
+        return jsonify(_invalid_sort_response(sort)), 400
+    
     open_library_service = get_open_library_service()
     
-    if not open_library_service or not open_library_service.is_available():
-        return jsonify({
-            'success': False,
-            'error': 'Сервис поиска электронных версий временно недоступен',
-            'service_available': False
-        }), 503
+    if not open_library_service or not open_library_service.is_available() or open_library_service.is_circuit_open():
+        return jsonify(_service_unavailable_response()), 503
     
     # Получаем параметры поиска
     title = request.args.get('title')
-    sort = request.args.get('sort', 'new')
     
     if not title:
         return jsonify({
@@ -71,11 +103,14 @@ def search_web_versions():
     
     try:
         # Выполняем поиск
-        result = open_library_service.search_books_by_title(
+        result = await open_library_service.search_books_by_title_async(
             title=title,
             sort=sort
         )
         
+        if result.get('circuit_open'):
+            return jsonify(_service_unavailable_response()), 503
+        
         # Добавляем информацию о сервисе
         result['service_available'] = True
         result['search_query'] = title
@@ -96,11 +131,7 @@ def get_sort_options():
     """Получение доступных опций сортировки"""
     
     return jsonify({
-        'sort_options': [
-            {'value': 'new', 'label': 'Новые издания'},
-            {'value': 'editions', 'label': 'По количеству изданий'}
-            # Убрали 'relevance'
-        ]
+        'sort_options': [{'value': value, 'label': label} for value, label in SORT_OPTIONS]
     })
 
 @web_versions_bp.route('/api/web-versions/status', methods=['GET'])
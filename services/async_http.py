@@ -0,0 +1,202 @@
+import asyncio
+import json
+import logging
+import threading
+import time
+from urllib.parse import urlsplit
+import aiohttp
+from services.http_client import RETRY_STATUS_CODES, RetryPolicyMixin
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncHttpError(Exception):
+    """Ошибка соединения или таймаут асинхронного запроса"""
+
+
+class AsyncResponse:
+    """Прочитанный ответ асинхронного запроса"""
+
+    def __init__(self, status_code, content, headers):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers
+
+    def json(self):
+        return json.loads(self.content)
+
+
+class AsyncHttpClient(RetryPolicyMixin):
+    """
+    Общий асинхронный клиент исходящих HTTP запросов
+
+    Сессия aiohttp и пул соединений живут в собственном цикле событий в фоновом
+    потоке: Flask выполняет каждое async представление в отдельном цикле, а сессия
+    привязана к одному. Корутины из любого цикла ждут запрос без блокировки потока,
+    один цикл обслуживает все запросы процесса одновременно.
+
+    Args:
+        max_connections (int): Максимум открытых соединений
+        max_connections_per_host (int): Максимум соединений с одним хостом
+        max_in_flight (int): Максимум одновременно выполняющихся запросов
+        connect_timeout (float): Таймаут установки соединения, секунды
+        read_timeout (float): Таймаут чтения ответа, секунды
+        max_retries (int): Число повторов идемпотентных запросов
+        backoff_base (float): Базовая задержка перед повтором, секунды
+        backoff_max (float): Максимальная задержка перед повтором, секунды
+    """
+
+    def __init__(self, max_connections=100, max_connections_per_host=50, max_in_flight=200,
+                 connect_timeout=3.05, read_timeout=15, max_retries=2, backoff_base=0.2,
+                 backoff_max=2.0):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.max_in_flight = max_in_flight
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._init_retry_policy(max_retries, backoff_base, backoff_max)
+
+        self._loop = None
+        self._session = None
+        self._semaphore = None
+        self._start_lock = threading.Lock()
+
+        self._in_flight = 0
+        self._max_in_flight_seen = 0
+
+    def _ensure_started(self):
+        """Запуск фонового цикла событий при первом запросе"""
+        if self._loop is not None:
+            return self._loop
+
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def run():
+                    asyncio.set_event_loop(loop)
+                    loop.run_until_complete(self._open_session())
+                    ready.set()
+                    loop.run_forever()
+
+                threading.Thread(target=run, name='async-http', daemon=True).start()
+                ready.wait()
+                self._loop = loop
+        return self._loop
+
+    async def _open_session(self):
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host
+            )
+        )
+
+    async def request(self, method, url, timeout=None, retry=None, **kwargs):
+        """
+        Выполнение запроса в общем цикле событий
+
+        Args:
+            method (str): HTTP метод
+            url (str): Адрес
+            timeout: Кортеж (connect, read) или число; по умолчанию из настроек клиента
+            retry (bool): Повторять ли запрос; по умолчанию только для идемпотентных методов
+
+        Returns:
+            AsyncResponse: Ответ
+
+        Raises:
+            AsyncHttpError: Ошибка соединения или таймаут после всех попыток
+        """
+        loop = self._ensure_started()
+        coroutine = self._request(method.upper(), url, timeout, retry, kwargs)
+        if asyncio.get_running_loop() is loop:
+            return await coroutine
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coroutine, loop))
+
+    async def get(self, url, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def _request(self, method, url, timeout, retry, kwargs):
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        if not isinstance(timeout, tuple):
+            timeout = (timeout, timeout)
+        client_timeout = aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+        attempts = self._attempts(method, retry)
+        host = urlsplit(url).netloc
+
+        async with self._semaphore:
+            self._track_in_flight(1)
+            try:
+                for attempt in range(attempts):
+                    is_last = attempt == attempts - 1
+                    start = time.perf_counter()
+                    try:
+                        async with self._session.request(method, url, timeout=client_timeout, **kwargs) as response:
+                            content = await response.read()
+                    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                        self._record(host, time.perf_counter() - start, error=True)
+                        if is_last:
+                            raise AsyncHttpError(f'{method} {url}: {type(e).__name__} {e}') from e
+                        logger.warning(f"Повтор {method} {host} после ошибки: {type(e).__name__} {e}")
+                        await asyncio.sleep(self._retry_delay(host, attempt))
+                        continue
+
+                    self._record(host, time.perf_counter() - start)
+                    if response.status in RETRY_STATUS_CODES and not is_last:
+                        logger.warning(f"Повтор {method} {host} после ответа {response.status}")
+                        await asyncio.sleep(self._retry_delay(host, attempt))
+                        continue
+                    return AsyncResponse(response.status, content, dict(response.headers))
+            finally:
+                self._track_in_flight(-1)
+
+    def _track_in_flight(self, delta):
+        with self._stats_lock:
+            self._in_flight += delta
+            self._max_in_flight_seen = max(self._max_in_flight_seen, self._in_flight)
+
+    def get_stats(self):
+        """Метрики по хостам и число одновременно выполняющихся запросов"""
+        with self._stats_lock:
+            return {
+                'started': self._loop is not None,
+                'in_flight': self._in_flight,
+                'max_in_flight_seen': self._max_in_flight_seen,
+                'max_in_flight': self.max_in_flight,
+                'hosts': {host: dict(stats) for host, stats in self._host_stats.items()},
+            }
+
+
+# Создаем экземпляр клиента
+async_http_client = None
+
+
+def init_async_http_client(app):
+    """Инициализация общего асинхронного HTTP клиента; цикл событий запускается при первом запросе"""
+    global async_http_client
+    async_http_client = AsyncHttpClient(
+        max_connections=app.config.get('ASYNC_HTTP_MAX_CONNECTIONS', 100),
+        max_connections_per_host=app.config.get('ASYNC_HTTP_MAX_CONNECTIONS_PER_HOST', 50),
+        max_in_flight=app.config.get('ASYNC_HTTP_MAX_IN_FLIGHT', 200),
+        connect_timeout=app.config.get('HTTP_CONNECT_TIMEOUT', 3.05),
+        read_timeout=app.config.get('HTTP_READ_TIMEOUT', 15),
+        max_retries=app.config.get('HTTP_MAX_RETRIES', 2),
+        backoff_base=app.config.get('HTTP_BACKOFF_BASE', 0.2),
+        backoff_max=app.config.get('HTTP_BACKOFF_MAX', 2.0)
+    )
+    app.logger.info("Async HTTP client initialized")
+
+
+def get_async_http_client():
+    """Получение экземпляра асинхронного HTTP клиента, при необходимости с настройками по умолчанию"""
+    global async_http_client
+    if async_http_client is None:
+        async_http_client = AsyncHttpClient()
+    return async_http_client
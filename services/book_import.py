@@ -0,0 +1,456 @@
+import csv
+import json
+import logging
+import time
+from sqlalchemy import insert, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from models.base import db
+from models.book import Book, book_authors, book_genres
+from models.author import Author
+from models.genre import Genre
+from services.invalidation import mark_tables_changed
+from services.search import get_search_service
+
+logger = logging.getLogger(__name__)
+
+# Разделитель списков авторов и жанров в CSV
+CSV_LIST_SEPARATOR = ';'
+
+# Границы столбцов INTEGER: большие значения драйвер базы не запишет
+INTEGER_MIN, INTEGER_MAX = -2 ** 31, 2 ** 31 - 1
+
+# Формат файла по типу содержимого HTTP запроса
+CONTENT_TYPES = {
+    'application/x-ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'application/json': 'ndjson',
+    'text/csv': 'csv',
+}
+
+
+class ImportRowError(ValueError):
+    """Строка импорта не прошла проверку"""
+
+
+def _decoded_lines(lines, bad_lines):
+    """
+    Строки файла текстом; строки в байтах декодируются из UTF-8 по одной
+
+    Номера строк с некорректной кодировкой добавляются в bad_lines, сами
+    строки декодируются с заменой символов: ошибка относится к строке, а не
+    ко всему файлу.
+    """
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            try:
+                line = line.decode('utf-8')
+            except UnicodeDecodeError:
+                bad_lines.add(number)
+                line = line.decode('utf-8', errors='replace')
+        yield line
+
+
+def read_ndjson(lines):
+    """
+    Строки NDJSON: один JSON объект книги на строку
+
+    Args:
+        lines (iterable): Строки файла, текст или байты в UTF-8
+
+    Yields:
+        tuple: (номер строки, dict или ImportRowError)
+    """
+    bad_lines = set()
+    for number, line in enumerate(_decoded_lines(lines, bad_lines), 1):
+        line = line.strip()
+        if not line:
+            continue
+        if number in bad_lines:
+            yield number, ImportRowError('Некорректная кодировка, ожидается UTF-8')
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            yield number, ImportRowError(f'Некорректный JSON: {e}')
+
+
+def read_csv(lines):
+    """
+    Строки CSV с заголовком; авторы и жанры перечисляются через ';'
+
+    Args:
+        lines (iterable): Строки файла, текст или байты в UTF-8
+
+    Yields:
+        tuple: (номер строки, dict или ImportRowError)
+    """
+    bad_lines = set()
+    reader = csv.DictReader(_decoded_lines(lines, bad_lines))
+    previous_line = 0
+    while True:
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            # Читатель csv продолжает со следующей строки файла; номер строки ошибки
+            # он не учитывает, поэтому ошибка относится к строке после предыдущей записи
+            previous_line = max(reader.line_num, previous_line + 1)
+            yield previous_line, ImportRowError(f'Некорректная строка CSV: {e}')
+            continue
+
+        # Запись CSV может занимать несколько строк файла (перевод строки в кавычках)
+        row_lines = range(previous_line + 1, reader.line_num + 1)
+        previous_line = reader.line_num
+        if any(number in bad_lines for number in row_lines):
+            yield reader.line_num, ImportRowError('Некорректная кодировка, ожидается UTF-8')
+            continue
+
+        row = {key: value.strip() if isinstance(value, str) else value for key, value in row.items() if key}
+        for field in ('authors', 'genres'):
+            if row.get(field):
+                row[field] = [item.strip() for item in row[field].split(CSV_LIST_SEPARATOR) if item.strip()]
+        yield reader.line_num, {key: value for key, value in row.items() if value not in ('', None)}
+
+
+READERS = {
+    'ndjson': read_ndjson,
+    'csv': read_csv,
+}
+
+
+def _optional_int(row, field, default=None):
+    value = row.get(field)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ImportRowError(f'Поле {field} должно быть целым числом')
+    if not INTEGER_MIN <= value <= INTEGER_MAX:
+        raise ImportRowError(f'Поле {field} вне допустимого диапазона')
+    return value
+
+
+def _text(value, field):
+    """
+    Значение текстового поля строкой
+
+    Числа приводятся к строке, списки, объекты и логические значения
+    отклоняются: драйвер базы не сможет их записать, и ошибка уронила бы
+    весь пакет.
+    """
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        raise ImportRowError(f'Поле {field} должно быть строкой')
+    return str(value)
+
+
+def _author_key(author):
+    if isinstance(author, dict):
+        first_name = (_text(author.get('first_name'), 'authors.first_name') or '').strip()
+        last_name = (_text(author.get('last_name'), 'authors.last_name') or '').strip()
+    else:
+        # 'Лев Николаевич Толстой' -> ('Лев Николаевич', 'Толстой')
+        parts = (_text(author, 'authors') or '').split()
+        first_name, last_name = ' '.join(parts[:-1]), parts[-1] if parts else ''
+    if not last_name and not first_name:
+        raise ImportRowError('Пустое имя автора')
+    if len(first_name) > 100 or len(last_name) > 100:
+        raise ImportRowError('Слишком длинное имя автора')
+    return first_name, last_name
+
+
+def validate_row(row):
+    """
+    Проверка и нормализация строки импорта
+
+    Returns:
+        tuple: (значения полей книги, ключи авторов, названия жанров)
+
+    Raises:
+        ImportRowError: Строка некорректна
+    """
+    if isinstance(row, ImportRowError):
+        raise row
+    if not isinstance(row, dict):
+        raise ImportRowError('Ожидается объект книги')
+
+    title = (_text(row.get('title'), 'title') or '').strip()
+    if not title:
+        raise ImportRowError('Не указано название')
+    if len(title) > 255:
+        raise ImportRowError('Название длиннее 255 символов')
+
+    isbn = (_text(row.get('isbn'), 'isbn') or '').strip() or None
+    if isbn and len(isbn) > 20:
+        raise ImportRowError('ISBN длиннее 20 символов')
+
+    total_copies = _optional_int(row, 'total_copies', 1)
+    available_copies = _optional_int(row, 'available_copies', total_copies)
+    if total_copies < 0 or not 0 <= available_copies <= total_copies:
+        raise ImportRowError('Некорректное число копий')
+
+    metadata = row.get('file_stub_metadata')
+    if metadata is not None and not isinstance(metadata, str):
+        metadata = json.dumps(metadata)
+
+    authors = row.get('authors') or []
+    genres = row.get('genres') or []
+    if not isinstance(authors, list) or not isinstance(genres, list):
+        raise ImportRowError('Поля authors и genres должны быть списками')
+
+    genre_names = []
+    for genre in genres:
+        name = (_text(genre, 'genres') or '').strip()
+        if not name or len(name) > 100:
+            raise ImportRowError('Некорректное название жанра')
+        genre_names.append(name)
+
+    values = {
+        'title': title,
+        'description': _text(row.get('description'), 'description'),
+        'publication_year': _optional_int(row, 'publication_year'),
+        'isbn': isbn,
+        'total_copies': total_copies,
+        'available_copies': available_copies,
+        'file_stub_metadata': metadata,
+    }
+    return values, list(dict.fromkeys(_author_key(author) for author in authors)), list(dict.fromkeys(genre_names))
+
+
+class BookImporter:
+    """
+    Пакетный импорт книг
+
+    Строки обрабатываются пакетами по chunk_size: авторы и жанры пакета
+    находятся одним запросом, недостающие создаются одним INSERT, книги и
+    связи вставляются через executemany. Каждый пакет фиксируется отдельной
+    транзакцией, ошибки отдельных строк не прерывают импорт. Если база
+    отклонила пакет, его строки записываются по одной, и ошибкой
+    считается только отклоненная строка.
+
+    Args:
+        chunk_size (int): Строк в одном пакете
+        max_errors (int): Сколько ошибок строк сохранять в итоговой статистике
+    """
+
+    def __init__(self, chunk_size=1000, max_errors=1000):
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        # Найденные и созданные авторы и жанры, переиспользуются между пакетами
+        self._authors = {}
+        self._genres = {}
+        self._isbns = set()
+
+    def run(self, numbered_rows):
+        """
+        Импорт строк с результатом по каждому пакету
+
+        Args:
+            numbered_rows (iterable): Пары (номер строки, dict)
+
+        Yields:
+            dict: Результат пакета: rows, imported, authors_created, genres_created, errors
+        """
+        chunk = []
+        for item in numbered_rows:
+            chunk.append(item)
+            if len(chunk) >= self.chunk_size:
+                yield self._import_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield self._import_chunk(chunk)
+
+    def import_rows(self, numbered_rows, progress=None):
+        """
+        Импорт всех строк
+
+        Args:
+            numbered_rows (iterable): Пары (номер строки, dict)
+            progress (callable): Вызывается после каждого пакета с накопленной статистикой
+
+        Returns:
+            dict: Число строк, импортированных книг, ошибок, скорость
+        """
+        stats = self.empty_stats()
+        start = time.perf_counter()
+        for result in self.run(numbered_rows):
+            self.accumulate(stats, result, time.perf_counter() - start)
+            if progress:
+                progress(stats)
+        logger.info(
+            f"Импорт книг: строк {stats['rows']}, импортировано {stats['imported']}, "
+            f"ошибок {stats['failed']}, {stats['rows_per_second']:.0f} строк/с"
+        )
+        return stats
+
+    @staticmethod
+    def empty_stats():
+        return {
+            'rows': 0, 'imported': 0, 'failed': 0, 'authors_created': 0, 'genres_created': 0,
+            'errors': [], 'seconds': 0.0, 'rows_per_second': 0.0,
+        }
+
+    def accumulate(self, stats, result, elapsed):
+        """Добавление результата пакета к накопленной статистике"""
+        for field in ('rows', 'imported', 'authors_created', 'genres_created'):
+            stats[field] += result[field]
+        stats['failed'] += len(result['errors'])
+        stats['errors'].extend(result['errors'][:max(self.max_errors - len(stats['errors']), 0)])
+        stats['seconds'] = elapsed
+        stats['rows_per_second'] = stats['rows'] / elapsed if elapsed else 0.0
+
+    def _import_chunk(self, chunk):
+        result = {'rows': len(chunk), 'imported': 0, 'authors_created': 0, 'genres_created': 0, 'errors': []}
+
+        valid = []
+        for line, row in chunk:
+            try:
+                values, authors, genres = validate_row(row)
+            except ImportRowError as e:
+                result['errors'].append({'line': line, 'error': str(e)})
+                continue
+            valid.append((line, values, authors, genres))
+
+        valid = self._skip_existing_isbns(valid, result['errors'])
+        if not valid:
+            return result
+
+        try:
+            self._write_rows(valid, result)
+        except SQLAlchemyError as e:
+            # Пакет откатился целиком: строки записываются по одной, чтобы
+            # строка, которую не принимает база, не лишила импорта остальные
+            logger.warning(f"Ошибка записи пакета импорта, запись по одной строке: {str(e)}")
+            for item in valid:
+                try:
+                    self._write_rows([item], result)
+                except SQLAlchemyError as row_error:
+                    result['errors'].append({'line': item[0], 'error': f'Ошибка записи: {type(row_error).__name__}'})
+                    logger.error(f"Ошибка записи строки {item[0]} импорта: {str(row_error)}")
+        return result
+
+    def _write_rows(self, valid, result):
+        """
+        Запись проверенных строк одной транзакцией
+
+        При ошибке транзакция откатывается, найденные в ней авторы, жанры и
+        ISBN забываются, исключение пробрасывается.
+        """
+        created_authors, created_genres = set(), set()
+        try:
+            created_authors = self._resolve_authors({key for _, _, authors, _ in valid for key in authors})
+            created_genres = self._resolve_genres({name for _, _, _, genres in valid for name in genres})
+
+            book_ids = self._insert_books([values for _, values, _, _ in valid])
+
+            author_links = [
+                {'book_id': book_id, 'author_id': self._authors[key]}
+                for book_id, (_, _, authors, _) in zip(book_ids, valid) for key in authors
+            ]
+            genre_links = [
+                {'book_id': book_id, 'genre_id': self._genres[name]}
+                for book_id, (_, _, _, genres) in zip(book_ids, valid) for name in genres
+            ]
+            if author_links:
+                db.session.execute(insert(book_authors), author_links)
+            if genre_links:
+                db.session.execute(insert(book_genres), genre_links)
+
+            search_service = get_search_service()
+            if search_service:
+                search_service.reindex_books(book_ids)
+
+            mark_tables_changed(db.session, 'books', 'authors', 'genres', 'book_authors', 'book_genres')
+            db.session.commit()
+        except SQLAlchemyError:
+            db.session.rollback()
+            # Созданные в транзакции авторы и жанры откатились вместе с ней
+            for key in created_authors:
+                self._authors.pop(key, None)
+            for name in created_genres:
+                self._genres.pop(name, None)
+            for _, values, _, _ in valid:
+                self._isbns.discard(values['isbn'])
+            raise
+
+        result['imported'] += len(book_ids)
+        result['authors_created'] += len(created_authors)
+        result['genres_created'] += len(created_genres)
+
+    def _insert_books(self, rows):
+        """Вставка книг пакета; возвращает id в порядке строк"""
+        if db.engine.dialect.name == 'sqlite':
+            # SQLite не гарантирует порядок RETURNING, и SQLAlchemy перешла бы на построчные INSERT.
+            # Но rowid новых строк растут в порядке вставки, а другие писатели ждут конца
+            # транзакции, поэтому отсортированные id соответствуют порядку строк
+            return sorted(db.session.execute(insert(Book).returning(Book.id), rows).scalars())
+        return db.session.execute(
+            insert(Book).returning(Book.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+
+    def _skip_existing_isbns(self, valid, errors):
+        """Строки с ISBN, который уже есть в каталоге или встречался в импорте, считаются ошибками"""
+        isbns = {values['isbn'] for _, values, _, _ in valid if values['isbn']} - self._isbns
+        if isbns:
+            existing = db.session.execute(select(Book.isbn).where(Book.isbn.in_(isbns))).scalars()
+            self._isbns.update(existing)
+
+        kept = []
+        for item in valid:
+            isbn = item[1]['isbn']
+            if isbn and isbn in self._isbns:
+                errors.append({'line': item[0], 'error': f'Книга с ISBN {isbn} уже есть'})
+                continue
+            if isbn:
+                self._isbns.add(isbn)
+            kept.append(item)
+        return kept
+
+    def _resolve_authors(self, keys):
+        """Поиск авторов пакета одним запросом и создание недостающих; возвращает созданные ключи"""
+        missing = keys - self._authors.keys()
+        if missing:
+            rows = db.session.execute(
+                select(Author.id, Author.first_name, Author.last_name)
+                .where(tuple_(Author.first_name, Author.last_name).in_(missing))
+                .order_by(Author.id)
+            )
+            for author_id, first_name, last_name in rows:
+                self._authors.setdefault((first_name, last_name), author_id)
+
+        created = keys - self._authors.keys()
+        if created:
+            rows = db.session.execute(
+                insert(Author).returning(Author.id, Author.first_name, Author.last_name),
+                [{'first_name': first_name, 'last_name': last_name} for first_name, last_name in created]
+            )
+            for author_id, first_name, last_name in rows:
+                self._authors[(first_name, last_name)] = author_id
+        return created
+
+    def _resolve_genres(self, names):
+        """Поиск жанров пакета одним запросом и создание недостающих; возвращает созданные названия"""
+        missing = names - self._genres.keys()
+        if missing:
+            rows = db.session.execute(select(Genre.id, Genre.name).where(Genre.name.in_(missing)))
+            self._genres.update((name, genre_id) for genre_id, name in rows)
+
+        created = names - self._genres.keys()
+        if created:
+            rows = db.session.execute(
+                insert(Genre).returning(Genre.id, Genre.name),
+                [{'name': name} for name in created]
+            )
+            self._genres.update((name, genre_id) for genre_id, name in rows)
+        return created
+
+
+def create_importer(app):
+    """Создание BookImporter по настройкам приложения"""
+    return BookImporter(
+        chunk_size=app.config.get('BOOK_IMPORT_CHUNK_SIZE', 1000),
+        max_errors=app.config.get('BOOK_IMPORT_MAX_ERRORS', 1000)
+    )
@@ -0,0 +1,78 @@
+import logging
+from models import db, User
+from services.database import upgrade_db
+from services.search import get_search_service
+from services.seed_data import create_test_data
+from services.startup import StartupTimer
+
+logger = logging.getLogger(__name__)
+
+# Учетная запись первого администратора; пароль нужно сменить после первого входа
+FIRST_ADMIN_EMAIL = 'admin@library.com'
+FIRST_ADMIN_PASSWORD = 'admin123'
+
+
+def ensure_first_admin():
+    """
+    Создание первого администратора, если в системе нет ни одного
+
+    Returns:
+        tuple: (администратор или None, создан ли он сейчас)
+    """
+    admin_exists = User.query.filter_by(role='admin').first()
+    if admin_exists:
+        return admin_exists, False
+
+    admin_user = User(
+        email=FIRST_ADMIN_EMAIL,
+        first_name='Администратор',
+        last_name='Системы',
+        role='admin'
+    )
+    admin_user.set_password(FIRST_ADMIN_PASSWORD)
+
+    db.session.add(admin_user)
+    db.session.commit()
+    return admin_user, True
+
+
+def bootstrap_app(app, seed=None):
+    """
+    Однократная подготовка базы: миграции, поисковый индекс, администратор и тестовые данные
+
+    Выполняется при развертывании (flask bootstrap), а не при запуске каждого воркера.
+
+    Args:
+        app: Приложение Flask
+        seed (bool): Создавать ли тестовые данные, по умолчанию из SEED_TEST_DATA
+
+    Returns:
+        dict: Длительности фаз в миллисекундах
+    """
+    if seed is None:
+        seed = app.config.get('SEED_TEST_DATA', True)
+
+    timer = StartupTimer('bootstrap')
+    with app.app_context():
+        with timer.phase('migrations'):
+            upgrade_db()
+
+        search_service = get_search_service(require_index=False)
+        if search_service is not None:
+            with timer.phase('search_index'):
+                search_service.ensure_index()
+
+        with timer.phase('first_admin'):
+            admin_user, created = ensure_first_admin()
+        if created:
+            logger.info('Первый администратор создан!')
+            logger.info(f'Email: {FIRST_ADMIN_EMAIL}')
+            logger.info(f'Пароль: {FIRST_ADMIN_PASSWORD}')
+        else:
+            logger.info('Администратор уже существует в системе.')
+
+        if seed:
+            with timer.phase('seed_data'):
+                create_test_data()
+
+    return timer.report(app)
@@ -0,0 +1,442 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryCacheBackend:
+    """Кэш в памяти процесса с вытеснением давно не использованных записей (LRU)"""
+
+    name = 'memory'
+
+    def __init__(self, max_entries=1000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Получение записи
+
+        Returns:
+            tuple: (значение в JSON, expires_at, stale_until) или None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, expires_at, stale_until):
+        """
+        Сохранение записи
+
+        Returns:
+            int: Число вытесненных записей
+        """
+        with self._lock:
+            self._entries[key] = (value, expires_at, stale_until)
+            self._entries.move_to_end(key)
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """
+    Кэш в файле SQLite, общий для всех воркеров на узле
+
+    Каждый поток использует собственное соединение, файл открывается в режиме WAL.
+    Время обращения для LRU обновляется не чаще раза в touch_interval секунд,
+    поэтому частые попадания в один ключ не превращаются в запись на каждое чтение.
+    """
+
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries=10000, table='cache_entries', touch_interval=60.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.table = table
+        self.touch_interval = touch_interval
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, stale_until REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+            connection.execute(
+                f"CREATE INDEX IF NOT EXISTS ix_{self.table}_accessed_at ON {self.table} (accessed_at)"
+            )
+            connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table}_locks ("
+                "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def get(self, key):
+        connection = self._connection()
+        row = connection.execute(
+            f"SELECT value, expires_at, stale_until, accessed_at FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if now - row[3] >= self.touch_interval:
+            connection.execute(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return row[:3]
+
+    def set(self, key, value, expires_at, stale_until):
+        connection = self._connection()
+        with connection:
+            connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, stale_until, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, expires_at, stale_until, time.time())
+            )
+            excess = connection.execute(f"SELECT count(*) FROM {self.table}").fetchone()[0] - self.max_entries
+            if excess > 0:
+                connection.execute(
+                    f"DELETE FROM {self.table} WHERE key IN ("
+                    f"SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                    (excess,)
+                )
+                return excess
+        return 0
+
+    def delete(self, key):
+        self._connection().execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def acquire_lock(self, key, ttl):
+        """
+        Захват блокировки ключа, общей для всех процессов
+
+        Блокировка с истекшим сроком считается брошенной и перехватывается.
+
+        Returns:
+            str: Токен владельца или None, если блокировку держит другой
+        """
+        connection = self._connection()
+        now = time.time()
+        token = uuid.uuid4().hex
+        connection.execute(f"DELETE FROM {self.table}_locks WHERE key = ? AND expires_at < ?", (key, now))
+        cursor = connection.execute(
+            f"INSERT OR IGNORE INTO {self.table}_locks (key, owner, expires_at) VALUES (?, ?, ?)",
+            (key, token, now + ttl)
+        )
+        return token if cursor.rowcount == 1 else None
+
+    def release_lock(self, key, token):
+        self._connection().execute(
+            f"DELETE FROM {self.table}_locks WHERE key = ? AND owner = ?", (key, token)
+        )
+
+    def clear(self):
+        self._connection().execute(f"DELETE FROM {self.table}")
+
+    def size(self):
+        return self._connection().execute(f"SELECT count(*) FROM {self.table}").fetchone()[0]
+
+# Шаги загрузки под блокировкой (TTLCache._locked_load_steps)
+LOAD = 'load'
+WAIT = 'wait'
+
+
+class CacheLookup:
+    """Результат чтения из кэша: значение и состояние 'fresh', 'stale' или 'miss'"""
+
+    def __init__(self, value=None, state='miss'):
+        self.value = value
+        self.state = state
+
+    @property
+    def hit(self):
+        return self.state != 'miss'
+
+
+class TTLCache:
+    """
+    Кэш результатов с TTL, отрицательным кэшированием и stale-while-revalidate
+
+    Значения хранятся в JSON, поэтому вызывающий код получает независимую копию
+    и может ее изменять.
+
+    Args:
+        backend: MemoryCacheBackend или SQLiteCacheBackend
+        ttl (int): Время жизни положительного результата, секунды
+        negative_ttl (int): Время жизни пустого или ошибочного результата, секунды
+        stale_ttl (int): Сколько секунд после истечения можно отдавать устаревшее значение,
+            обновляя его в фоне
+        lock_timeout (float): Для хранилищ с блокировками (sqlite) промах загружает только один
+            процесс, остальные ждут его результат не дольше lock_timeout секунд; 0 - отключено
+    """
+
+    def __init__(self, backend, ttl=3600, negative_ttl=60, stale_ttl=0, lock_timeout=0,
+                 lock_poll_interval=0.05):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.stale_ttl = stale_ttl
+        self.lock_timeout = lock_timeout
+        self.lock_poll_interval = lock_poll_interval
+        self._stats_lock = threading.Lock()
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'evictions': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'lock_waits': 0,
+        }
+
+    def _count(self, name, amount=1):
+        with self._stats_lock:
+            self.stats[name] += amount
+
+    def get(self, key):
+        """Чтение значения с учетом срока жизни"""
+        entry = self.backend.get(key)
+        now = time.time()
+
+        if entry is not None:
+            value, expires_at, stale_until = entry
+            if now < expires_at:
+                self._count('hits')
+                return CacheLookup(json.loads(value), 'fresh')
+            if now < stale_until:
+                self._count('stale_hits')
+                return CacheLookup(json.loads(value), 'stale')
+
+        self._count('misses')
+        return CacheLookup()
+
+    def set(self, key, value, negative=False):
+        """Сохранение значения, отрицательные результаты живут negative_ttl"""
+        ttl = self.negative_ttl if negative else self.ttl
+        expires_at = time.time() + ttl
+        stale_until = expires_at + (0 if negative else self.stale_ttl)
+        evicted = self.backend.set(key, json.dumps(value, ensure_ascii=False), expires_at, stale_until)
+        if evicted:
+            self._count('evictions', evicted)
+
+    def get_or_load(self, key, loader, is_negative=lambda value: False, is_cacheable=lambda value: True):
+        """
+        Получение значения из кэша или через loader
+
+        Устаревшее значение возвращается сразу, а обновление запускается
+        в фоновом потоке, не более одного на ключ.
+
+        Args:
+            key (str): Ключ
+            loader (callable): Функция без аргументов, возвращающая значение
+            is_negative (callable): Признак пустого или ошибочного результата
+            is_cacheable (callable): Признак результата, который можно сохранить
+        """
+        lookup = self.lookup_or_refresh(key, loader, is_negative)
+        if lookup.hit:
+            return lookup.value
+
+        if self.lock_timeout and hasattr(self.backend, 'acquire_lock'):
+            return self._load_with_lock(key, loader, is_negative, is_cacheable)
+        return self._load(key, loader, is_negative, is_cacheable)
+
+    async def get_or_load_async(self, key, loader, refresh_loader, is_negative=lambda value: False,
+                                is_cacheable=lambda value: True):
+        """
+        Асинхронный вариант get_or_load: ожидание блокировки не занимает поток
+
+        Args:
+            key (str): Ключ
+            loader (callable): Функция без аргументов, возвращающая корутину со значением
+            refresh_loader (callable): Синхронная функция для фонового обновления устаревшего значения
+            is_negative (callable): Признак пустого или ошибочного результата
+            is_cacheable (callable): Признак результата, который можно сохранить
+        """
+        lookup = self.lookup_or_refresh(key, refresh_loader, is_negative)
+        if lookup.hit:
+            return lookup.value
+
+        async def load():
+            return self._store(key, await loader(), is_negative, is_cacheable)
+
+        if not (self.lock_timeout and hasattr(self.backend, 'acquire_lock')):
+            return await load()
+
+        steps = self._locked_load_steps(key)
+        try:
+            step = next(steps)
+            while True:
+                step = steps.send(await load() if step == LOAD else await asyncio.sleep(self.lock_poll_interval))
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            steps.close()
+
+    def lookup_or_refresh(self, key, loader, is_negative=lambda value: False):
+        """
+        Чтение значения; для устаревшего значения запускается фоновое обновление через loader
+
+        Returns:
+            CacheLookup: Результат чтения
+        """
+        lookup = self.get(key)
+        if lookup.state == 'stale':
+            self._refresh_in_background(key, loader, is_negative)
+        return lookup
+
+    def _load(self, key, loader, is_negative, is_cacheable):
+        return self._store(key, loader(), is_negative, is_cacheable)
+
+    def _store(self, key, value, is_negative, is_cacheable):
+        if is_cacheable(value):
+            self.set(key, value, negative=is_negative(value))
+        return value
+
+    def _load_with_lock(self, key, loader, is_negative, is_cacheable):
+        """Загрузка под блокировкой хранилища: остальные процессы ждут записи в кэш"""
+        steps = self._locked_load_steps(key)
+        try:
+            step = next(steps)
+            while True:
+                step = steps.send(
+                    self._load(key, loader, is_negative, is_cacheable) if step == LOAD
+                    else time.sleep(self.lock_poll_interval)
+                )
+        except StopIteration as stop:
+            return stop.value
+        finally:
+            steps.close()
+
+    def _locked_load_steps(self, key):
+        """
+        Решения загрузки под блокировкой без ожидания и вызова loader
+
+        Генератор выдает LOAD, когда нужно загрузить значение (результат
+        передается через send), или WAIT, когда нужно подождать
+        lock_poll_interval; итоговое значение возвращается через StopIteration.
+        Синхронная и асинхронная загрузка отличаются только тем, как они
+        выполняют эти шаги.
+        """
+        deadline = time.time() + self.lock_timeout
+        waited = False
+
+        while True:
+            token = self.backend.acquire_lock(key, self.lock_timeout)
+            if token is not None:
+                try:
+                    # Пока ждали блокировку, значение мог записать другой процесс
+                    value = self._peek(key) if waited else None
+                    if value is not None:
+                        return value
+                    return (yield LOAD)
+                finally:
+                    self.backend.release_lock(key, token)
+
+            if not waited:
+                waited = True
+                self._count('lock_waits')
+            yield WAIT
+
+            value = self._peek(key)
+            if value is not None:
+                return value
+            if time.time() >= deadline:
+                logger.warning(f"Не дождались блокировки кэша для {key}, загрузка без нее")
+                return (yield LOAD)
+
+    def _peek(self, key):
+        """Свежее значение без учета в статистике или None"""
+        entry = self.backend.get(key)
+        if entry is not None and time.time() < entry[1]:
+            return json.loads(entry[0])
+        return None
+
+    def _refresh_in_background(self, key, loader, is_negative):
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                value = loader()
+                negative = is_negative(value)
+                # Ошибочный ответ не вытесняет последнее успешное значение
+                if not negative:
+                    self.set(key, value)
+                self._count('refreshes')
+            except Exception as e:
+                self._count('refresh_errors')
+                logger.error(f"Ошибка фонового обновления кэша для {key}: {str(e)}")
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name='cache-refresh', daemon=True).start()
+
+    def get_stats(self):
+        """Счетчики попаданий, промахов и вытеснений"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['stale_hits'] + stats['misses']
+        stats['hit_rate'] = (stats['hits'] + stats['stale_hits']) / lookups if lookups else None
+        stats['backend'] = self.backend.name
+        stats['size'] = self.backend.size()
+        return stats
+
+
+def create_cache_backend(backend, path=None, max_entries=1000, table='cache_entries', touch_interval=60.0):
+    """
+    Создание хранилища кэша по имени
+
+    Args:
+        backend (str): 'memory' или 'sqlite'
+        path (str): Путь к файлу для 'sqlite'
+        max_entries (int): Максимальное число записей
+        table (str): Имя таблицы для 'sqlite'
+        touch_interval (float): Минимальный интервал обновления времени обращения для 'sqlite'
+    """
+    if backend == 'sqlite':
+        return SQLiteCacheBackend(path, max_entries=max_entries, table=table, touch_interval=touch_interval)
+    if backend != 'memory':
+        logger.warning(f"Неизвестное хранилище кэша {backend}, используется память процесса")
+    return MemoryCacheBackend(max_entries=max_entries)
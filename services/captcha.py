@@ -1,12 +1,16 @@
 import requests
 import json
 from flask import request, current_app
+from services.http_client import get_http_client
+from services.async_http import AsyncHttpError, get_async_http_client
 
 class CaptchaService:
     """Сервис для работы с Yandex SmartCaptcha"""
     
-    def __init__(self, server_key):
+    def __init__(self, server_key, http_client=None, async_http_client=None):
         self.server_key = server_key
+        self.http = http_client or get_http_client()
+        self.async_http = async_http_client or get_async_http_client()
         self.validation_url = "https://smartcaptcha.yandexcloud.net/validate"
     
     def verify_captcha(self, token, user_ip=None):
@@ -32,49 +36,97 @@ class CaptchaService:
         
         try:
             # Отправляем запрос на валидацию
-            response = requests.post(
+            response = self.http.post(
                 self.validation_url,
-                data={
-                    'secret': self.server_key,
-                    'token': token,
-                    'ip': user_ip
-                },
-                timeout=5
+                data=self._validation_data(token, user_ip),
+                timeout=(self.http.connect_timeout, 5)
             )
-            
-            # Парсим ответ
-            result = response.json()
-            
-            if response.status_code == 200:
-                return {
-                    'success': result.get('status') == 'ok',
-                    'status': result.get('status'),
-                    'message': result.get('message'),
-                    'host': result.get('host')
-                }
-            else:
-                current_app.logger.error(f"Captcha validation error: {response.status_code} - {result}")
-                return {
-                    'success': False,
-                    'error': f'Ошибка сервера капчи: {response.status_code}',
-                    'status': 'error'
-                }
+            return self._result_from_response(response)
                 
         except requests.exceptions.RequestException as e:
-            current_app.logger.error(f"Captcha request failed: {str(e)}")
+            return self._connection_error(e)
+        except json.JSONDecodeError as e:
+            return self._parse_error(e)
+    
+    async def verify_captcha_async(self, token, user_ip=None):
+        """
+        Асинхронный вариант verify_captcha с тем же форматом результата
+        
+        Args:
+            token (str): Токен от капчи
+            user_ip (str): IP адрес пользователя
+            
+        Returns:
+            dict: Результат проверки
+        """
+        if not token:
             return {
                 'success': False,
-                'error': f'Ошибка подключения к сервису капчи: {str(e)}',
-                'status': 'error'
+                'error': 'Токен капчи отсутствует'
             }
+        
+        if not user_ip:
+            user_ip = self._get_user_ip()
+        
+        try:
+            response = await self.async_http.post(
+                self.validation_url,
+                data=self._validation_data(token, user_ip),
+                timeout=(self.async_http.connect_timeout, 5)
+            )
+            return self._result_from_response(response)
+        
+        except AsyncHttpError as e:
+            return self._connection_error(e)
         except json.JSONDecodeError as e:
-            current_app.logger.error(f"Captcha response parse error: {str(e)}")
+            return self._parse_error(e)
+    
+    def _validation_data(self, token, user_ip):
+        data = {
+            'secret': self.server_key,
+            'token': token
+        }
+        # aiohttp не принимает None в данных формы, requests такие поля пропускает
+        if user_ip:
+            data['ip'] = user_ip
+        return data
+    
+    def _result_from_response(self, response):
+        """Результат проверки по ответу сервиса (requests или AsyncResponse)"""
+        # Парсим ответ
+        result = response.json()
+        
+        if response.status_code == 200:
+            return {
+                'success': result.get('status') == 'ok',
+                'status': result.get('status'),
+                'message': result.get('message'),
+                'host': result.get('host')
+            }
+        else:
+            current_app.logger.error(f"Captcha validation error: {response.status_code} - {result}")
             return {
                 'success': False,
-                'error': 'Неверный формат ответа от сервиса капчи',
+                'error': f'Ошибка сервера капчи: {response.status_code}',
                 'status': 'error'
             }
     
+    def _connection_error(self, error):
+        current_app.logger.error(f"Captcha request failed: {str(error)}")
+        return {
+            'success': False,
+            'error': f'Ошибка подключения к сервису капчи: {str(error)}',
+            'status': 'error'
+        }
+    
+    def _parse_error(self, error):
+        current_app.logger.error(f"Captcha response parse error: {str(error)}")
+        return {
+            'success': False,
+            'error': 'Неверный формат ответа от сервиса капчи',
+            'status': 'error'
+        }
+    
     def _get_user_ip(self):
         """Получение IP адреса пользователя с учетом прокси"""
         if request.headers.get('X-Forwarded-For'):
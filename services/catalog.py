@@ -0,0 +1,163 @@
+import threading
+import time
+from flask import current_app
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+from models.base import db
+from models.book import Book
+from models.reservation import BookReservation
+from models.session import primary_reads
+from services.invalidation import on_tables_changed
+from services.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+# Кэш общего числа книг: значение, момент вычисления и поколение (растет при каждом сбросе)
+_books_total = {'value': None, 'computed_at': 0.0, 'generation': 0}
+_books_total_lock = threading.Lock()
+
+
+def catalog_query():
+    """
+    Запрос книг с пакетной загрузкой авторов и жанров
+
+    Авторы и жанры подгружаются через selectinload, поэтому страница любого
+    размера обходится фиксированным числом запросов: книги, авторы, жанры.
+
+    Returns:
+        Query: Запрос к таблице книг
+    """
+    return Book.query.options(
+        selectinload(Book.authors),
+        selectinload(Book.genres)
+    )
+
+
+def reservations_query():
+    """
+    Запрос бронирований с пакетной загрузкой книг, их авторов, жанров и пользователей
+
+    Returns:
+        Query: Запрос к таблице бронирований
+    """
+    return BookReservation.query.options(
+        selectinload(BookReservation.book).selectinload(Book.authors),
+        selectinload(BookReservation.book).selectinload(Book.genres),
+        selectinload(BookReservation.user)
+    )
+
+
+def serialize_books(books):
+    """Сериализация списка книг, загруженных через catalog_query"""
+    return [book.to_dict() for book in books]
+
+
+def counted_page(model, link_column, order_by, page=1, per_page=20):
+    """
+    Страница записей справочника с числом книг у каждой
+
+    Сначала отбирается страница id, затем к ней присоединяются связи с
+    книгами и группируются: число книг считается одним запросом по индексу
+    связующей таблицы и только для записей страницы.
+
+    Args:
+        model: Author или Genre
+        link_column: Колонка связующей таблицы со ссылкой на model, например book_authors.c.author_id
+        order_by (list): Порядок страницы, последняя колонка уникальна
+        page (int): Номер страницы с 1
+        per_page (int): Размер страницы, None - все записи
+
+    Returns:
+        list: Пары (запись, число книг)
+    """
+    page_ids = select(model.id).order_by(*order_by)
+    if per_page is not None:
+        page_ids = page_ids.limit(per_page).offset((page - 1) * per_page)
+    page_ids = page_ids.subquery()
+    return db.session.execute(
+        select(model, func.count(link_column.table.c.book_id))
+        .join(page_ids, page_ids.c.id == model.id)
+        .outerjoin(link_column.table, link_column == model.id)
+        .group_by(model.id)
+        .order_by(*order_by)
+    ).all()
+
+
+def linked_books_page(link_column, value, cursor=None, limit=10):
+    """
+    Книги автора или жанра с курсорной пагинацией по id книги
+
+    id книг страницы выбираются диапазоном по составному индексу связующей
+    таблицы (author_id, book_id) или (genre_id, book_id), затем книги
+    загружаются через catalog_query. Связь Author.books и Genre.books
+    целиком не загружается.
+
+    Args:
+        link_column: book_authors.c.author_id или book_genres.c.genre_id
+        value (int): id автора или жанра
+        cursor (str): Курсор предыдущей страницы
+        limit (int): Размер страницы
+
+    Returns:
+        tuple: (книги страницы, курсор следующей страницы или None)
+
+    Raises:
+        InvalidCursorError: Курсор поврежден
+    """
+    book_id = link_column.table.c.book_id
+    statement = select(book_id).where(link_column == value).distinct()
+    if cursor:
+        values = decode_cursor(cursor, 'id')
+        if len(values) != 1 or not isinstance(values[0], int):
+            raise InvalidCursorError('Курсор не соответствует порядку сортировки')
+        statement = statement.where(book_id > values[0])
+
+    book_ids = db.session.execute(statement.order_by(book_id).limit(limit + 1)).scalars().all()
+
+    next_cursor = None
+    if len(book_ids) > limit:
+        book_ids = book_ids[:limit]
+        next_cursor = encode_cursor('id', [book_ids[-1]])
+
+    books_by_id = {
+        book.id: book
+        for book in catalog_query().filter(Book.id.in_(book_ids))
+    } if book_ids else {}
+    return [books_by_id[book_id] for book_id in book_ids if book_id in books_by_id], next_cursor
+
+
+def get_books_total():
+    """
+    Общее число книг из кэша
+
+    Кэш сбрасывается при записи в таблицу книг в этом процессе, а TTL
+    ограничивает расхождение между воркерами.
+
+    Returns:
+        int: Число книг
+    """
+    ttl = current_app.config.get('BOOKS_COUNT_CACHE_TTL', 60)
+    now = time.monotonic()
+
+    with _books_total_lock:
+        value = _books_total['value']
+        if value is not None and now - _books_total['computed_at'] < ttl:
+            return value
+        generation = _books_total['generation']
+
+    # Значение общее для всех запросов, поэтому считается по основной базе, а не по реплике
+    with primary_reads(db.session):
+        value = db.session.query(db.func.count(Book.id)).scalar()
+
+    with _books_total_lock:
+        # Сброс во время подсчета: значение могло устареть, сохранять его нельзя
+        if generation == _books_total['generation']:
+            _books_total['value'] = value
+            _books_total['computed_at'] = now
+    return value
+
+
+@on_tables_changed('books')
+def invalidate_books_total(tables=None):
+    """Сброс кэша числа книг"""
+    with _books_total_lock:
+        _books_total['value'] = None
+        _books_total['generation'] += 1
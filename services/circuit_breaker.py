@@ -0,0 +1,232 @@
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """
+    Автоматический выключатель для вызовов внешнего сервиса
+
+    В состоянии closed вызовы проходят, а их результаты попадают в скользящее
+    окно. Когда доля ошибок или медленных вызовов в окне превышает порог,
+    выключатель переходит в open и отклоняет вызовы без обращения к сервису.
+    Через open_seconds он пропускает несколько пробных вызовов (half_open):
+    если все они успешны, выключатель закрывается, иначе снова открывается.
+
+    Args:
+        name (str): Имя для логов
+        failure_rate_threshold (float): Доля ошибок, при которой выключатель открывается
+        slow_call_seconds (float): Длительность, начиная с которой вызов считается медленным
+        slow_call_rate_threshold (float): Доля медленных вызовов, при которой выключатель открывается
+        window_size (int): Размер скользящего окна, вызовов
+        minimum_calls (int): Минимум вызовов в окне для оценки порогов
+        open_seconds (float): Время в состоянии open до пробных вызовов
+        half_open_max_calls (int): Число пробных вызовов в состоянии half_open
+    """
+
+    def __init__(self, name, failure_rate_threshold=0.5, slow_call_seconds=5.0,
+                 slow_call_rate_threshold=0.5, window_size=20, minimum_calls=5,
+                 open_seconds=30.0, half_open_max_calls=2):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._window = deque(maxlen=window_size)
+        self._state = CLOSED
+        self._opened_at = None
+        self._half_open_in_flight = 0
+        self._half_open_successes = 0
+        # Номер периода half_open: слот прошлого периода не освобождает слоты текущего
+        self._half_open_period = 0
+        self._rejected = 0
+        self._transitions = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            self._refresh_state()
+            return self._state
+
+    def is_open(self):
+        """Выключатель отклоняет вызовы"""
+        return self.state == OPEN
+
+    def allow_request(self):
+        """
+        Разрешение на вызов сервиса
+
+        После разрешенного вызова необходимо вызвать record_success или record_failure,
+        иначе пробный вызов в half_open занимает слот навсегда; надежнее использовать call().
+
+        Returns:
+            bool: Вызов можно выполнять
+        """
+        return self._acquire()[0]
+
+    @contextmanager
+    def call(self):
+        """
+        Вызов сервиса через выключатель
+
+        Если пробный вызов завершился без учета результата (отмена задачи,
+        исключение), его слот half_open освобождается при выходе из блока.
+
+        Yields:
+            BreakerCall: allowed - вызов можно выполнять, record_success и record_failure учитывают результат
+        """
+        allowed, started = self._acquire()
+        breaker_call = BreakerCall(self, allowed, started)
+        try:
+            yield breaker_call
+        finally:
+            if allowed and not breaker_call.recorded:
+                self._release(started)
+
+    def _acquire(self):
+        """Разрешение и состояние, в котором начался вызов: (closed, None) или (half_open, номер периода)"""
+        with self._lock:
+            self._refresh_state()
+
+            if self._state == CLOSED:
+                return True, (CLOSED, None)
+
+            if self._state == HALF_OPEN and self._half_open_in_flight < self.half_open_max_calls:
+                self._half_open_in_flight += 1
+                return True, (HALF_OPEN, self._half_open_period)
+
+            self._rejected += 1
+            return False, None
+
+    def _is_current_trial(self, started):
+        # Пробным вызовом текущего периода считается только вызов, начатый в нем
+        return started == (HALF_OPEN, self._half_open_period)
+
+    def _release(self, started):
+        """Освобождение слота пробного вызова без учета результата"""
+        with self._lock:
+            if self._state == HALF_OPEN and self._is_current_trial(started):
+                self._half_open_in_flight = max(self._half_open_in_flight - 1, 0)
+
+    def record_success(self, duration, started=None):
+        """
+        Учет успешного вызова; слишком медленный вызов учитывается как медленный
+
+        Args:
+            duration (float): Длительность вызова, секунды
+            started (tuple): Состояние начала вызова из call(); None - вызов через allow_request
+        """
+        self._record(failed=False, slow=duration >= self.slow_call_seconds, started=started)
+
+    def record_failure(self, duration, started=None):
+        """Учет неудачного вызова"""
+        self._record(failed=True, slow=duration >= self.slow_call_seconds, started=started)
+
+    def _record(self, failed, slow, started=None):
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if started is not None and not self._is_current_trial(started):
+                    # Вызов начался в closed или в прошлом периоде half_open: его результат
+                    # не должен закрыть выключатель и не занимает слот текущего периода
+                    return
+                self._half_open_in_flight = max(self._half_open_in_flight - 1, 0)
+                if failed or slow:
+                    self._transition(OPEN)
+                    return
+                self._half_open_successes += 1
+                if self._half_open_successes >= self.half_open_max_calls:
+                    self._transition(CLOSED)
+                return
+
+            if self._state == OPEN:
+                # Вызов начался до открытия выключателя
+                return
+
+            self._window.append((failed, slow))
+            failure_rate, slow_rate = self._rates()
+            if len(self._window) >= self.minimum_calls and (
+                failure_rate >= self.failure_rate_threshold or slow_rate >= self.slow_call_rate_threshold
+            ):
+                self._transition(OPEN)
+
+    def _rates(self):
+        if not self._window:
+            return 0.0, 0.0
+        calls = len(self._window)
+        failures = sum(1 for failed, _ in self._window if failed)
+        slow = sum(1 for _, is_slow in self._window if is_slow)
+        return failures / calls, slow / calls
+
+    def _refresh_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._transition(HALF_OPEN)
+
+    def _transition(self, state):
+        previous = self._state
+        self._state = state
+        self._transitions += 1
+
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == HALF_OPEN:
+            self._half_open_period += 1
+            self._half_open_in_flight = 0
+            self._half_open_successes = 0
+        elif state == CLOSED:
+            self._opened_at = None
+            self._window.clear()
+
+        log = logger.warning if state == OPEN else logger.info
+        log(f"Выключатель {self.name}: {previous} -> {state}")
+
+    def get_state(self):
+        """Состояние выключателя и показатели скользящего окна"""
+        with self._lock:
+            self._refresh_state()
+            failure_rate, slow_rate = self._rates()
+            retry_after = None
+            if self._state == OPEN:
+                retry_after = max(self.open_seconds - (time.monotonic() - self._opened_at), 0.0)
+            return {
+                'name': self.name,
+                'state': self._state,
+                'window_calls': len(self._window),
+                'failure_rate': failure_rate,
+                'slow_call_rate': slow_rate,
+                'failure_rate_threshold': self.failure_rate_threshold,
+                'slow_call_seconds': self.slow_call_seconds,
+                'slow_call_rate_threshold': self.slow_call_rate_threshold,
+                'retry_after_seconds': retry_after,
+                'rejected_calls': self._rejected,
+                'transitions': self._transitions,
+            }
+
+
+class BreakerCall:
+    """Разрешение на один вызов, полученное в CircuitBreaker.call()"""
+
+    def __init__(self, breaker, allowed, started):
+        self.breaker = breaker
+        self.allowed = allowed
+        self.started = started
+        self.recorded = False
+
+    def record_success(self, duration):
+        self.recorded = True
+        self.breaker.record_success(duration, started=self.started)
+
+    def record_failure(self, duration):
+        self.recorded = True
+        self.breaker.record_failure(duration, started=self.started)
@@ -1,11 +1,34 @@
+import os
+from flask_migrate import Migrate, upgrade, stamp
+from sqlalchemy import inspect
 from models.base import db
 from models.book import Book, book_authors, book_genres
 from models.author import Author
 from models.genre import Genre
 from models.user import User
 from models.reservation import BookReservation
+from models.web_version import BookWebVersion
+from services.engine_profiles import apply_engine_profiles, init_engine_profiles
+
+MIGRATIONS_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+
+# Ревизия, соответствующая схеме, которую раньше создавал db.create_all()
+INITIAL_REVISION = '0001_initial_schema'
+
+migrate = Migrate(directory=MIGRATIONS_DIRECTORY)
 
 def init_db(app):
+    apply_engine_profiles(app)
     db.init_app(app)
-    with app.app_context():
-        db.create_all()
+    init_engine_profiles(app)
+    migrate.init_app(app, db)
+
+def upgrade_db():
+    """Применение миграций к текущей базе данных"""
+    table_names = inspect(db.engine).get_table_names()
+    
+    # База создана через db.create_all() до появления миграций
+    if 'books' in table_names and 'alembic_version' not in table_names:
+        stamp(directory=MIGRATIONS_DIRECTORY, revision=INITIAL_REVISION)
+    
+    upgrade(directory=MIGRATIONS_DIRECTORY)
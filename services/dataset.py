@@ -0,0 +1,333 @@
+import bisect
+import itertools
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import func, insert, select, update, bindparam
+from models.base import db
+from models.book import Book, book_authors, book_genres
+from models.author import Author
+from models.genre import Genre
+from models.user import User
+from models.reservation import BookReservation
+from services.invalidation import notify_tables_changed
+from services.passwords import get_password_hasher
+from services.search import get_search_service
+
+logger = logging.getLogger(__name__)
+
+FIRST_NAMES = [
+    'Александр', 'Анна', 'Борис', 'Вера', 'Григорий', 'Дарья', 'Евгений', 'Елена', 'Иван', 'Ирина',
+    'Кирилл', 'Мария', 'Михаил', 'Наталья', 'Николай', 'Ольга', 'Павел', 'Светлана', 'Сергей', 'Татьяна',
+]
+LAST_NAMES = [
+    'Иванов', 'Смирнов', 'Кузнецов', 'Попов', 'Васильев', 'Петров', 'Соколов', 'Михайлов', 'Новиков',
+    'Федоров', 'Морозов', 'Волков', 'Алексеев', 'Лебедев', 'Семенов', 'Егоров', 'Павлов', 'Козлов',
+]
+GENRE_NAMES = [
+    'Роман', 'Детектив', 'Фантастика', 'Фэнтези', 'Поэзия', 'Драма', 'История', 'Биография',
+    'Научпоп', 'Философия', 'Приключения', 'Триллер', 'Ужасы', 'Сказки', 'Психология',
+]
+TITLE_WORDS = [
+    'тайна', 'дом', 'время', 'дорога', 'море', 'город', 'ночь', 'сад', 'зима', 'память', 'огонь',
+    'остров', 'письмо', 'ветер', 'звезда', 'тень', 'река', 'мост', 'песня', 'сон', 'берег', 'голос',
+]
+
+# Доли книг с одним, двумя и тремя авторами
+AUTHORS_PER_BOOK_WEIGHTS = [70, 22, 8]
+# Доли завершенных, отмененных и просроченных бронирований в истории
+HISTORY_STATUS_WEIGHTS = {'completed': 75, 'cancelled': 15, 'expired': 10}
+
+
+class ZipfSampler:
+    """
+    Выбор элементов с вероятностью, обратно пропорциональной рангу в степени exponent
+
+    Ранги случайно переставлены, поэтому популярные элементы не совпадают
+    с первыми id.
+    """
+
+    def __init__(self, items, exponent, rng):
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.cum_weights = list(itertools.accumulate(1 / rank ** exponent for rank in range(1, len(self.items) + 1)))
+        self.total = self.cum_weights[-1]
+        self.rng = rng
+
+    def sample(self):
+        return self.items[bisect.bisect_left(self.cum_weights, self.rng.random() * self.total)]
+
+    def sample_distinct(self, count):
+        chosen = []
+        while len(chosen) < min(count, len(self.items)):
+            item = self.sample()
+            if item not in chosen:
+                chosen.append(item)
+        return chosen
+
+
+class DatasetGenerator:
+    """
+    Детерминированный генератор синтетического каталога для нагрузочного тестирования
+
+    При одинаковом seed и размерах генерируются одинаковые данные (даты
+    отсчитываются от момента запуска). Популярность
+    авторов, жанров и книг распределена по закону Ципфа, у книги от одного
+    до трех авторов, у пользователей есть история завершенных, отмененных и
+    просроченных бронирований и немного активных. Строки вставляются через
+    executemany пакетами по chunk_size с заранее назначенными id, поэтому
+    генерацию нельзя запускать одновременно с другими записями в эти таблицы.
+
+    Args:
+        seed (int): Начальное значение генератора случайных чисел
+        books, authors, genres, users, reservations (int): Число строк
+        zipf_exponent (float): Показатель распределения популярности
+        chunk_size (int): Строк в одном executemany
+    """
+
+    def __init__(self, seed=42, books=10000, authors=2000, genres=30, users=5000, reservations=50000,
+                 zipf_exponent=1.1, chunk_size=5000):
+        self.seed = seed
+        self.counts = {
+            'genres': genres, 'authors': authors, 'books': books, 'users': users, 'reservations': reservations,
+        }
+        self.zipf_exponent = zipf_exponent
+        self.chunk_size = chunk_size
+        self.rng = random.Random(seed)
+        self.now = datetime.utcnow().replace(microsecond=0)
+
+    def generate(self, progress=None):
+        """
+        Генерация и вставка всех таблиц
+
+        Args:
+            progress (callable): Вызывается с именем таблицы и числом вставленных строк
+
+        Returns:
+            dict: Число строк по таблицам, длительность и скорость
+        """
+        start = time.perf_counter()
+        stats = {}
+
+        genre_ids = self._insert('genres', Genre, self._genres(), progress)
+        author_ids = self._insert('authors', Author, self._authors(), progress)
+        book_ids, copies = self._insert_books(author_ids, genre_ids, progress, stats)
+        user_ids = self._insert('users', User, self._users(), progress)
+        stats['reservations'] = self._insert_reservations(book_ids, user_ids, copies, progress)
+        stats.update(genres=len(genre_ids), authors=len(author_ids), books=len(book_ids), users=len(user_ids))
+
+        search_service = get_search_service()
+        if search_service:
+            search_service.rebuild()
+        notify_tables_changed(['genres', 'authors', 'books', 'book_authors', 'book_genres', 'users', 'book_reservations'])
+
+        stats['seconds'] = time.perf_counter() - start
+        rows = sum(value for key, value in stats.items() if key != 'seconds')
+        stats['rows_per_second'] = rows / stats['seconds'] if stats['seconds'] else 0.0
+        logger.info(f"Сгенерировано строк: {rows} за {stats['seconds']:.1f} с")
+        return stats
+
+    def _next_id(self, model):
+        return (db.session.execute(select(func.max(model.id))).scalar() or 0) + 1
+
+    def _execute_chunks(self, table, rows, name, progress):
+        inserted = 0
+        for chunk in _chunks(rows, self.chunk_size):
+            db.session.execute(insert(table), chunk)
+            db.session.commit()
+            inserted += len(chunk)
+            if progress:
+                progress(name, inserted)
+        return inserted
+
+    def _insert(self, name, model, rows, progress):
+        """Вставка строк модели с последовательными id, возвращает вставленные id"""
+        first_id = self._next_id(model)
+        rows = (dict(row, id=first_id + index) for index, row in enumerate(rows))
+        inserted = self._execute_chunks(model.__table__, rows, name, progress)
+        self._sync_sequence(model)
+        return range(first_id, first_id + inserted)
+
+    def _sync_sequence(self, model):
+        # При явных id последовательность PostgreSQL нужно сдвинуть вручную
+        if db.engine.dialect.name == 'postgresql':
+            table = model.__tablename__
+            db.session.execute(db.text(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT MAX(id) FROM {table}))"
+            ))
+            db.session.commit()
+
+    def _genres(self):
+        existing = set(db.session.execute(select(Genre.name)).scalars())
+        names = (
+            name if cycle == 0 else f'{name} {cycle + 1}'
+            for cycle in itertools.count() for name in GENRE_NAMES
+        )
+        count = 0
+        for name in names:
+            if count == self.counts['genres']:
+                return
+            if name in existing:
+                continue
+            count += 1
+            yield {'name': name, 'description': f'Жанр «{name}»', 'created_at': self.now, 'updated_at': self.now}
+
+    def _authors(self):
+        for index in range(self.counts['authors']):
+            yield {
+                'first_name': self.rng.choice(FIRST_NAMES),
+                'last_name': f'{self.rng.choice(LAST_NAMES)}-{index}',
+                'biography': None,
+                'created_at': self.now,
+                'updated_at': self.now,
+            }
+
+    def _insert_books(self, author_ids, genre_ids, progress, stats):
+        """Книги со связями; возвращает id книг и число копий каждой"""
+        first_id = self._next_id(Book)
+        authors = ZipfSampler(author_ids, self.zipf_exponent, self.rng) if author_ids else None
+        genres = ZipfSampler(genre_ids, self.zipf_exponent, self.rng) if genre_ids else None
+        copies = {}
+        links = {'book_authors': [], 'book_genres': []}
+
+        def rows():
+            for index in range(self.counts['books']):
+                book_id = first_id + index
+                total_copies = self.rng.choice([1, 1, 2, 2, 3, 5, 10])
+                copies[book_id] = total_copies
+                if authors:
+                    count = self.rng.choices([1, 2, 3], weights=AUTHORS_PER_BOOK_WEIGHTS)[0]
+                    links['book_authors'].extend(
+                        {'book_id': book_id, 'author_id': author_id, 'created_at': self.now}
+                        for author_id in authors.sample_distinct(count)
+                    )
+                if genres:
+                    links['book_genres'].extend(
+                        {'book_id': book_id, 'genre_id': genre_id, 'created_at': self.now}
+                        for genre_id in genres.sample_distinct(self.rng.randint(1, 2))
+                    )
+                words = self.rng.sample(TITLE_WORDS, self.rng.randint(1, 3))
+                created_at = self.now - timedelta(days=self.rng.randint(0, 3650))
+                yield {
+                    'id': book_id,
+                    'title': ' '.join(words).capitalize() + f' ({book_id})',
+                    'description': f'Синтетическая книга {book_id}: ' + ', '.join(self.rng.sample(TITLE_WORDS, 5)),
+                    'publication_year': self.rng.randint(1800, self.now.year),
+                    'isbn': f'S{self.seed % 1000:03d}-{book_id:012d}',
+                    'total_copies': total_copies,
+                    'available_copies': total_copies,
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                }
+
+        def flush_links():
+            for name, table in (('book_authors', book_authors), ('book_genres', book_genres)):
+                if links[name]:
+                    db.session.execute(insert(table), links[name])
+                    stats[name] = stats.get(name, 0) + len(links[name])
+                    links[name] = []
+
+        inserted = 0
+        for chunk in _chunks(rows(), self.chunk_size):
+            db.session.execute(insert(Book.__table__), chunk)
+            flush_links()
+            db.session.commit()
+            inserted += len(chunk)
+            if progress:
+                progress('books', inserted)
+        self._sync_sequence(Book)
+        return range(first_id, first_id + inserted), copies
+
+    def _users(self):
+        # Хэш общего пароля вычисляется один раз
+        password_hash = get_password_hasher().hash('password123')
+        first_id = self._next_id(User)
+        for index in range(self.counts['users']):
+            joined = self.now - timedelta(days=self.rng.randint(0, 1500))
+            yield {
+                'email': f'user{first_id + index}.s{self.seed}@example.test',
+                'password_hash': password_hash,
+                'first_name': self.rng.choice(FIRST_NAMES),
+                'last_name': self.rng.choice(LAST_NAMES),
+                'role': 'reader',
+                'membership_status': self.rng.choices(['active', 'suspended'], weights=[97, 3])[0],
+                'join_date': joined.date(),
+                'created_at': joined,
+                'updated_at': joined,
+            }
+
+    def _insert_reservations(self, book_ids, user_ids, copies, progress):
+        """
+        История бронирований и активные бронирования
+
+        Активных бронирований не больше числа копий книги и не больше одного
+        на пару книга-пользователь; доступные копии книг пересчитываются.
+        """
+        if not book_ids or not user_ids:
+            return 0
+
+        books = ZipfSampler(book_ids, self.zipf_exponent, self.rng)
+        users = ZipfSampler(user_ids, self.zipf_exponent * 0.8, self.rng)
+        statuses = list(HISTORY_STATUS_WEIGHTS)
+        weights = list(HISTORY_STATUS_WEIGHTS.values())
+        active = {}
+        active_pairs = set()
+
+        def rows():
+            for _ in range(self.counts['reservations']):
+                book_id, user_id = books.sample(), users.sample()
+                reserved = self.now - timedelta(days=self.rng.randint(0, 730), seconds=self.rng.randint(0, 86400))
+                expiry = reserved + timedelta(days=14)
+                status = self.rng.choices(statuses, weights=weights)[0]
+                return_date = None
+
+                # Недавние бронирования остаются активными, если есть свободная копия
+                if (expiry > self.now and (book_id, user_id) not in active_pairs
+                        and active.get(book_id, 0) < copies[book_id]):
+                    status = 'active'
+                    active[book_id] = active.get(book_id, 0) + 1
+                    active_pairs.add((book_id, user_id))
+                elif expiry > self.now:
+                    status = 'cancelled'
+                elif status == 'completed':
+                    return_date = reserved + timedelta(days=self.rng.randint(1, 14))
+
+                yield {
+                    'book_id': book_id,
+                    'user_id': user_id,
+                    'reservation_date': reserved,
+                    'expiry_date': expiry,
+                    'status': status,
+                    'return_date': return_date,
+                    'created_at': reserved,
+                    'updated_at': return_date or reserved,
+                }
+
+        inserted = self._execute_chunks(BookReservation.__table__, rows(), 'reservations', progress)
+
+        # Доступные копии с учетом активных бронирований
+        if active:
+            statement = (
+                update(Book.__table__)
+                .where(Book.__table__.c.id == bindparam('book'))
+                .values(available_copies=bindparam('available'))
+            )
+            for chunk in _chunks(
+                ({'book': book_id, 'available': copies[book_id] - count} for book_id, count in active.items()),
+                self.chunk_size
+            ):
+                db.session.execute(statement, chunk)
+            db.session.commit()
+        return inserted
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
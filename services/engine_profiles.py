@@ -0,0 +1,252 @@
+import logging
+import random
+import threading
+import time
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError, DBAPIError
+from sqlalchemy.pool import QueuePool
+from models.base import db
+
+logger = logging.getLogger(__name__)
+
+# Коды SQLSTATE PostgreSQL, после которых транзакцию можно повторить:
+# serialization_failure, deadlock_detected, lock_not_available
+RETRYABLE_SQLSTATES = ('40001', '40P01', '55P03')
+
+# Повторы операций при блокировке базы: выполнено повторов и операций, не выполненных после всех попыток
+lock_retry_stats = {'retries': 0, 'failures': 0}
+_lock_retry_stats_lock = threading.Lock()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool со счетчиками ожидания свободного соединения
+
+    Время ожидания замеряется вокруг получения соединения из очереди пула,
+    поэтому показывает, сколько запросы ждут соединения при насыщении пула.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkout_stats = {'checkouts': 0, 'wait_seconds_total': 0.0, 'wait_seconds_max': 0.0, 'timeouts': 0}
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except Exception:
+            with self._stats_lock:
+                self.checkout_stats['timeouts'] += 1
+            raise
+        waited = time.perf_counter() - start
+        with self._stats_lock:
+            stats = self.checkout_stats
+            stats['checkouts'] += 1
+            stats['wait_seconds_total'] += waited
+            stats['wait_seconds_max'] = max(stats['wait_seconds_max'], waited)
+        return connection
+
+    def capacity(self):
+        """Максимум одновременно выданных соединений"""
+        return self.size() + max(self._max_overflow, 0)
+
+    def get_stats(self):
+        """Счетчики ожидания и текущая загрузка пула"""
+        with self._stats_lock:
+            stats = dict(self.checkout_stats)
+        stats['checked_out'] = self.checkedout()
+        stats['capacity'] = self.capacity()
+        stats['saturation'] = stats['checked_out'] / stats['capacity'] if stats['capacity'] else None
+        return stats
+
+
+def _is_memory_sqlite(url):
+    return url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:')
+
+
+def engine_options(url, config):
+    """
+    Параметры движка по профилю СУБД
+
+    SQLite: пул с замером ожидания; прагмы задаются при подключении
+    (apply_sqlite_pragmas). Серверные СУБД: размер пула, переполнение,
+    ожидание, пересоздание соединений и проверка соединения перед выдачей.
+
+    Args:
+        url (str): Адрес базы
+        config: Конфигурация приложения
+
+    Returns:
+        dict: Параметры create_engine, включая url
+    """
+    parsed = make_url(url)
+    options = {'url': url}
+    if parsed.get_backend_name() == 'sqlite':
+        # Для базы в памяти Flask-SQLAlchemy использует StaticPool
+        if not _is_memory_sqlite(parsed):
+            options['poolclass'] = InstrumentedQueuePool
+        return options
+
+    options.update(
+        poolclass=InstrumentedQueuePool,
+        pool_size=config.get('DB_POOL_SIZE', 10),
+        max_overflow=config.get('DB_MAX_OVERFLOW', 20),
+        pool_timeout=config.get('DB_POOL_TIMEOUT', 30),
+        pool_recycle=config.get('DB_POOL_RECYCLE', 1800),
+        pool_pre_ping=config.get('DB_POOL_PRE_PING', True),
+    )
+    return options
+
+
+def apply_engine_profiles(app):
+    """
+    Параметры движков основной базы и реплик до создания движков в db.init_app
+
+    Значения SQLALCHEMY_ENGINE_OPTIONS и параметры привязок, заданные словарем,
+    имеют приоритет над профилем.
+    """
+    config = app.config
+    profile = engine_options(config['SQLALCHEMY_DATABASE_URI'], config)
+    profile.pop('url')
+    config['SQLALCHEMY_ENGINE_OPTIONS'] = dict(profile, **config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+
+    binds = {}
+    for key, value in config.get('SQLALCHEMY_BINDS', {}).items():
+        if isinstance(value, dict):
+            binds[key] = dict(engine_options(value['url'], config), **value)
+        else:
+            binds[key] = engine_options(value, config)
+    config['SQLALCHEMY_BINDS'] = binds
+
+
+def sqlite_pragmas(config, read_only=False):
+    """Прагмы SQLite из конфигурации в порядке применения"""
+    pragmas = []
+    if not read_only:
+        # Режим журнала хранится в файле базы: на реплике только для чтения его не изменить
+        pragmas.append(('journal_mode', config.get('SQLITE_JOURNAL_MODE', 'WAL')))
+    pragmas += [
+        ('synchronous', config.get('SQLITE_SYNCHRONOUS', 'NORMAL')),
+        ('busy_timeout', config.get('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        ('mmap_size', config.get('SQLITE_MMAP_SIZE', 268435456)),
+        ('cache_size', config.get('SQLITE_CACHE_SIZE', -65536)),
+    ]
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine, config):
+    """Установка прагм SQLite на каждом новом соединении движка"""
+    if engine.url.get_backend_name() != 'sqlite' or _is_memory_sqlite(engine.url):
+        return
+    pragmas = sqlite_pragmas(config, read_only=engine.url.query.get('mode') == 'ro')
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas:
+                cursor.execute(f'PRAGMA {name}={value}')
+        finally:
+            cursor.close()
+
+
+def init_engine_profiles(app):
+    """Прагмы SQLite для движков, созданных db.init_app"""
+    with app.app_context():
+        for engine in db.engines.values():
+            apply_sqlite_pragmas(engine, app.config)
+        pools = ', '.join(f"{key or 'primary'}: {engine.pool.__class__.__name__}" for key, engine in db.engines.items())
+    app.logger.info(f"Database engines: {pools}")
+
+
+def is_lock_error(error):
+    """Ошибка блокировки, после которой операцию можно повторить"""
+    if isinstance(error, OperationalError) and 'locked' in str(error.orig).lower():
+        return True
+    if isinstance(error, DBAPIError):
+        return getattr(error.orig, 'pgcode', None) in RETRYABLE_SQLSTATES
+    return False
+
+
+def retry_on_lock(operation, attempts=None, backoff=None):
+    """
+    Выполнение операции записи с повтором при блокировке базы
+
+    SQLite возвращает «database is locked», если блокировку не удалось
+    получить за busy_timeout или транзакции чтения нельзя перейти к записи;
+    PostgreSQL - deadlock и serialization failure. Перед повтором
+    транзакция откатывается, пауза растет экспоненциально со случайной
+    добавкой.
+
+    Args:
+        operation (callable): Операция, сама фиксирующая транзакцию
+        attempts (int): Число повторов, по умолчанию DB_LOCK_RETRIES
+        backoff (float): Начальная пауза, секунды, по умолчанию DB_LOCK_RETRY_BACKOFF
+
+    Returns:
+        Результат operation()
+    """
+    if attempts is None:
+        attempts = current_app.config.get('DB_LOCK_RETRIES', 3)
+    if backoff is None:
+        backoff = current_app.config.get('DB_LOCK_RETRY_BACKOFF', 0.05)
+
+    for attempt in range(attempts + 1):
+        try:
+            return operation()
+        except DBAPIError as e:
+            db.session.rollback()
+            if not is_lock_error(e):
+                raise
+            if attempt == attempts:
+                with _lock_retry_stats_lock:
+                    lock_retry_stats['failures'] += 1
+                raise
+            with _lock_retry_stats_lock:
+                lock_retry_stats['retries'] += 1
+            logger.warning(f"Блокировка базы, повтор {attempt + 1} из {attempts}: {e.orig}")
+            time.sleep(backoff * (2 ** attempt) * (1 + random.random()))
+
+
+def engine_stats():
+    """Состояние пулов соединений по привязкам и счетчики повторов при блокировке"""
+    pools = {}
+    for key, engine in db.engines.items():
+        if isinstance(engine.pool, InstrumentedQueuePool):
+            pools[key or 'primary'] = engine.pool.get_stats()
+    with _lock_retry_stats_lock:
+        retries = dict(lock_retry_stats)
+    return {'pools': pools, 'lock_retries': retries}
+
+
+def render_engine_metrics():
+    """Метрики пулов соединений и повторов при блокировке в текстовом формате Prometheus"""
+    stats = engine_stats()
+    metrics = [
+        ('db_pool_checked_out', 'gauge', 'Выданные соединения пула', 'checked_out'),
+        ('db_pool_capacity', 'gauge', 'Максимум одновременно выданных соединений', 'capacity'),
+        ('db_pool_saturation', 'gauge', 'Доля выданных соединений от максимума', 'saturation'),
+        ('db_pool_checkouts_total', 'counter', 'Число выдач соединений', 'checkouts'),
+        ('db_pool_checkout_wait_seconds_total', 'counter', 'Суммарное ожидание соединения', 'wait_seconds_total'),
+        ('db_pool_checkout_wait_seconds_max', 'gauge', 'Наибольшее ожидание соединения', 'wait_seconds_max'),
+        ('db_pool_checkout_timeouts_total', 'counter', 'Ошибки получения соединения', 'timeouts'),
+    ]
+    lines = []
+    for name, metric_type, description, field in metrics:
+        lines += [f'# HELP {name} {description}', f'# TYPE {name} {metric_type}']
+        for bind, pool in sorted(stats['pools'].items()):
+            if pool[field] is not None:
+                lines.append(f'{name}{{bind="{bind}"}} {pool[field]}')
+
+    lines += [
+        '# HELP db_lock_retries_total Повторы операций записи после блокировки базы',
+        '# TYPE db_lock_retries_total counter',
+        f"db_lock_retries_total {stats['lock_retries']['retries']}",
+        '# HELP db_lock_failures_total Операции записи, не выполненные после всех повторов',
+        '# TYPE db_lock_failures_total counter',
+        f"db_lock_failures_total {stats['lock_retries']['failures']}",
+    ]
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,240 @@
+import csv
+import io
+import json
+from datetime import date, datetime, timezone
+from sqlalchemy import select
+from models.base import db
+from models.book import Book, book_authors, book_genres
+from models.author import Author
+from models.genre import Genre
+from models.user import User
+from models.reservation import BookReservation
+from services.book_import import CSV_LIST_SEPARATOR
+
+
+class InvalidSinceError(ValueError):
+    """Некорректное значение since"""
+
+
+def parse_since(value):
+    """
+    Разбор момента, начиная с которого экспортируются измененные строки
+
+    Args:
+        value (str): Дата или дата и время в ISO 8601 (UTC) или None
+
+    Returns:
+        datetime: Момент или None
+
+    Raises:
+        InvalidSinceError: Значение не является датой ISO 8601
+    """
+    if not value:
+        return None
+    try:
+        since = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise InvalidSinceError(f'Некорректное значение since: {value}')
+    # updated_at хранится в UTC без часового пояса
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+
+def _keyset_chunks(statement, id_column, since_column, since, chunk_size):
+    """
+    Строки запроса порциями по возрастанию id
+
+    Каждая порция - отдельный запрос WHERE id > последний id LIMIT chunk_size,
+    поэтому в памяти одновременно находится не больше одной порции, а
+    длинный курсор не удерживается между порциями.
+    """
+    if since is not None:
+        statement = statement.where(since_column >= since)
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            statement.where(id_column > last_id).order_by(id_column).limit(chunk_size)
+        ).mappings().all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]['id']
+
+
+def _names_by_book(statement, book_ids):
+    names = {}
+    for book_id, name in db.session.execute(statement.where(statement.selected_columns[0].in_(book_ids))):
+        names.setdefault(book_id, []).append(name)
+    return names
+
+
+BOOK_FIELDS = [
+    'id', 'title', 'description', 'publication_year', 'isbn', 'total_copies', 'available_copies',
+    'authors', 'genres', 'created_at', 'updated_at',
+]
+
+
+def export_books(since=None, chunk_size=1000):
+    """
+    Книги с именами авторов и названиями жанров
+
+    Авторы и жанры порции загружаются двумя запросами по id книг порции.
+    Формат строк совместим с импортом книг.
+
+    Yields:
+        dict: Книга
+    """
+    statement = select(
+        Book.id, Book.title, Book.description, Book.publication_year, Book.isbn,
+        Book.total_copies, Book.available_copies, Book.created_at, Book.updated_at
+    )
+    authors_statement = (
+        select(book_authors.c.book_id, (Author.first_name + ' ' + Author.last_name))
+        .join(Author, Author.id == book_authors.c.author_id)
+        .order_by(book_authors.c.book_id, Author.last_name, Author.first_name)
+    )
+    genres_statement = (
+        select(book_genres.c.book_id, Genre.name)
+        .join(Genre, Genre.id == book_genres.c.genre_id)
+        .order_by(book_genres.c.book_id, Genre.name)
+    )
+
+    for rows in _keyset_chunks(statement, Book.id, Book.updated_at, since, chunk_size):
+        book_ids = [row['id'] for row in rows]
+        authors = _names_by_book(authors_statement, book_ids)
+        genres = _names_by_book(genres_statement, book_ids)
+        for row in rows:
+            book = dict(row)
+            book['authors'] = [name.strip() for name in authors.get(row['id'], [])]
+            book['genres'] = genres.get(row['id'], [])
+            yield book
+
+
+# Хэш пароля не экспортируется
+USER_FIELDS = [
+    'id', 'email', 'first_name', 'last_name', 'role', 'membership_status', 'join_date', 'created_at', 'updated_at',
+]
+
+
+def export_users(since=None, chunk_size=1000):
+    """
+    Пользователи без хэшей паролей
+
+    Yields:
+        dict: Пользователь
+    """
+    statement = select(*(getattr(User, field) for field in USER_FIELDS))
+    for rows in _keyset_chunks(statement, User.id, User.updated_at, since, chunk_size):
+        for row in rows:
+            yield dict(row)
+
+
+RESERVATION_FIELDS = [
+    'id', 'book_id', 'book_title', 'user_id', 'user_email', 'status', 'reservation_date', 'expiry_date',
+    'return_date', 'created_at', 'updated_at',
+]
+
+
+def export_reservations(since=None, chunk_size=1000):
+    """
+    История бронирований с названием книги и email пользователя
+
+    Yields:
+        dict: Бронирование
+    """
+    statement = (
+        select(
+            BookReservation.id, BookReservation.book_id, Book.title.label('book_title'),
+            BookReservation.user_id, User.email.label('user_email'), BookReservation.status,
+            BookReservation.reservation_date, BookReservation.expiry_date, BookReservation.return_date,
+            BookReservation.created_at, BookReservation.updated_at
+        )
+        .join(Book, Book.id == BookReservation.book_id)
+        .join(User, User.id == BookReservation.user_id)
+    )
+    for rows in _keyset_chunks(statement, BookReservation.id, BookReservation.updated_at, since, chunk_size):
+        for row in rows:
+            yield dict(row)
+
+
+# Экспортируемые наборы: имя -> (функция, поля CSV)
+EXPORTS = {
+    'books': (export_books, BOOK_FIELDS),
+    'users': (export_users, USER_FIELDS),
+    'reservations': (export_reservations, RESERVATION_FIELDS),
+}
+
+CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} не сериализуется в JSON')
+
+
+def to_ndjson(rows):
+    """Строки NDJSON по одной на запись"""
+    for row in rows:
+        yield json.dumps(row, ensure_ascii=False, default=_json_default) + '\n'
+
+
+def to_csv(rows, fields):
+    """Строки CSV с заголовком; списки объединяются через ';', как при импорте"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fields, extrasaction='ignore')
+
+    def flush():
+        value = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return value
+
+    writer.writeheader()
+    yield flush()
+    for row in rows:
+        writer.writerow({
+            key: CSV_LIST_SEPARATOR.join(value) if isinstance(value, list)
+            else value.isoformat() if isinstance(value, (date, datetime)) else value
+            for key, value in row.items()
+        })
+        yield flush()
+
+
+def _buffered(parts, limit=65536):
+    """Объединение мелких фрагментов вывода в блоки около limit символов"""
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= limit:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def export_lines(name, export_format='ndjson', since=None, chunk_size=1000):
+    """
+    Строки экспорта набора в заданном формате
+
+    Args:
+        name (str): 'books', 'users' или 'reservations'
+        export_format (str): 'ndjson' или 'csv'
+        since (datetime): Только строки, измененные начиная с этого момента
+        chunk_size (int): Строк в одной порции запроса
+
+    Yields:
+        str: Фрагменты вывода
+    """
+    export, fields = EXPORTS[name]
+    rows = export(since=since, chunk_size=chunk_size)
+    if export_format == 'csv':
+        return _buffered(to_csv(rows, fields))
+    return _buffered(to_ndjson(rows))
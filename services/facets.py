@@ -0,0 +1,222 @@
+from sqlalchemy import case, func, select
+from models.base import db
+from models.book import Book, book_authors, book_genres
+from models.genre import Genre
+from services.fragment_cache import FragmentCache
+from services.invalidation import on_tables_changed
+
+# Таблицы, от которых зависят фильтры и счетчики фасетов
+FACET_TABLES = ('books', 'genres', 'book_authors', 'book_genres', 'book_reservations')
+
+BOOK_STATUSES = ('available', 'reserved')
+
+
+class InvalidFilterError(ValueError):
+    """Некорректное значение фильтра книг"""
+
+
+def _int_values(args, name):
+    try:
+        return sorted({int(value) for value in args.getlist(name) if value != ''})
+    except ValueError:
+        raise InvalidFilterError(f'{name} должен быть целым числом')
+
+
+def parse_book_filters(args):
+    """
+    Фильтры каталога из параметров запроса
+
+    Повторяющиеся genre_id, genre и author_id объединяются через ИЛИ,
+    разные фильтры - через И.
+
+    Args:
+        args: request.args с параметрами genre_id, genre (название), author_id,
+            year_from, year_to, status ('available' или 'reserved') и isbn
+
+    Returns:
+        dict: Заданные фильтры, значения приведены к нормальной форме
+
+    Raises:
+        InvalidFilterError: Значение фильтра некорректно
+    """
+    filters = {}
+    for name in ('genre_id', 'author_id'):
+        values = _int_values(args, name)
+        if values:
+            filters[name] = values
+
+    genres = sorted({value.strip() for value in args.getlist('genre') if value.strip()})
+    if genres:
+        filters['genre'] = genres
+
+    for name in ('year_from', 'year_to'):
+        values = _int_values(args, name)
+        if len(values) > 1:
+            raise InvalidFilterError(f'{name} задается один раз')
+        if values:
+            filters[name] = values[0]
+    if 'year_from' in filters and 'year_to' in filters and filters['year_from'] > filters['year_to']:
+        raise InvalidFilterError('year_from больше year_to')
+
+    status = args.get('status')
+    if status:
+        if status not in BOOK_STATUSES:
+            raise InvalidFilterError(f'Неизвестный статус: {status}')
+        filters['status'] = status
+
+    isbn = (args.get('isbn') or '').strip()
+    if isbn:
+        filters['isbn'] = isbn
+    return filters
+
+
+def book_criteria(filters, exclude=()):
+    """
+    Условия SQL для фильтров каталога
+
+    Args:
+        filters (dict): Результат parse_book_filters
+        exclude (tuple): Фильтры, которые не учитываются (для счетчиков фасета по тому же полю)
+
+    Returns:
+        list: Условия для where/filter по модели Book
+    """
+    criteria = []
+    if 'genre_id' in filters and 'genre' not in exclude:
+        criteria.append(Book.id.in_(
+            select(book_genres.c.book_id).where(book_genres.c.genre_id.in_(filters['genre_id']))
+        ))
+    if 'genre' in filters and 'genre' not in exclude:
+        criteria.append(Book.id.in_(
+            select(book_genres.c.book_id)
+            .join(Genre, Genre.id == book_genres.c.genre_id)
+            .where(Genre.name.in_(filters['genre']))
+        ))
+    if 'author_id' in filters:
+        criteria.append(Book.id.in_(
+            select(book_authors.c.book_id).where(book_authors.c.author_id.in_(filters['author_id']))
+        ))
+    if 'year_from' in filters and 'year' not in exclude:
+        criteria.append(Book.publication_year >= filters['year_from'])
+    if 'year_to' in filters and 'year' not in exclude:
+        criteria.append(Book.publication_year <= filters['year_to'])
+    if 'status' in filters and 'status' not in exclude:
+        criteria.append(Book.status == filters['status'])
+    if 'isbn' in filters:
+        criteria.append(Book.isbn == filters['isbn'])
+    return criteria
+
+
+def _genre_counts(filters):
+    # Сначала отбираются книги, затем группируются их связи с жанрами: обход связей
+    # с поиском книги по каждой из них намного дороже на больших каталогах
+    criteria = book_criteria(filters, exclude=('genre',))
+    links = select(
+        book_genres.c.genre_id, func.count(func.distinct(book_genres.c.book_id)).label('count')
+    )
+    if criteria:
+        links = links.where(book_genres.c.book_id.in_(select(Book.id).where(*criteria)))
+    links = links.group_by(book_genres.c.genre_id).subquery()
+
+    rows = db.session.execute(
+        select(Genre.id, Genre.name, links.c.count)
+        .join(links, links.c.genre_id == Genre.id)
+        .order_by(links.c.count.desc(), Genre.name)
+    )
+    return [{'id': genre_id, 'name': name, 'count': total} for genre_id, name, total in rows]
+
+
+def _decade_counts(filters):
+    decade = (Book.publication_year // 10 * 10).label('decade')
+    rows = db.session.execute(
+        select(decade, func.count(Book.id))
+        .where(Book.publication_year.isnot(None), *book_criteria(filters, exclude=('year',)))
+        .group_by(decade)
+        .order_by(decade)
+    )
+    return [{'decade': value, 'count': total} for value, total in rows]
+
+
+def _status_counts(filters):
+    total, available = db.session.execute(
+        select(func.count(Book.id), func.coalesce(func.sum(case((Book.status == 'available', 1), else_=0)), 0))
+        .where(*book_criteria(filters, exclude=('status',)))
+    ).one()
+    return {'available': available, 'reserved': total - available}
+
+
+def compute_book_facets(filters):
+    """
+    Счетчики книг по жанрам, десятилетиям издания и доступности
+
+    Каждый фасет считается одним запросом с группировкой и учитывает все
+    фильтры, кроме фильтра по собственному полю: так видно, сколько книг
+    появится при выборе другого значения.
+
+    Args:
+        filters (dict): Результат parse_book_filters
+
+    Returns:
+        dict: Фасеты genres, decades и status
+    """
+    return {
+        'genres': _genre_counts(filters),
+        'decades': _decade_counts(filters),
+        'status': _status_counts(filters),
+    }
+
+
+def count_filtered_books(filters):
+    """Число книг, удовлетворяющих фильтрам"""
+    return db.session.execute(select(func.count(Book.id)).where(*book_criteria(filters))).scalar()
+
+
+def _cache_key(kind, filters):
+    return (kind,) + tuple(
+        (name, tuple(value) if isinstance(value, list) else value) for name, value in sorted(filters.items())
+    )
+
+
+def get_book_facets(filters):
+    """Фасеты из кэша или вычисленные запросами"""
+    if facet_cache is None:
+        return compute_book_facets(filters)
+    return facet_cache.get_or_render(_cache_key('facets', filters), lambda: compute_book_facets(filters))
+
+
+def get_filtered_total(filters):
+    """Число книг по фильтрам из кэша или запросом"""
+    if facet_cache is None:
+        return count_filtered_books(filters)
+    return facet_cache.get_or_render(_cache_key('total', filters), lambda: count_filtered_books(filters))
+
+
+# Создаем экземпляр сервиса
+facet_cache = None
+
+
+def init_facet_cache(app):
+    """Инициализация кэша фасетов и счетчиков отфильтрованных книг"""
+    global facet_cache
+    if not app.config.get('FACET_CACHE_ENABLED', True):
+        facet_cache = None
+        app.logger.info("Facet cache disabled")
+        return
+
+    facet_cache = FragmentCache(
+        max_entries=app.config.get('FACET_CACHE_MAX_ENTRIES', 1000),
+        ttl=app.config.get('FACET_CACHE_TTL', 60)
+    )
+    app.logger.info("Facet cache initialized")
+
+
+def get_facet_cache():
+    """Получение экземпляра кэша фасетов"""
+    return facet_cache
+
+
+@on_tables_changed(*FACET_TABLES)
+def invalidate_facets(tables=None):
+    """Сброс кэша фасетов при изменении каталога"""
+    if facet_cache is not None:
+        facet_cache.invalidate()
@@ -0,0 +1,117 @@
+import logging
+import threading
+import time
+from models.base import db
+from models.session import primary_reads
+from services.cache import MemoryCacheBackend
+from services.invalidation import on_tables_changed
+
+logger = logging.getLogger(__name__)
+
+# Таблицы, от которых зависят фрагменты каталога: книги, авторы, жанры и наличие копий
+FRAGMENT_TABLES = ('books', 'authors', 'genres', 'book_authors', 'book_genres', 'book_reservations')
+
+
+class FragmentCache:
+    """
+    Кэш отрисованных фрагментов страниц, общих для всех анонимных посетителей
+
+    Все записи сбрасываются при зафиксированной записи в таблицы каталога
+    в этом процессе (включая правки через админку), а TTL ограничивает
+    расхождение между воркерами. Фрагмент, отрисовка которого началась
+    до сброса, не сохраняется. Промахи отрисовываются по основной базе,
+    чтобы не сохранить в кэш отстающие данные реплики.
+
+    Args:
+        max_entries (int): Максимальное число фрагментов
+        ttl (int): Время жизни фрагмента, секунды
+    """
+
+    def __init__(self, max_entries=500, ttl=60):
+        self.ttl = ttl
+        self.backend = MemoryCacheBackend(max_entries=max_entries)
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0, 'render_seconds_total': 0.0}
+
+    def get_or_render(self, key, render):
+        """
+        Фрагмент из кэша или результат render()
+
+        Args:
+            key (tuple): Ключ фрагмента
+            render (callable): Отрисовка фрагмента, выполняется при промахе
+
+        Returns:
+            Результат render()
+        """
+        now = time.monotonic()
+        entry = self.backend.get(key)
+        if entry is not None and entry[1] > now:
+            with self._lock:
+                self.stats['hits'] += 1
+            return entry[0]
+
+        with self._lock:
+            self.stats['misses'] += 1
+            generation = self._generation
+
+        start = time.perf_counter()
+        with primary_reads(db.session):
+            value = render()
+        elapsed = time.perf_counter() - start
+
+        with self._lock:
+            self.stats['render_seconds_total'] += elapsed
+            if generation == self._generation:
+                expires_at = time.monotonic() + self.ttl
+                self.backend.set(key, value, expires_at, expires_at)
+        return value
+
+    def invalidate(self):
+        """Сброс всех фрагментов"""
+        with self._lock:
+            self._generation += 1
+            self.stats['invalidations'] += 1
+            self.backend.clear()
+
+    def get_stats(self):
+        """Счетчики попаданий, промахов и сбросов"""
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else None
+        stats['size'] = self.backend.size()
+        stats['ttl'] = self.ttl
+        return stats
+
+
+# Создаем экземпляр сервиса
+fragment_cache = None
+
+
+def init_fragment_cache(app):
+    """Инициализация кэша фрагментов страниц"""
+    global fragment_cache
+    if not app.config.get('FRAGMENT_CACHE_ENABLED', True):
+        fragment_cache = None
+        app.logger.info("Fragment cache disabled")
+        return
+
+    fragment_cache = FragmentCache(
+        max_entries=app.config.get('FRAGMENT_CACHE_MAX_ENTRIES', 500),
+        ttl=app.config.get('FRAGMENT_CACHE_TTL', 60)
+    )
+    app.logger.info("Fragment cache initialized")
+
+
+def get_fragment_cache():
+    """Получение экземпляра кэша фрагментов"""
+    return fragment_cache
+
+
+@on_tables_changed(*FRAGMENT_TABLES)
+def invalidate_fragments(tables=None):
+    """Сброс кэша фрагментов при изменении каталога"""
+    if fragment_cache is not None:
+        fragment_cache.invalidate()
@@ -0,0 +1,112 @@
+import hashlib
+from datetime import timezone
+from functools import wraps
+from flask import current_app, request, make_response
+from sqlalchemy import func, select
+from models.base import db
+
+
+def table_state(model, *criteria):
+    """
+    Состояние набора строк модели: время последнего изменения и число строк
+
+    Args:
+        model: Модель с полями id и updated_at
+        criteria: Условия отбора строк
+
+    Returns:
+        list: Скалярные подзапросы (max(updated_at), count(id))
+    """
+    return [
+        select(func.max(model.updated_at)).where(*criteria).scalar_subquery(),
+        select(func.count(model.id)).where(*criteria).scalar_subquery(),
+    ]
+
+
+def compute_validators(states):
+    """
+    ETag и Last-Modified по состояниям таблиц одним запросом, без сериализации ответа
+
+    ETag учитывает также путь и параметры запроса: разные страницы одной
+    коллекции имеют разные представления.
+
+    Args:
+        states (list): Результаты table_state, при нескольких таблицах - сложенные списки
+
+    Returns:
+        tuple: (ETag без кавычек, Last-Modified как datetime в UTC или None)
+    """
+    row = db.session.execute(select(*states)).one()
+
+    digest = hashlib.sha1()
+    digest.update(request.path.encode())
+    digest.update(repr(sorted(request.args.items(multi=True))).encode())
+    digest.update(repr(tuple(row)).encode())
+
+    # Каждое состояние - пара (max(updated_at), count)
+    timestamps = [value for value in row[::2] if value is not None]
+    last_modified = max(timestamps).replace(tzinfo=timezone.utc, microsecond=0) if timestamps else None
+    return digest.hexdigest(), last_modified
+
+
+def _is_not_modified(etag, last_modified):
+    # If-None-Match имеет приоритет над If-Modified-Since (RFC 7232, 6)
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since and last_modified is not None:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional(get_states):
+    """
+    Декоратор условных GET запросов
+
+    Валидаторы вычисляются до выполнения представления: если данные изменятся
+    между ними, клиент получит новый ответ со старым ETag и при следующем
+    запросе просто загрузит его повторно, но устаревший ответ с новым ETag
+    невозможен.
+
+    Args:
+        get_states (callable): Принимает аргументы представления и возвращает
+            список table_state, от которых зависит ответ
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(*args, **kwargs)
+
+            etag, last_modified = compute_validators(get_states(*args, **kwargs))
+            if _is_not_modified(etag, last_modified):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            return response
+        return wrapper
+    return decorator
+
+
+def apply_cache_control(response):
+    """Заголовок Cache-Control по настройкам блюпринта для GET ответов"""
+    if request.method not in ('GET', 'HEAD') or response.status_code not in (200, 304):
+        return response
+    if 'Cache-Control' in response.headers:
+        return response
+
+    policy = current_app.config.get('CACHE_CONTROL', {}).get(request.blueprint)
+    if policy:
+        response.headers['Cache-Control'] = policy
+    return response
+
+
+def init_http_cache(app):
+    """Подключение политик Cache-Control для блюпринтов"""
+    app.after_request(apply_cache_control)
+    app.logger.info(f"HTTP cache policies: {', '.join(sorted(app.config.get('CACHE_CONTROL', {})))}")
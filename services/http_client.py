@@ -0,0 +1,205 @@
+import logging
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# Методы, которые безопасно повторять после сетевой ошибки
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+# Коды ответа, после которых идемпотентный запрос повторяется
+RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
+
+class RetryPolicyMixin:
+    """
+    Политика повторов и счетчики по хостам, общие для синхронного и асинхронного клиентов
+
+    Клиент вызывает _init_retry_policy в конструкторе, учитывает каждую
+    попытку через _record и перед повтором ждет _retry_delay секунд.
+    """
+
+    def _init_retry_policy(self, max_retries, backoff_base, backoff_max):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._stats_lock = threading.Lock()
+        self._host_stats = {}
+
+    def _attempts(self, method, retry):
+        """Число попыток; по умолчанию повторяются только идемпотентные методы"""
+        if retry is None:
+            retry = method in IDEMPOTENT_METHODS
+        return 1 + (self.max_retries if retry else 0)
+
+    def _retry_delay(self, host, attempt):
+        """Задержка перед повтором (full jitter); повтор учитывается в счетчиках хоста"""
+        with self._stats_lock:
+            self._host(host)['retries'] += 1
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def _host(self, host):
+        stats = self._host_stats.get(host)
+        if stats is None:
+            stats = self._host_stats[host] = {
+                'requests': 0,
+                'errors': 0,
+                'retries': 0,
+                'request_seconds_total': 0.0,
+            }
+        return stats
+
+    def _record(self, host, elapsed, error=False):
+        with self._stats_lock:
+            stats = self._host(host)
+            stats['requests'] += 1
+            stats['request_seconds_total'] += elapsed
+            if error:
+                stats['errors'] += 1
+
+    def _hosts_snapshot(self):
+        with self._stats_lock:
+            return {host: dict(stats) for host, stats in self._host_stats.items()}
+
+
+class HttpClient(RetryPolicyMixin):
+    """
+    Общий клиент исходящих HTTP запросов с пулом keep-alive соединений
+
+    Соединения с одним хостом переиспользуются между запросами и потоками.
+    Идемпотентные запросы повторяются с экспоненциальной задержкой и
+    случайным разбросом (full jitter).
+
+    Args:
+        pool_connections (int): Число хостов, для которых хранятся пулы
+        pool_maxsize (int): Максимум соединений в пуле одного хоста
+        connect_timeout (float): Таймаут установки соединения, секунды
+        read_timeout (float): Таймаут чтения ответа, секунды
+        max_retries (int): Число повторов идемпотентных запросов
+        backoff_base (float): Базовая задержка перед повтором, секунды
+        backoff_max (float): Максимальная задержка перед повтором, секунды
+    """
+
+    def __init__(self, pool_connections=10, pool_maxsize=20, connect_timeout=3.05,
+                 read_timeout=15, max_retries=2, backoff_base=0.2, backoff_max=2.0):
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._init_retry_policy(max_retries, backoff_base, backoff_max)
+
+        self.adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=0
+        )
+        self.session = requests.Session()
+        self.session.mount('http://', self.adapter)
+        self.session.mount('https://', self.adapter)
+
+    def request(self, method, url, timeout=None, retry=None, **kwargs):
+        """
+        Выполнение запроса через общий пул соединений
+
+        Args:
+            method (str): HTTP метод
+            url (str): Адрес
+            timeout: Кортеж (connect, read) или число; по умолчанию из настроек клиента
+            retry (bool): Повторять ли запрос; по умолчанию только для идемпотентных методов
+
+        Returns:
+            requests.Response: Ответ
+
+        Raises:
+            requests.exceptions.RequestException: Ошибка после всех попыток
+        """
+        method = method.upper()
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        attempts = self._attempts(method, retry)
+        host = urlsplit(url).netloc
+
+        for attempt in range(attempts):
+            is_last = attempt == attempts - 1
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record(host, time.perf_counter() - start, error=True)
+                if is_last:
+                    raise
+                logger.warning(f"Повтор {method} {host} после ошибки: {str(e)}")
+                time.sleep(self._retry_delay(host, attempt))
+                continue
+
+            self._record(host, time.perf_counter() - start)
+            if response.status_code in RETRY_STATUS_CODES and not is_last:
+                logger.warning(f"Повтор {method} {host} после ответа {response.status_code}")
+                response.close()
+                time.sleep(self._retry_delay(host, attempt))
+                continue
+            return response
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def get_stats(self):
+        """
+        Метрики по хостам: запросы, открытые соединения и доля переиспользования
+
+        Число открытых соединений берется из пулов urllib3, поэтому
+        connection_reuse_ratio показывает, какая часть запросов обошлась
+        без нового TCP/TLS рукопожатия.
+        """
+        connections = {}
+        for pool_key in list(self.adapter.poolmanager.pools.keys()):
+            pool = self.adapter.poolmanager.pools.get(pool_key)
+            if pool is None:
+                continue
+            host = pool.host if pool.port in (None, 80, 443) else f'{pool.host}:{pool.port}'
+            entry = connections.setdefault(host, {'connections_opened': 0, 'pool_requests': 0})
+            entry['connections_opened'] += pool.num_connections
+            entry['pool_requests'] += pool.num_requests
+
+        hosts = self._hosts_snapshot()
+
+        for host, stats in hosts.items():
+            pool_stats = connections.get(host, {'connections_opened': 0, 'pool_requests': 0})
+            stats.update(pool_stats)
+            stats['connection_reuse_ratio'] = (
+                1 - pool_stats['connections_opened'] / pool_stats['pool_requests']
+                if pool_stats['pool_requests'] else None
+            )
+        return hosts
+
+
+# Создаем экземпляр клиента
+http_client = None
+
+
+def init_http_client(app):
+    """Инициализация общего HTTP клиента"""
+    global http_client
+    http_client = HttpClient(
+        pool_connections=app.config.get('HTTP_POOL_CONNECTIONS', 10),
+        pool_maxsize=app.config.get('HTTP_POOL_MAXSIZE', 20),
+        connect_timeout=app.config.get('HTTP_CONNECT_TIMEOUT', 3.05),
+        read_timeout=app.config.get('HTTP_READ_TIMEOUT', 15),
+        max_retries=app.config.get('HTTP_MAX_RETRIES', 2),
+        backoff_base=app.config.get('HTTP_BACKOFF_BASE', 0.2),
+        backoff_max=app.config.get('HTTP_BACKOFF_MAX', 2.0)
+    )
+    app.logger.info("HTTP client initialized")
+
+
+def get_http_client():
+    """Получение экземпляра HTTP клиента, при необходимости с настройками по умолчанию"""
+    global http_client
+    if http_client is None:
+        http_client = HttpClient()
+    return http_client
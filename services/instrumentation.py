@@ -0,0 +1,282 @@
+import bisect
+import json
+import logging
+import re
+import threading
+import time
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from models.base import db
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger('services.instrumentation.slow_queries')
+
+# Границы корзин гистограммы длительности запросов, секунды
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Длина текста SQL запроса в логах
+STATEMENT_LOG_LENGTH = 500
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def compact_statement(statement, limit=STATEMENT_LOG_LENGTH):
+    """Текст SQL запроса в одну строку, не длиннее limit символов"""
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    return statement if len(statement) <= limit else statement[:limit] + '...'
+
+
+def redact_parameters(parameters):
+    """
+    Параметры SQL запроса без значений: остаются только типы
+
+    В параметрах бывают email, хэши паролей и тексты пользователей,
+    поэтому по умолчанию в лог попадает только их форма.
+
+    Args:
+        parameters: Параметры DBAPI - кортеж, словарь или список для executemany
+
+    Returns:
+        Структура той же формы с именами типов вместо значений
+    """
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (list, tuple, dict)):
+            # executemany: форма первой строки и число строк
+            return {'rows': len(parameters), 'first': redact_parameters(parameters[0])}
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class RequestStats:
+    """SQL запросы одного HTTP запроса: число, суммарное время и самый медленный запрос"""
+
+    __slots__ = ('queries', 'seconds', 'slowest_seconds', 'slowest_statement')
+
+    def __init__(self):
+        self.queries = 0
+        self.seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+
+    def add(self, statement, seconds):
+        self.queries += 1
+        self.seconds += seconds
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+
+def _escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """
+    Метрики HTTP запросов процесса для /metrics в текстовом формате Prometheus
+
+    Гистограмма длительности по эндпоинту и методу, число ответов по
+    статусу, число SQL запросов и их суммарное время. Значения собираются
+    в памяти процесса: при нескольких воркерах каждый отдает свои.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._responses = {}
+        self._db_queries = {}
+        self._db_seconds = {}
+        self.slow_queries = 0
+
+    def observe(self, endpoint, method, status, seconds, stats):
+        """Учет завершенного HTTP запроса"""
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            histogram = self._histograms.get((endpoint, method))
+            if histogram is None:
+                # Счетчики корзин без накопления, последняя - +Inf; затем сумма
+                histogram = self._histograms[(endpoint, method)] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[index] += 1
+            histogram[-1] += seconds
+            key = (endpoint, method, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+            self._db_queries[endpoint] = self._db_queries.get(endpoint, 0) + stats.queries
+            self._db_seconds[endpoint] = self._db_seconds.get(endpoint, 0.0) + stats.seconds
+
+    def slow_query(self):
+        with self._lock:
+            self.slow_queries += 1
+
+    def render(self):
+        """Метрики в текстовом формате Prometheus 0.0.4"""
+        with self._lock:
+            histograms = {key: list(values) for key, values in self._histograms.items()}
+            responses = dict(self._responses)
+            db_queries = dict(self._db_queries)
+            db_seconds = dict(self._db_seconds)
+            slow_queries = self.slow_queries
+
+        lines = [
+            '# HELP http_request_duration_seconds Длительность обработки HTTP запроса',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for (endpoint, method), values in sorted(histograms.items()):
+            labels = f'endpoint="{_escape_label(endpoint)}",method="{method}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), values):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_sum{{{labels}}} {values[-1]}')
+            lines.append(f'http_request_duration_seconds_count{{{labels}}} {cumulative}')
+
+        lines += [
+            '# HELP http_responses_total Число HTTP ответов',
+            '# TYPE http_responses_total counter',
+        ]
+        for (endpoint, method, status), count in sorted(responses.items()):
+            lines.append(
+                f'http_responses_total{{endpoint="{_escape_label(endpoint)}",method="{method}",status="{status}"}} {count}'
+            )
+
+        lines += [
+            '# HELP db_queries_total Число SQL запросов при обработке HTTP запросов',
+            '# TYPE db_queries_total counter',
+        ]
+        for endpoint, count in sorted(db_queries.items()):
+            lines.append(f'db_queries_total{{endpoint="{_escape_label(endpoint)}"}} {count}')
+
+        lines += [
+            '# HELP db_query_duration_seconds_total Суммарное время SQL запросов при обработке HTTP запросов',
+            '# TYPE db_query_duration_seconds_total counter',
+        ]
+        for endpoint, seconds in sorted(db_seconds.items()):
+            lines.append(f'db_query_duration_seconds_total{{endpoint="{_escape_label(endpoint)}"}} {seconds}')
+
+        lines += [
+            '# HELP db_slow_queries_total Число SQL запросов дольше порога медленного запроса',
+            '# TYPE db_slow_queries_total counter',
+            f'db_slow_queries_total {slow_queries}',
+        ]
+        return '\n'.join(lines) + '\n'
+
+
+class Instrumentation:
+    """
+    Инструментирование запросов: SQL статистика, Server-Timing, лог запросов и метрики
+
+    Обработчики событий движка SQLAlchemy замеряют каждый SQL запрос и
+    складывают результат в статистику текущего HTTP запроса (flask.g).
+    По завершении HTTP запроса статистика попадает в заголовок
+    Server-Timing, структурированную строку лога и метрики. На один SQL
+    запрос приходится два вызова perf_counter и несколько операций с
+    атрибутами, поэтому инструментирование можно оставлять включенным.
+
+    Args:
+        slow_query_seconds (float): Порог медленного SQL запроса, 0 - не логировать
+        log_parameters (bool): Логировать значения параметров медленных запросов, а не только их типы
+        server_timing (bool): Добавлять заголовок Server-Timing
+        request_log (bool): Писать строку лога на каждый HTTP запрос
+    """
+
+    def __init__(self, slow_query_seconds=0.25, log_parameters=False, server_timing=True, request_log=True):
+        self.slow_query_seconds = slow_query_seconds
+        self.log_parameters = log_parameters
+        self.server_timing = server_timing
+        self.request_log = request_log
+        self.metrics = Metrics()
+        self._engines = set()
+
+    def instrument_engine(self, engine):
+        """Подключение обработчиков событий к движку (повторный вызов для того же движка ничего не делает)"""
+        if engine in self._engines:
+            return
+        self._engines.add(engine)
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._instrumentation_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        seconds = time.perf_counter() - context._instrumentation_started
+        stats = g.get('sql_stats') if has_app_context() else None
+        if stats is not None:
+            stats.add(statement, seconds)
+        if self.slow_query_seconds and seconds >= self.slow_query_seconds:
+            self.metrics.slow_query()
+            slow_query_logger.warning(json.dumps({
+                'event': 'slow_query',
+                'duration_ms': round(seconds * 1000, 2),
+                'statement': compact_statement(statement),
+                'parameters': parameters if self.log_parameters else redact_parameters(parameters),
+                'executemany': executemany,
+            }, ensure_ascii=False, default=str))
+
+    def before_request(self):
+        g.sql_stats = RequestStats()
+        g.request_started = time.perf_counter()
+
+    def after_request(self, response):
+        stats = g.get('sql_stats')
+        if stats is None:
+            return response
+        seconds = time.perf_counter() - g.request_started
+        endpoint = request.endpoint or 'unmatched'
+        self.metrics.observe(endpoint, request.method, response.status_code, seconds, stats)
+
+        if self.server_timing:
+            timings = [
+                f'db;dur={stats.seconds * 1000:.2f};desc="{stats.queries} queries"',
+                f'app;dur={seconds * 1000:.2f}',
+            ]
+            if stats.queries:
+                timings.insert(1, f'db-slowest;dur={stats.slowest_seconds * 1000:.2f}')
+            response.headers.add('Server-Timing', ', '.join(timings))
+
+        if self.request_log and logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({
+                'event': 'request',
+                'method': request.method,
+                'path': request.path,
+                'endpoint': endpoint,
+                'status': response.status_code,
+                'duration_ms': round(seconds * 1000, 2),
+                'db_queries': stats.queries,
+                'db_ms': round(stats.seconds * 1000, 2),
+                'db_slowest_ms': round(stats.slowest_seconds * 1000, 2),
+                'db_slowest': compact_statement(stats.slowest_statement, 200) if stats.slowest_statement else None,
+            }, ensure_ascii=False))
+        return response
+
+
+# Создаем экземпляр сервиса
+instrumentation = None
+
+
+def init_instrumentation(app):
+    """Инициализация инструментирования запросов"""
+    global instrumentation
+    if not app.config.get('INSTRUMENTATION_ENABLED', True):
+        instrumentation = None
+        app.logger.info("Request instrumentation disabled")
+        return
+
+    instrumentation = Instrumentation(
+        slow_query_seconds=app.config.get('SLOW_QUERY_SECONDS', 0.25),
+        log_parameters=app.config.get('SLOW_QUERY_LOG_PARAMETERS', False),
+        server_timing=app.config.get('SERVER_TIMING_ENABLED', True),
+        request_log=app.config.get('REQUEST_LOG_ENABLED', True)
+    )
+    with app.app_context():
+        for engine in db.engines.values():
+            instrumentation.instrument_engine(engine)
+    app.before_request(instrumentation.before_request)
+    app.after_request(instrumentation.after_request)
+    app.logger.info("Request instrumentation initialized")
+
+
+def get_instrumentation():
+    """Получение экземпляра инструментирования запросов"""
+    return instrumentation
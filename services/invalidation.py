@@ -0,0 +1,88 @@
+import logging
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Подписчики на изменения таблиц: имя таблицы -> список функций
+_subscribers = {}
+_listeners_registered = False
+
+
+def on_tables_changed(*tablenames):
+    """
+    Декоратор подписки на зафиксированные изменения таблиц
+
+    Функция вызывается после commit с множеством измененных таблиц,
+    если среди них есть хотя бы одна из указанных.
+    """
+    def decorator(callback):
+        for tablename in tablenames:
+            _subscribers.setdefault(tablename, []).append(callback)
+        _register_listeners()
+        return callback
+    return decorator
+
+
+def notify_tables_changed(tablenames):
+    """
+    Оповещение подписчиков об изменении таблиц
+
+    Используется напрямую для массовых операций через Core, которые
+    не проходят через flush сессии.
+    """
+    tablenames = set(tablenames)
+    callbacks = []
+    for tablename in tablenames:
+        for callback in _subscribers.get(tablename, []):
+            if callback not in callbacks:
+                callbacks.append(callback)
+
+    for callback in callbacks:
+        try:
+            callback(tablenames)
+        except Exception as e:
+            logger.error(f"Ошибка обработчика инвалидации {callback.__name__}: {str(e)}")
+
+
+def mark_tables_changed(session, *tablenames):
+    """
+    Пометка таблиц, измененных в текущей транзакции сессии через Core
+
+    Подписчики будут оповещены после commit, при откате пометка сбрасывается.
+    """
+    _register_listeners()
+    session.info.setdefault('changed_tables', set()).update(tablenames)
+
+
+def _written_tables(session):
+    tables = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tablename = getattr(obj, '__tablename__', None)
+        if tablename:
+            tables.add(tablename)
+    return tables
+
+
+def _after_flush(session, flush_context):
+    session.info.setdefault('changed_tables', set()).update(_written_tables(session))
+
+
+def _after_commit(session):
+    tables = session.info.pop('changed_tables', None)
+    if tables:
+        notify_tables_changed(tables)
+
+
+def _after_rollback(session):
+    session.info.pop('changed_tables', None)
+
+
+def _register_listeners():
+    global _listeners_registered
+    if _listeners_registered:
+        return
+    event.listen(Session, 'after_flush', _after_flush)
+    event.listen(Session, 'after_commit', _after_commit)
+    event.listen(Session, 'after_rollback', _after_rollback)
+    _listeners_registered = True
@@ -1,13 +1,26 @@
 import requests
 import json
+import os
 from flask import current_app
 import logging
+import threading
+import time
+from services.cache import TTLCache, create_cache_backend
+from services.circuit_breaker import CircuitBreaker
+from services.http_client import get_http_client
+from services.async_http import AsyncHttpError, get_async_http_client
+from services.single_flight import SingleFlight
 
 class OpenLibraryService:
     """Сервис для работы с Open Library API через Yandex API Gateway"""
     
-    def __init__(self, api_gateway_url):
+    def __init__(self, api_gateway_url, cache=None, http_client=None, breaker=None, async_http_client=None):
         self.api_gateway_url = api_gateway_url
+        self.cache = cache
+        self.http = http_client or get_http_client()
+        self.async_http = async_http_client or get_async_http_client()
+        self.breaker = breaker or CircuitBreaker('open_library')
+        self.single_flight = SingleFlight()
         self.logger = logging.getLogger(__name__)
     
     def search_books_by_title(self, title, sort='new'):
@@ -29,71 +42,180 @@ class OpenLibraryService:
                 'service_type': 'api_gateway'
             }
         
-        # Формируем параметры запроса
-        params = {
-            'title': title,
-            'sort': sort
+        # Одновременные одинаковые запросы ждут один вызов API Gateway
+        key = self.cache_key(title, sort)
+        return self.single_flight.do(key, lambda: self._load_search_results(key, title, sort))
+    
+    def _load_search_results(self, key, title, sort):
+        """Результаты поиска из кэша или от API Gateway"""
+        if self.cache is None:
+            return self._fetch_search_results(title, sort)
+        
+        return self.cache.get_or_load(
+            key,
+            lambda: self._fetch_search_results(title, sort),
+            is_negative=self.is_negative_result,
+            is_cacheable=lambda result: not result.get('circuit_open')
+        )
+    
+    async def search_books_by_title_async(self, title, sort='new'):
+        """
+        Асинхронный вариант search_books_by_title с тем же форматом результата
+        
+        Ожидание ответа не занимает поток: запросы выполняются общим асинхронным клиентом.
+        """
+        
+        if not title:
+            return {
+                'success': False,
+                'error': 'Необходимо указать название книги',
+                'service_type': 'api_gateway'
+            }
+        
+        key = self.cache_key(title, sort)
+        return await self.single_flight.do_async(key, lambda: self._load_search_results_async(key, title, sort))
+    
+    async def _load_search_results_async(self, key, title, sort):
+        """Результаты поиска из кэша или от API Gateway без блокировки цикла событий"""
+        if self.cache is None:
+            return await self._fetch_search_results_async(title, sort)
+        
+        # Устаревшее значение обновляется в фоновом потоке синхронным запросом
+        return await self.cache.get_or_load_async(
+            key,
+            lambda: self._fetch_search_results_async(title, sort),
+            lambda: self._fetch_search_results(title, sort),
+            is_negative=self.is_negative_result,
+            is_cacheable=lambda result: not result.get('circuit_open')
+        )
+    
+    @staticmethod
+    def cache_key(title, sort):
+        """Ключ кэша: название без учета регистра и лишних пробелов и сортировка"""
+        normalized_title = ' '.join(title.casefold().split())
+        return f'open_library:search:{sort}:{normalized_title}'
+    
+    @staticmethod
+    def is_negative_result(result):
+        """Ошибка или пустой результат кэшируются на меньший срок"""
+        return not result.get('success', True) or not result.get('results')
+    
+    def is_circuit_open(self):
+        """Выключатель открыт: вызовы API Gateway отклоняются без ожидания таймаута"""
+        return self.breaker.is_open()
+    
+    def _fetch_search_results(self, title, sort):
+        """Запрос к API Gateway без кэша через автоматический выключатель"""
+        
+        with self.breaker.call() as call:
+            if not call.allowed:
+                return self._circuit_open_result()
+            
+            start = time.perf_counter()
+            result = self._request_search_results(title, sort)
+            return self._record_call(call, result, time.perf_counter() - start)
+    
+    async def _fetch_search_results_async(self, title, sort):
+        """Асинхронный вариант _fetch_search_results"""
+        
+        # Отмена задачи во время запроса освобождает слот пробного вызова при выходе из блока
+        with self.breaker.call() as call:
+            if not call.allowed:
+                return self._circuit_open_result()
+            
+            start = time.perf_counter()
+            result = await self._request_search_results_async(title, sort)
+            return self._record_call(call, result, time.perf_counter() - start)
+    
+    @staticmethod
+    def _circuit_open_result():
+        return {
+            'success': False,
+            'error': 'API Gateway временно недоступен',
+            'circuit_open': True,
+            'service_type': 'api_gateway'
         }
+    
+    def _record_call(self, call, result, duration):
+        """Учет вызова в автоматическом выключателе"""
+        # Ответ 400 означает ошибку в параметрах запроса и сбоем шлюза не считается
+        if result.get('gateway_failure'):
+            result.pop('gateway_failure')
+            call.record_failure(duration)
+        else:
+            call.record_success(duration)
+        return result
+    
+    def _request_search_results(self, title, sort):
+        """Запрос к API Gateway"""
         
         try:
             self.logger.info(f"Вызов API Gateway: {self.api_gateway_url}")
             self.logger.info(f"Параметры поиска: title={title}, sort={sort}")
             
             # Вызываем API Gateway
-            response = requests.get(
+            response = self.http.get(
                 self.api_gateway_url,
-                params=params,
-                timeout=15
+                params={'title': title, 'sort': sort}
             )
-            
-            self.logger.info(f"Ответ API Gateway: статус {response.status_code}")
-            
-            if response.status_code == 200:
-                data = response.json()
-                self.logger.info(f"Успешный ответ, найдено результатов: {data.get('total_results', 0)}")
-                data['service_type'] = 'api_gateway'
-                return data
-            elif response.status_code == 400:
-                error_msg = 'Неверные параметры запроса'
-                self.logger.error(error_msg)
-                return {
-                    'success': False,
-                    'error': error_msg,
-                    'service_type': 'api_gateway'
-                }
-            else:
-                error_msg = f'Ошибка API Gateway: {response.status_code}'
-                self.logger.error(error_msg)
-                return {
-                    'success': False,
-                    'error': error_msg,
-                    'service_type': 'api_gateway'
-                }
+            return self._search_result_from_response(response)
                 
         except requests.exceptions.RequestException as e:
-            error_msg = f'Ошибка подключения к API Gateway: {str(e)}'
-            self.logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg,
-                'service_type': 'api_gateway'
-            }
+            return self._search_error(f'Ошибка подключения к API Gateway: {str(e)}')
         except json.JSONDecodeError as e:
-            error_msg = f'Неверный формат ответа от API Gateway: {str(e)}'
-            self.logger.error(error_msg)
-            return {
-                'success': False,
-                'error': error_msg,
-                'service_type': 'api_gateway'
-            }
+            return self._search_error(f'Неверный формат ответа от API Gateway: {str(e)}')
+        except Exception as e:
+            return self._search_error(f'Неожиданная ошибка: {str(e)}')
+    
+    async def _request_search_results_async(self, title, sort):
+        """Запрос к API Gateway через общий асинхронный клиент"""
+        
+        try:
+            self.logger.info(f"Асинхронный вызов API Gateway: {self.api_gateway_url}")
+            
+            response = await self.async_http.get(
+                self.api_gateway_url,
+                params={'title': title, 'sort': sort}
+            )
+            return self._search_result_from_response(response)
+                
+        except AsyncHttpError as e:
+            return self._search_error(f'Ошибка подключения к API Gateway: {str(e)}')
+        except json.JSONDecodeError as e:
+            return self._search_error(f'Неверный формат ответа от API Gateway: {str(e)}')
         except Exception as e:
-            error_msg = f'Неожиданная ошибка: {str(e)}'
+            return self._search_error(f'Неожиданная ошибка: {str(e)}')
+    
+    def _search_result_from_response(self, response):
+        """Результат поиска по ответу API Gateway (requests или AsyncResponse)"""
+        
+        self.logger.info(f"Ответ API Gateway: статус {response.status_code}")
+        
+        if response.status_code == 200:
+            data = response.json()
+            self.logger.info(f"Успешный ответ, найдено результатов: {data.get('total_results', 0)}")
+            data['service_type'] = 'api_gateway'
+            return data
+        elif response.status_code == 400:
+            error_msg = 'Неверные параметры запроса'
             self.logger.error(error_msg)
             return {
                 'success': False,
                 'error': error_msg,
                 'service_type': 'api_gateway'
             }
+        else:
+            return self._search_error(f'Ошибка API Gateway: {response.status_code}')
+    
+    def _search_error(self, error_msg):
+        """Ошибка, которая учитывается выключателем как сбой шлюза"""
+        self.logger.error(error_msg)
+        return {
+            'success': False,
+            'error': error_msg,
+            'service_type': 'api_gateway',
+            'gateway_failure': True
+        }
     
     def get_book_web_versions(self, book, sort='new'):
         """
@@ -113,6 +235,10 @@ class OpenLibraryService:
             sort=sort
         )
     
+    async def get_book_web_versions_async(self, book, sort='new'):
+        """Асинхронный вариант get_book_web_versions"""
+        return await self.search_books_by_title_async(title=book.title, sort=sort)
+    
     def is_available(self):
         """Проверка доступности сервиса"""
         return self.api_gateway_url is not None
@@ -121,7 +247,11 @@ class OpenLibraryService:
         """Проверка здоровья API Gateway"""
         try:
             health_url = self.api_gateway_url.replace('/open-library/search', '/health')
-            response = requests.get(health_url, timeout=5)
+            response = self.http.get(
+                health_url,
+                timeout=(self.http.connect_timeout, 5),
+                retry=False
+            )
             return response.status_code == 200
         except:
             return False
@@ -135,17 +265,70 @@ def init_open_library_service(app):
     api_gateway_url = app.config.get('OPEN_LIBRARY_API_GATEWAY_URL')
     
     if api_gateway_url and api_gateway_url != 'https://<api-gateway-id>.apigw.yandexcloud.net/open-library/search':
-        open_library_service = OpenLibraryService(api_gateway_url)
+        open_library_service = OpenLibraryService(
+            api_gateway_url,
+            cache=create_search_cache(app),
+            breaker=create_circuit_breaker(app)
+        )
         
-        # Проверяем доступность API Gateway
-        if open_library_service.health_check():
-            app.logger.info(f"Open Library service initialized with API Gateway: {api_gateway_url}")
-        else:
-            app.logger.warning(f"API Gateway health check failed, but service initialized: {api_gateway_url}")
+        app.logger.info(f"Open Library service initialized with API Gateway: {api_gateway_url}")
+        
+        # Проверяем доступность API Gateway в фоне, не задерживая запуск воркера
+        if app.config.get('OPEN_LIBRARY_STARTUP_HEALTH_CHECK', True):
+            threading.Thread(
+                target=_log_health_status,
+                args=(app.logger, open_library_service),
+                name='open-library-health-check',
+                daemon=True
+            ).start()
     else:
         app.logger.warning("OPEN_LIBRARY_API_GATEWAY_URL not set or is default, Open Library service disabled")
         open_library_service = None
 
+def _log_health_status(logger, service):
+    """Проверка здоровья API Gateway с записью результата в лог"""
+    if service.health_check():
+        logger.info(f"API Gateway health check passed: {service.api_gateway_url}")
+    else:
+        logger.warning(f"API Gateway health check failed: {service.api_gateway_url}")
+
+def create_search_cache(app):
+    """Создание кэша результатов поиска по настройкам приложения"""
+    if not app.config.get('OPEN_LIBRARY_CACHE_ENABLED', True):
+        return None
+    
+    ttl = app.config.get('OPEN_LIBRARY_CACHE_TTL', 86400)
+    backend = create_cache_backend(
+        app.config.get('OPEN_LIBRARY_CACHE_BACKEND', 'memory'),
+        path=app.config.get('OPEN_LIBRARY_CACHE_PATH') or os.path.join(app.instance_path, 'open_library_cache.db'),
+        max_entries=app.config.get('OPEN_LIBRARY_CACHE_MAX_ENTRIES', 5000),
+        table='open_library_search',
+        # Порядок вытеснения достаточно знать с точностью до десятой части TTL
+        touch_interval=ttl / 10
+    )
+    app.logger.info(f"Open Library search cache: {backend.name}")
+    
+    return TTLCache(
+        backend,
+        ttl=ttl,
+        negative_ttl=app.config.get('OPEN_LIBRARY_CACHE_NEGATIVE_TTL', 300),
+        stale_ttl=app.config.get('OPEN_LIBRARY_CACHE_STALE_TTL', 604800),
+        lock_timeout=app.config.get('OPEN_LIBRARY_CACHE_LOCK_TIMEOUT', 20)
+    )
+
+def create_circuit_breaker(app):
+    """Создание автоматического выключателя API Gateway по настройкам приложения"""
+    return CircuitBreaker(
+        'open_library',
+        failure_rate_threshold=app.config.get('OPEN_LIBRARY_BREAKER_FAILURE_RATE', 0.5),
+        slow_call_seconds=app.config.get('OPEN_LIBRARY_BREAKER_SLOW_CALL_SECONDS', 5.0),
+        slow_call_rate_threshold=app.config.get('OPEN_LIBRARY_BREAKER_SLOW_CALL_RATE', 0.5),
+        window_size=app.config.get('OPEN_LIBRARY_BREAKER_WINDOW_SIZE', 20),
+        minimum_calls=app.config.get('OPEN_LIBRARY_BREAKER_MINIMUM_CALLS', 5),
+        open_seconds=app.config.get('OPEN_LIBRARY_BREAKER_OPEN_SECONDS', 30),
+        half_open_max_calls=app.config.get('OPEN_LIBRARY_BREAKER_HALF_OPEN_CALLS', 2)
+    )
+
 def get_open_library_service():
     """Получение экземпляра сервиса Open Library"""
     return open_library_service
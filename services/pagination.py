@@ -0,0 +1,100 @@
+import base64
+import json
+from sqlalchemy import and_, or_
+
+
+class InvalidCursorError(ValueError):
+    """Курсор поврежден или не соответствует порядку сортировки"""
+
+
+def encode_cursor(order, values):
+    """
+    Кодирование позиции в непрозрачный курсор
+
+    Args:
+        order (str): Имя порядка сортировки
+        values (list): Значения ключа последней записи страницы
+
+    Returns:
+        str: Курсор в base64 без выравнивания
+    """
+    payload = json.dumps({'o': order, 'k': values}, ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, order):
+    """
+    Декодирование курсора с проверкой порядка сортировки
+
+    Returns:
+        list: Значения ключа последней записи предыдущей страницы
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        values = payload['k']
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError('Некорректный курсор') from e
+
+    if payload.get('o') != order or not isinstance(values, list):
+        raise InvalidCursorError('Курсор не соответствует порядку сортировки')
+    return values
+
+
+def keyset_paginate(query, columns, order, cursor=None, limit=10):
+    """
+    Постраничная выборка по ключу вместо LIMIT/OFFSET
+
+    Стоимость страницы не зависит от ее номера: следующая страница
+    начинается строго после ключа последней записи предыдущей.
+
+    Args:
+        query: Исходный запрос
+        columns (list): Колонки ключа сортировки, последняя должна быть уникальной
+        order (str): Имя порядка сортировки, сохраняется в курсоре
+        cursor (str): Курсор предыдущей страницы
+        limit (int): Размер страницы
+
+    Returns:
+        tuple: (записи страницы, курсор следующей страницы или None)
+    """
+    if cursor:
+        values = decode_cursor(cursor, order)
+        _check_key_values(columns, values)
+        query = query.filter(_after_key(columns, values))
+
+    items = query.order_by(*columns).limit(limit + 1).all()
+
+    next_cursor = None
+    if len(items) > limit:
+        items = items[:limit]
+        last = items[-1]
+        next_cursor = encode_cursor(order, [getattr(last, column.key) for column in columns])
+
+    return items, next_cursor
+
+
+def _check_key_values(columns, values):
+    """Число и типы значений курсора по колонкам ключа: курсор приходит от клиента"""
+    if len(values) != len(columns):
+        raise InvalidCursorError('Курсор не соответствует порядку сортировки')
+    for column, value in zip(columns, values):
+        if value is None and column.nullable:
+            continue
+        try:
+            expected = column.type.python_type
+        except NotImplementedError:
+            expected = (str, int, float)
+        if expected is float:
+            expected = (int, float)
+        if isinstance(value, bool) or not isinstance(value, expected):
+            raise InvalidCursorError('Курсор не соответствует порядку сортировки')
+
+
+def _after_key(columns, values):
+    """Условие (c1, c2, ...) > (v1, v2, ...) без сравнения кортежей на стороне СУБД"""
+    conditions = []
+    for index, column in enumerate(columns):
+        equal_prefix = [columns[i] == values[i] for i in range(index)]
+        conditions.append(and_(*equal_prefix, column > values[index]))
+    return or_(*conditions)
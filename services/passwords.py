@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+logger = logging.getLogger(__name__)
+
+
+def _hash_password(password, method, salt_length):
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+def _verify_password(password_hash, password):
+    return check_password_hash(password_hash, password)
+
+
+class PasswordHasher:
+    """
+    Хэширование паролей с настраиваемыми параметрами
+
+    При pool_size > 0 хэширование выполняется в пуле процессов, и поток
+    веб-воркера во время вычисления не удерживает процессор и GIL.
+
+    Args:
+        method (str): Метод werkzeug, например 'pbkdf2:sha256:600000' или 'scrypt:32768:8:1'
+        salt_length (int): Длина соли
+        pool_size (int): Число процессов пула, 0 - хэшировать в текущем потоке
+    """
+
+    def __init__(self, method='pbkdf2:sha256:600000', salt_length=16, pool_size=0):
+        self.method = method
+        self.salt_length = salt_length
+        self.pool_size = pool_size
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._hash_prefix = None
+
+    def _executor(self):
+        if not self.pool_size:
+            return None
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    # spawn: воркер к этому моменту уже запустил фоновые потоки, fork с ними небезопасен
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.pool_size,
+                        mp_context=multiprocessing.get_context('spawn')
+                    )
+        return self._pool
+
+    def hash(self, password):
+        """Хэш пароля с текущими параметрами"""
+        executor = self._executor()
+        if executor is None:
+            return _hash_password(password, self.method, self.salt_length)
+        return executor.submit(_hash_password, password, self.method, self.salt_length).result()
+
+    def verify(self, password_hash, password):
+        """Проверка пароля по хэшу"""
+        executor = self._executor()
+        if executor is None:
+            return _verify_password(password_hash, password)
+        return executor.submit(_verify_password, password_hash, password).result()
+
+    async def hash_async(self, password):
+        """Хэш пароля без блокировки цикла событий"""
+        executor = self._executor()
+        if executor is None:
+            return _hash_password(password, self.method, self.salt_length)
+        return await asyncio.wrap_future(executor.submit(_hash_password, password, self.method, self.salt_length))
+
+    async def verify_async(self, password_hash, password):
+        """Проверка пароля без блокировки цикла событий"""
+        executor = self._executor()
+        if executor is None:
+            return _verify_password(password_hash, password)
+        return await asyncio.wrap_future(executor.submit(_verify_password, password_hash, password))
+
+    def needs_rehash(self, password_hash):
+        """Хэш вычислен с параметрами, отличными от текущих"""
+        if self._hash_prefix is None:
+            # werkzeug дополняет метод параметрами по умолчанию ('scrypt' -> 'scrypt:32768:8:1'),
+            # поэтому полная запись метода берется из хэша
+            self._hash_prefix = _hash_password('', self.method, 1).split('$', 1)[0]
+        # Формат werkzeug: метод$соль$хэш; длина соли тоже входит в параметры
+        parts = password_hash.split('$', 2)
+        if len(parts) != 3:
+            return True
+        method, salt, _ = parts
+        return method != self._hash_prefix or len(salt) != self.salt_length
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+# Создаем экземпляр сервиса
+password_hasher = None
+
+
+def init_password_hasher(app):
+    """Инициализация хэширования паролей; пул процессов создается при первом использовании"""
+    global password_hasher
+    password_hasher = PasswordHasher(
+        method=app.config.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000'),
+        salt_length=app.config.get('PASSWORD_HASH_SALT_LENGTH', 16),
+        pool_size=app.config.get('PASSWORD_HASH_POOL_SIZE', 0)
+    )
+    app.logger.info(f"Password hasher initialized: {password_hasher.method}, pool {password_hasher.pool_size}")
+
+
+def get_password_hasher():
+    """Получение экземпляра хэширования паролей, при необходимости с настройками по умолчанию"""
+    global password_hasher
+    if password_hasher is None:
+        password_hasher = PasswordHasher()
+    return password_hasher
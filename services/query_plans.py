@@ -0,0 +1,84 @@
+from datetime import datetime
+from sqlalchemy import select, text
+from models.base import db
+from models.book import Book, book_authors, book_genres
+from models.author import Author
+from models.genre import Genre
+from models.user import User
+from models.reservation import BookReservation
+
+
+def hot_queries():
+    """
+    Запросы горячих путей, которые должны выполняться по индексу
+
+    Returns:
+        list: Пары (название, запрос)
+    """
+    now = datetime.utcnow()
+    return [
+        ('активное бронирование книги пользователем', select(BookReservation.id).where(
+            BookReservation.book_id == 1, BookReservation.user_id == 1, BookReservation.status == 'active'
+        )),
+        ('бронирования пользователя в профиле', select(BookReservation).where(
+            BookReservation.user_id == 1
+        ).order_by(BookReservation.created_at.desc())),
+        ('активные бронирования пользователя', select(BookReservation.id).where(
+            BookReservation.user_id == 1, BookReservation.status == 'active'
+        )),
+        ('просроченные бронирования', select(BookReservation.id).where(
+            BookReservation.status == 'active', BookReservation.expiry_date < now
+        ).order_by(BookReservation.expiry_date).limit(500)),
+        ('авторы страницы книг', select(Author, book_authors.c.book_id).join(
+            book_authors, book_authors.c.author_id == Author.id
+        ).where(book_authors.c.book_id.in_([1, 2, 3]))),
+        ('жанры страницы книг', select(Genre, book_genres.c.book_id).join(
+            book_genres, book_genres.c.genre_id == Genre.id
+        ).where(book_genres.c.book_id.in_([1, 2, 3]))),
+        ('книги автора', select(book_authors.c.book_id).where(book_authors.c.author_id == 1)),
+        ('книги жанра', select(book_genres.c.book_id).where(book_genres.c.genre_id == 1)),
+        ('книга по ISBN', select(Book.id).where(Book.isbn == '978-5-699-12345-1')),
+        ('книги, измененные с момента', select(Book.id).where(Book.updated_at > now)),
+        ('администраторы', select(User.id).where(User.role == 'admin')),
+        ('пользователь по email', select(User.id).where(User.email == 'admin@library.com')),
+    ]
+
+
+def explain_sqlite(statement):
+    """
+    План выполнения запроса в SQLite
+
+    Returns:
+        list: Строки detail из EXPLAIN QUERY PLAN
+    """
+    compiled = statement.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True})
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {compiled}'))
+    return [row[3] for row in rows]
+
+
+def find_full_scans(plan):
+    """Шаги плана, читающие таблицу целиком"""
+    return [
+        step for step in plan
+        if step.startswith('SCAN ') and not step.startswith('SCAN CONSTANT ROW')
+    ]
+
+
+def check_query_plans():
+    """
+    Проверка планов выполнения горячих запросов
+
+    Returns:
+        list: Тройки (название, план, шаги полного сканирования)
+
+    Raises:
+        RuntimeError: Текущая СУБД не поддерживается
+    """
+    if db.engine.dialect.name != 'sqlite':
+        raise RuntimeError('Проверка планов поддерживается только для SQLite')
+
+    results = []
+    for name, statement in hot_queries():
+        plan = explain_sqlite(statement)
+        results.append((name, plan, find_full_scans(plan)))
+    return results
@@ -0,0 +1,133 @@
+import itertools
+import logging
+import sqlite3
+import threading
+import time
+from flask import request, session
+from models.base import db
+
+logger = logging.getLogger(__name__)
+
+# Методы, запросы которыми можно обслужить с реплики
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Ключ сессии Flask: до какого момента браузер читает с основной базы после записи
+PRIMARY_PIN_KEY = 'db_primary_until'
+
+
+class ReplicaSyncError(RuntimeError):
+    """Реплики нельзя синхронизировать копированием файла"""
+
+
+class ReadReplicaRouter:
+    """
+    Назначение реплики сессии SQLAlchemy на время безопасного запроса
+
+    GET, HEAD и OPTIONS запросы к путям с заданными префиксами читают с
+    реплики; реплики чередуются по кругу, в пределах запроса используется
+    одна. Если запрос что-то записал и зафиксировал, сессия браузера
+    закрепляется за основной базой на pin_seconds, чтобы следующие страницы
+    не показали данные реплики до репликации записи. Клиенты API без cookie
+    не закрепляются: чтение после записи в том же запросе и так идет с
+    основной базы (RoutingSession). Значения общих кэшей (фрагменты, фасеты,
+    число книг) при промахе считаются по основной базе (primary_reads):
+    иначе после сброса кэша в него вернулись бы отстающие данные реплики.
+
+    Args:
+        bind_keys (list): Ключи привязок реплик в SQLALCHEMY_BINDS
+        paths (tuple): Префиксы путей, запросы к которым читают с реплики
+        pin_seconds (float): Закрепление за основной базой после записи, 0 - не закреплять
+    """
+
+    def __init__(self, bind_keys, paths, pin_seconds=5):
+        self.bind_keys = list(bind_keys)
+        self.paths = tuple(paths)
+        self.pin_seconds = pin_seconds
+        self._next_key = itertools.cycle(self.bind_keys)
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        if request.method not in SAFE_METHODS or not request.path.startswith(self.paths):
+            return
+        if self.pin_seconds and session.get(PRIMARY_PIN_KEY, 0) > time.time():
+            return
+        with self._lock:
+            bind_key = next(self._next_key)
+        db.session.info['read_replica'] = bind_key
+
+    def after_request(self, response):
+        if self.pin_seconds and db.session.registry.has() and db.session.info.get('committed_write'):
+            session[PRIMARY_PIN_KEY] = time.time() + self.pin_seconds
+        return response
+
+
+def replica_bind_keys(app):
+    """Ключи привязок реплик из SQLALCHEMY_BINDS"""
+    return sorted(key for key in app.config.get('SQLALCHEMY_BINDS', {}) if key.startswith('replica_'))
+
+
+def sync_sqlite_replicas(app):
+    """
+    Копирование основной SQLite базы в файлы реплик через backup API
+
+    Нужна для локальной проверки маршрутизации с двумя файлами SQLite:
+    настоящие реплики PostgreSQL получают данные потоковой репликацией.
+
+    Returns:
+        list: Пути обновленных файлов реплик
+
+    Raises:
+        ReplicaSyncError: Реплики не настроены или основная база либо реплика не SQLite
+    """
+    bind_keys = replica_bind_keys(app)
+    if not bind_keys:
+        raise ReplicaSyncError('Реплики не настроены (READ_REPLICA_URLS)')
+
+    primary_url = db.engines[None].url
+    if primary_url.get_backend_name() != 'sqlite':
+        raise ReplicaSyncError('Копированием синхронизируется только основная база SQLite')
+
+    paths = []
+    source = sqlite3.connect(primary_url.database)
+    try:
+        for bind_key in bind_keys:
+            replica_url = db.engines[bind_key].url
+            if replica_url.get_backend_name() != 'sqlite':
+                raise ReplicaSyncError(f'Реплика {bind_key} не SQLite')
+            # Файл реплики открывается на запись отдельно: приложение может открывать его только для чтения
+            target = sqlite3.connect(replica_url.database.removeprefix('file:'))
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+            paths.append(replica_url.database)
+    finally:
+        source.close()
+    return paths
+
+
+# Создаем экземпляр сервиса
+read_replica_router = None
+
+
+def init_read_replicas(app):
+    """Инициализация маршрутизации чтения на реплики"""
+    global read_replica_router
+    bind_keys = replica_bind_keys(app)
+    if not bind_keys:
+        read_replica_router = None
+        return
+
+    read_replica_router = ReadReplicaRouter(
+        bind_keys,
+        paths=app.config.get('READ_REPLICA_PATHS', ()),
+        pin_seconds=app.config.get('READ_REPLICA_PIN_SECONDS', 5)
+    )
+    app.before_request(read_replica_router.before_request)
+    app.after_request(read_replica_router.after_request)
+    app.logger.info(f"Read replicas: {', '.join(bind_keys)}")
+
+
+def get_read_replica_router():
+    """Получение экземпляра маршрутизатора чтения"""
+    return read_replica_router
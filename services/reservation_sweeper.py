@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import select, update
+from models.base import db
+from models.book import Book
+from models.reservation import BookReservation
+from services.invalidation import mark_tables_changed
+
+logger = logging.getLogger(__name__)
+
+
+class ReservationSweeper:
+    """Перевод просроченных активных бронирований в статус 'expired' с возвратом копий"""
+
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self._metrics_lock = threading.Lock()
+        self.metrics = {
+            'runs': 0,
+            'batches': 0,
+            'rows_expired': 0,
+            'copies_restored': 0,
+            'batch_seconds_total': 0.0,
+            'last_batch_seconds': None,
+            'last_batch_rows': None,
+            'last_run_at': None,
+        }
+
+    def sweep(self, now=None, max_batches=None):
+        """
+        Обработка всех просроченных бронирований пакетами
+
+        Args:
+            now (datetime): Момент времени для сравнения с expiry_date
+            max_batches (int): Ограничение числа пакетов за запуск
+
+        Returns:
+            int: Число бронирований, переведенных в 'expired'
+        """
+        now = now or datetime.utcnow()
+        expired_total = 0
+        batches = 0
+
+        while max_batches is None or batches < max_batches:
+            expired = self.sweep_batch(now)
+            expired_total += expired
+            batches += 1
+            if expired < self.batch_size:
+                break
+
+        with self._metrics_lock:
+            self.metrics['runs'] += 1
+            self.metrics['last_run_at'] = datetime.utcnow().isoformat()
+
+        if expired_total:
+            logger.info(f"Истекло бронирований: {expired_total} за {batches} пакетов")
+        return expired_total
+
+    def sweep_batch(self, now):
+        """
+        Обработка одного пакета в отдельной транзакции
+
+        Returns:
+            int: Число бронирований, переведенных в 'expired'
+        """
+        start = time.perf_counter()
+        try:
+            book_ids = self._expire_batch(now)
+            restored = self._restore_copies(book_ids)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        elapsed = time.perf_counter() - start
+        with self._metrics_lock:
+            self.metrics['batches'] += 1
+            self.metrics['rows_expired'] += len(book_ids)
+            self.metrics['copies_restored'] += restored
+            self.metrics['batch_seconds_total'] += elapsed
+            self.metrics['last_batch_seconds'] = elapsed
+            self.metrics['last_batch_rows'] = len(book_ids)
+
+        logger.debug(f"Пакет истекших бронирований: {len(book_ids)} строк за {elapsed * 1000:.1f} мс")
+        return len(book_ids)
+
+    def _expire_batch(self, now):
+        """
+        Смена статуса пакета бронирований
+
+        Условие status = 'active' повторяется в UPDATE, поэтому бронирование,
+        отмененное параллельно, не будет учтено дважды.
+
+        Returns:
+            list: book_id каждого переведенного бронирования
+        """
+        overdue = (
+            select(BookReservation.id)
+            .where(BookReservation.status == 'active', BookReservation.expiry_date < now)
+            .order_by(BookReservation.expiry_date)
+            .limit(self.batch_size)
+        )
+        expire = (
+            update(BookReservation)
+            .where(BookReservation.status == 'active')
+            .values(status='expired', updated_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+
+        if db.session.get_bind().dialect.update_returning:
+            rows = db.session.execute(
+                expire.where(BookReservation.id.in_(overdue)).returning(BookReservation.book_id)
+            )
+            book_ids = [row[0] for row in rows]
+        else:
+            rows = db.session.execute(
+                overdue.add_columns(BookReservation.book_id).with_for_update(skip_locked=True)
+            ).all()
+            book_ids = [row.book_id for row in rows]
+            if rows:
+                db.session.execute(expire.where(BookReservation.id.in_([row.id for row in rows])))
+
+        if book_ids:
+            mark_tables_changed(db.session, BookReservation.__tablename__)
+        return book_ids
+
+    def _restore_copies(self, book_ids):
+        """
+        Возврат копий сгруппированными UPDATE: один запрос на каждое
+        различное число возвращаемых копий, а не на каждую книгу
+        """
+        per_book = defaultdict(int)
+        for book_id in book_ids:
+            per_book[book_id] += 1
+
+        by_delta = defaultdict(list)
+        for book_id, delta in per_book.items():
+            by_delta[delta].append(book_id)
+
+        for delta, ids in by_delta.items():
+            db.session.execute(
+                update(Book)
+                .where(Book.id.in_(ids))
+                .values(available_copies=Book.available_copies + delta)
+                .execution_options(synchronize_session=False)
+            )
+
+        if by_delta:
+            mark_tables_changed(db.session, Book.__tablename__)
+        return len(book_ids)
+
+    def get_metrics(self):
+        """Снимок метрик работы"""
+        with self._metrics_lock:
+            metrics = dict(self.metrics)
+        metrics['batch_seconds_avg'] = (
+            metrics['batch_seconds_total'] / metrics['batches'] if metrics['batches'] else None
+        )
+        return metrics
+
+
+# Создаем экземпляр сервиса
+reservation_sweeper = None
+
+
+def init_reservation_sweeper(app):
+    """
+    Инициализация обработчика истекших бронирований
+
+    Фоновый поток здесь не запускается: create_app выполняется в каждом воркере.
+    Периодическая обработка - отдельный процесс flask reservations expire --loop.
+    """
+    global reservation_sweeper
+    reservation_sweeper = ReservationSweeper(
+        batch_size=app.config.get('RESERVATION_SWEEP_BATCH_SIZE', 500)
+    )
+
+
+def get_reservation_sweeper():
+    """Получение экземпляра обработчика истекших бронирований"""
+    return reservation_sweeper
@@ -0,0 +1,168 @@
+from datetime import datetime
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from models.base import db
+from models.book import Book
+from models.reservation import BookReservation
+from services.invalidation import mark_tables_changed
+from services.engine_profiles import retry_on_lock
+
+# Частичный уникальный индекс: одно активное бронирование книги на пользователя
+ACTIVE_RESERVATION_INDEX = 'uq_book_reservations_active_book_user'
+
+# SQLite не называет индекс в ошибке, только его столбцы
+SQLITE_ACTIVE_RESERVATION_COLUMNS = 'book_reservations.book_id, book_reservations.user_id'
+
+
+class ReservationError(Exception):
+    """
+    Ошибка операции с бронированием
+
+    Attributes:
+        code (str): Причина: 'unavailable', 'duplicate' или 'not_active'
+    """
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+
+def claim_copy(book_id):
+    """
+    Атомарное списание одной доступной копии книги
+
+    Проверка и уменьшение выполняются одним условным UPDATE, поэтому
+    параллельные запросы не могут списать больше копий, чем есть.
+    Изменение не фиксируется, commit выполняет вызывающий код.
+
+    Raises:
+        ReservationError: Свободных копий нет или книга не найдена
+    """
+    result = db.session.execute(
+        update(Book)
+        .where(Book.id == book_id, Book.available_copies > 0)
+        .values(available_copies=Book.available_copies - 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise ReservationError('unavailable', 'Книга недоступна для бронирования')
+    mark_tables_changed(db.session, Book.__tablename__)
+
+
+def release_copy(book_id):
+    """Атомарный возврат одной копии книги в доступные"""
+    db.session.execute(
+        update(Book)
+        .where(Book.id == book_id)
+        .values(available_copies=Book.available_copies + 1)
+        .execution_options(synchronize_session=False)
+    )
+    mark_tables_changed(db.session, Book.__tablename__)
+
+
+def reserve_book(book_id, user_id):
+    """
+    Бронирование книги пользователем
+
+    Правило «одно активное бронирование книги на пользователя» обеспечивается
+    частичным уникальным индексом, а не предварительным чтением.
+
+    Args:
+        book_id (int): Идентификатор книги
+        user_id (int): Идентификатор пользователя
+
+    Returns:
+        BookReservation: Созданное бронирование
+
+    Raises:
+        ReservationError: Книга недоступна или уже забронирована пользователем
+    """
+    return retry_on_lock(lambda: _reserve_book(book_id, user_id))
+
+
+def _reserve_book(book_id, user_id):
+    try:
+        claim_copy(book_id)
+        reservation = BookReservation(book_id=book_id, user_id=user_id, status='active')
+        db.session.add(reservation)
+        db.session.commit()
+    except ReservationError:
+        db.session.rollback()
+        raise
+    except IntegrityError as e:
+        db.session.rollback()
+        # Нарушения внешних ключей и NOT NULL - не повторное бронирование
+        if not is_active_reservation_conflict(e):
+            raise
+        raise ReservationError('duplicate', 'Пользователь уже забронировал эту книгу')
+
+    return reservation
+
+
+def is_active_reservation_conflict(error):
+    """Ошибка IntegrityError вызвана индексом активных бронирований"""
+    diag = getattr(error.orig, 'diag', None)
+    constraint_name = getattr(diag, 'constraint_name', None)
+    if constraint_name:
+        return constraint_name == ACTIVE_RESERVATION_INDEX
+    message = str(error.orig)
+    return ACTIVE_RESERVATION_INDEX in message or SQLITE_ACTIVE_RESERVATION_COLUMNS in message
+
+
+def close_reservation(reservation, status):
+    """
+    Завершение или отмена активного бронирования с возвратом копии
+
+    Смена статуса выполняется условным UPDATE, поэтому копия возвращается
+    ровно один раз даже при параллельных запросах.
+
+    Args:
+        reservation (BookReservation): Бронирование
+        status (str): Новый статус: 'completed' или 'cancelled'
+
+    Raises:
+        ReservationError: Бронирование уже не активно
+    """
+    return retry_on_lock(lambda: _close_reservation(reservation, status))
+
+
+def _close_reservation(reservation, status):
+    values = {'status': status, 'updated_at': datetime.utcnow()}
+    if status == 'completed':
+        values['return_date'] = datetime.utcnow()
+
+    result = db.session.execute(
+        update(BookReservation)
+        .where(BookReservation.id == reservation.id, BookReservation.status == 'active')
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        db.session.rollback()
+        raise ReservationError('not_active', 'Бронирование уже завершено или отменено')
+    mark_tables_changed(db.session, BookReservation.__tablename__)
+
+    release_copy(reservation.book_id)
+    db.session.commit()
+    return reservation
+
+
+def apply_status_change(reservation, previous_status, is_created):
+    """
+    Учет копий при изменении бронирования из админки
+
+    Изменения не фиксируются, commit выполняет Flask-Admin.
+
+    Args:
+        reservation (BookReservation): Измененное бронирование
+        previous_status (str): Статус до изменения
+        is_created (bool): Бронирование создается
+    """
+    book_id = reservation.book.id if reservation.book else reservation.book_id
+    was_active = not is_created and previous_status == 'active'
+    is_active = reservation.status == 'active'
+
+    if is_active and not was_active:
+        claim_copy(book_id)
+    elif was_active and not is_active:
+        release_copy(book_id)
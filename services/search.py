@@ -0,0 +1,357 @@
+import logging
+import re
+from sqlalchemy import event, inspect, text, select
+from sqlalchemy.orm import Session
+from models.base import db
+from models.book import Book, book_authors
+from models.author import Author
+
+logger = logging.getLogger(__name__)
+
+# Поля индекса и их веса при ранжировании: название, описание, авторы
+SQLITE_RANK_WEIGHTS = (10.0, 1.0, 5.0)
+
+# Имена авторов собираются одним сгруппированным подзапросом на весь набор книг
+AUTHORS_JOIN_SQLITE = """
+    LEFT JOIN (
+        SELECT ba.book_id, group_concat(a.first_name || ' ' || a.last_name, ' ') AS names
+        FROM book_authors ba JOIN authors a ON a.id = ba.author_id
+        {where}
+        GROUP BY ba.book_id
+    ) book_author_names ON book_author_names.book_id = b.id
+"""
+
+AUTHORS_JOIN_POSTGRESQL = """
+    LEFT JOIN (
+        SELECT ba.book_id, string_agg(a.first_name || ' ' || a.last_name, ' ') AS names
+        FROM book_authors ba JOIN authors a ON a.id = ba.author_id
+        {where}
+        GROUP BY ba.book_id
+    ) book_author_names ON book_author_names.book_id = b.id
+"""
+
+
+class SQLiteSearchBackend:
+    """Полнотекстовый индекс на SQLite FTS5"""
+
+    name = 'sqlite_fts5'
+    table_name = 'books_fts'
+
+    def create_schema(self, connection):
+        connection.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts USING fts5("
+            "title, description, authors, tokenize='unicode61 remove_diacritics 2')"
+        ))
+
+    def is_empty(self, connection):
+        return connection.execute(text("SELECT 1 FROM books_fts LIMIT 1")).first() is None
+
+    def delete(self, connection, book_ids):
+        connection.execute(
+            text("DELETE FROM books_fts WHERE rowid IN (SELECT value FROM json_each(:ids))"),
+            {'ids': _json_ids(book_ids)}
+        )
+
+    def upsert(self, connection, book_ids):
+        self.delete(connection, book_ids)
+        ids_filter = "IN (SELECT value FROM json_each(:ids))"
+        connection.execute(
+            text(
+                "INSERT INTO books_fts (rowid, title, description, authors) "
+                "SELECT b.id, b.title, COALESCE(b.description, ''), COALESCE(book_author_names.names, '') "
+                "FROM books b " + AUTHORS_JOIN_SQLITE.format(where=f"WHERE ba.book_id {ids_filter}") +
+                f" WHERE b.id {ids_filter}"
+            ),
+            {'ids': _json_ids(book_ids)}
+        )
+
+    def rebuild(self, connection):
+        connection.execute(text("DELETE FROM books_fts"))
+        connection.execute(text(
+            "INSERT INTO books_fts (rowid, title, description, authors) "
+            "SELECT b.id, b.title, COALESCE(b.description, ''), COALESCE(book_author_names.names, '') "
+            "FROM books b " + AUTHORS_JOIN_SQLITE.format(where='')
+        ))
+
+    def build_query(self, query):
+        tokens = _tokenize(query)
+        if not tokens:
+            return None
+        # Каждое слово ищется по префиксу, все слова должны присутствовать
+        return ' '.join(f'"{token}"*' for token in tokens)
+
+    def search(self, connection, match, limit, offset):
+        title_weight, description_weight, authors_weight = SQLITE_RANK_WEIGHTS
+        rows = connection.execute(
+            text(
+                "SELECT rowid FROM books_fts WHERE books_fts MATCH :match "
+                f"ORDER BY bm25(books_fts, {title_weight}, {description_weight}, {authors_weight}) "
+                "LIMIT :limit OFFSET :offset"
+            ),
+            {'match': match, 'limit': limit, 'offset': offset}
+        )
+        return [row[0] for row in rows]
+
+    def count(self, connection, match):
+        return connection.execute(
+            text("SELECT count(*) FROM books_fts WHERE books_fts MATCH :match"),
+            {'match': match}
+        ).scalar()
+
+
+class PostgreSQLSearchBackend:
+    """Полнотекстовый индекс на tsvector с GIN индексом"""
+
+    name = 'postgresql_tsvector'
+    table_name = 'book_search'
+
+    DOCUMENT_SQL = (
+        "setweight(to_tsvector('simple', COALESCE(b.title, '')), 'A') || "
+        "setweight(to_tsvector('simple', COALESCE(book_author_names.names, '')), 'B') || "
+        "setweight(to_tsvector('simple', COALESCE(b.description, '')), 'C')"
+    )
+
+    def create_schema(self, connection):
+        connection.execute(text(
+            "CREATE TABLE IF NOT EXISTS book_search ("
+            "book_id INTEGER PRIMARY KEY REFERENCES books(id) ON DELETE CASCADE, "
+            "document TSVECTOR NOT NULL)"
+        ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_book_search_document ON book_search USING GIN (document)"
+        ))
+
+    def is_empty(self, connection):
+        return connection.execute(text("SELECT 1 FROM book_search LIMIT 1")).first() is None
+
+    def delete(self, connection, book_ids):
+        connection.execute(
+            text("DELETE FROM book_search WHERE book_id = ANY(:ids)"),
+            {'ids': list(book_ids)}
+        )
+
+    def upsert(self, connection, book_ids):
+        connection.execute(
+            text(
+                "INSERT INTO book_search (book_id, document) "
+                f"SELECT b.id, {self.DOCUMENT_SQL} FROM books b "
+                + AUTHORS_JOIN_POSTGRESQL.format(where="WHERE ba.book_id = ANY(:ids)") +
+                " WHERE b.id = ANY(:ids) "
+                "ON CONFLICT (book_id) DO UPDATE SET document = EXCLUDED.document"
+            ),
+            {'ids': list(book_ids)}
+        )
+
+    def rebuild(self, connection):
+        connection.execute(text("DELETE FROM book_search"))
+        connection.execute(text(
+            f"INSERT INTO book_search (book_id, document) SELECT b.id, {self.DOCUMENT_SQL} FROM books b "
+            + AUTHORS_JOIN_POSTGRESQL.format(where='')
+        ))
+
+    def build_query(self, query):
+        tokens = _tokenize(query)
+        if not tokens:
+            return None
+        return ' & '.join(f'{token}:*' for token in tokens)
+
+    def search(self, connection, match, limit, offset):
+        rows = connection.execute(
+            text(
+                "SELECT book_id FROM book_search, to_tsquery('simple', :match) query "
+                "WHERE document @@ query "
+                "ORDER BY ts_rank(document, query) DESC, book_id "
+                "LIMIT :limit OFFSET :offset"
+            ),
+            {'match': match, 'limit': limit, 'offset': offset}
+        )
+        return [row[0] for row in rows]
+
+    def count(self, connection, match):
+        return connection.execute(
+            text("SELECT count(*) FROM book_search WHERE document @@ to_tsquery('simple', :match)"),
+            {'match': match}
+        ).scalar()
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgreSQLSearchBackend,
+}
+
+
+def _tokenize(query):
+    """Разбиение поискового запроса на слова без служебных символов"""
+    return re.findall(r'\w+', query.lower())
+
+
+def _json_ids(book_ids):
+    return '[' + ','.join(str(int(book_id)) for book_id in book_ids) + ']'
+
+
+class BookSearchService:
+    """Сервис полнотекстового поиска книг по названию, описанию и авторам"""
+
+    def __init__(self, db, backend):
+        self.db = db
+        self.backend = backend
+        self._index_ready = False
+
+    def index_ready(self, connection=None):
+        """
+        Таблица индекса существует
+
+        Индекс создает миграция 0005_book_search_index; пока база не
+        обновлена, поиск и обновление индекса пропускаются. Наличие таблицы
+        запоминается, отсутствие проверяется заново.
+        """
+        if not self._index_ready:
+            connection = connection or self.db.session.connection()
+            self._index_ready = inspect(connection).has_table(self.backend.table_name)
+        return self._index_ready
+
+    def ensure_index(self):
+        """Создание индекса и первичное заполнение, если он пуст"""
+        with self.db.engine.begin() as connection:
+            self.backend.create_schema(connection)
+            self._index_ready = True
+            has_books = connection.execute(select(Book.id).limit(1)).first() is not None
+            if has_books and self.backend.is_empty(connection):
+                logger.info("Полнотекстовый индекс пуст, выполняется перестроение")
+                self.backend.rebuild(connection)
+
+    def rebuild(self):
+        """Полное перестроение индекса"""
+        with self.db.engine.begin() as connection:
+            self.backend.rebuild(connection)
+
+    def reindex_books(self, book_ids, connection=None):
+        """
+        Обновление записей индекса для указанных книг
+
+        Args:
+            book_ids (iterable): Идентификаторы книг
+            connection: Соединение текущей транзакции, по умолчанию соединение сессии
+        """
+        book_ids = sorted(set(book_ids))
+        if not book_ids:
+            return
+        connection = connection or self.db.session.connection()
+        self.backend.upsert(connection, book_ids)
+
+    def remove_books(self, book_ids, connection=None):
+        """Удаление записей индекса для удаленных книг"""
+        book_ids = sorted(set(book_ids))
+        if not book_ids:
+            return
+        connection = connection or self.db.session.connection()
+        self.backend.delete(connection, book_ids)
+
+    def search(self, query, page=1, per_page=10):
+        """
+        Поиск книг с ранжированием
+
+        Args:
+            query (str): Поисковый запрос
+            page (int): Номер страницы
+            per_page (int): Размер страницы
+
+        Returns:
+            tuple: (список id книг в порядке релевантности, общее число найденных)
+        """
+        match = self.backend.build_query(query)
+        if match is None:
+            return [], 0
+
+        connection = self.db.session.connection()
+        book_ids = self.backend.search(connection, match, per_page, (page - 1) * per_page)
+        total = self.backend.count(connection, match)
+        return book_ids, total
+
+
+def _collect_changes(session):
+    """Сбор книг, записи индекса которых нужно обновить после flush"""
+    changed = session.info.setdefault('search_changed_books', set())
+    removed = session.info.setdefault('search_removed_books', set())
+    author_ids = set()
+
+    for obj in session.dirty:
+        if isinstance(obj, Author) and session.is_modified(obj):
+            author_ids.add(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Book):
+            removed.add(obj.id)
+        elif isinstance(obj, Author):
+            author_ids.add(obj.id)
+
+    if author_ids:
+        rows = session.connection().execute(
+            select(book_authors.c.book_id).where(book_authors.c.author_id.in_(author_ids))
+        )
+        changed.update(row[0] for row in rows)
+
+
+def _before_flush(session, flush_context, instances):
+    if search_service is None or not search_service.index_ready(session.connection()):
+        return
+    _collect_changes(session)
+
+
+def _after_flush(session, flush_context):
+    if search_service is None or not search_service.index_ready(session.connection()):
+        return
+
+    changed = session.info.pop('search_changed_books', set())
+    removed = session.info.pop('search_removed_books', set())
+
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Book) and obj.id is not None:
+            changed.add(obj.id)
+
+    connection = session.connection()
+    if removed:
+        search_service.remove_books(removed, connection)
+    changed -= removed
+    if changed:
+        search_service.reindex_books(changed, connection)
+
+
+# Создаем экземпляр сервиса
+search_service = None
+_listeners_registered = False
+
+
+def init_search_service(app):
+    """Инициализация полнотекстового поиска для текущей СУБД"""
+    global search_service, _listeners_registered
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        backend_class = BACKENDS.get(dialect)
+        if backend_class is None:
+            app.logger.warning(f"Полнотекстовый поиск не поддерживается для {dialect}, используется ILIKE")
+            search_service = None
+            return
+
+        # Индекс создается миграцией 0005_book_search_index, bootstrap заполняет пустой индекс
+        # (BookSearchService.ensure_index)
+        search_service = BookSearchService(db, backend_class())
+
+    if not _listeners_registered:
+        event.listen(Session, 'before_flush', _before_flush)
+        event.listen(Session, 'after_flush', _after_flush)
+        _listeners_registered = True
+
+    app.logger.info(f"Search service initialized: {search_service.backend.name}")
+
+
+def get_search_service(require_index=True):
+    """
+    Получение экземпляра сервиса поиска
+
+    Args:
+        require_index (bool): Вернуть None, если таблицы индекса еще нет в базе
+    """
+    if search_service is not None and require_index and not search_service.index_ready():
+        return None
+    return search_service
@@ -1,5 +1,5 @@
 from models import db, User, Book, Author, Genre, BookReservation
-from werkzeug.security import generate_password_hash
+from services.passwords import get_password_hasher
 from datetime import datetime, timedelta
 import random
 
@@ -146,10 +146,15 @@ def create_test_data():
         {"email": "reader5@example.com", "first_name": "Дмитрий", "last_name": "Смирнов", "role": "reader"},
     ]
     
+    # Пароль у тестовых пользователей общий, поэтому хэш (и соль) вычисляется один раз.
+    # Общая соль сделана намеренно и допустима только для тестовых данных:
+    # пароли реальных пользователей хэшируются по одному через set_password
+    password_hash = get_password_hasher().hash("password123")
+    
     users = []
     for user_data in users_data:
         user = User(**user_data)
-        user.set_password("password123")
+        user.password_hash = password_hash
         db.session.add(user)
         users.append(user)
     
@@ -0,0 +1,89 @@
+import asyncio
+import copy
+import threading
+from concurrent.futures import Future
+
+
+class SingleFlight:
+    """
+    Объединение одновременных одинаковых вызовов внутри процесса
+
+    Первый вызов с ключом выполняет функцию, остальные дожидаются его
+    и получают копию того же результата (или то же исключение). Синхронные
+    и асинхронные вызовы с одним ключом объединяются между собой.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._stats = {'calls': 0, 'coalesced': 0}
+
+    def _join(self, key):
+        """Регистрация вызова: (Future, является ли вызывающий первым)"""
+        with self._lock:
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = Future()
+                self._stats['calls'] += 1
+                return future, True
+            self._stats['coalesced'] += 1
+            return future, False
+
+    def _finish(self, key, future, result=None, error=None):
+        with self._lock:
+            self._calls.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            # Копия снимается до возврата, чтобы изменения вызывающего кода не попали к ожидающим
+            future.set_result(copy.deepcopy(result))
+
+    def do(self, key, fn):
+        """
+        Выполнение fn или ожидание уже выполняющегося вызова с тем же ключом
+
+        Args:
+            key: Ключ вызова
+            fn (callable): Функция без аргументов
+
+        Returns:
+            Результат fn; ожидающие получают независимую копию
+        """
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return copy.deepcopy(future.result())
+
+        try:
+            result = fn()
+        except BaseException as e:
+            # Ожидающие не должны зависнуть, даже если вызов отменен
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    async def do_async(self, key, fn):
+        """
+        Асинхронный вариант do
+
+        Args:
+            key: Ключ вызова
+            fn (callable): Функция без аргументов, возвращающая корутину
+        """
+        future, is_leader = self._join(key)
+        if not is_leader:
+            return copy.deepcopy(await asyncio.wrap_future(future))
+
+        try:
+            result = await fn()
+        except BaseException as e:
+            # Ожидающие не должны зависнуть, даже если вызов отменен
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result)
+        return result
+
+    def get_stats(self):
+        """Число выполненных и объединенных вызовов"""
+        with self._lock:
+            return dict(self._stats)
@@ -0,0 +1,47 @@
+import logging
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """
+    Замер длительности фаз запуска приложения
+
+    Args:
+        name (str): Имя замера для лога, например 'create_app' или 'bootstrap'
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.phases = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name):
+        """Замер одной фазы"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    @property
+    def total(self):
+        return time.perf_counter() - self._started
+
+    def as_dict(self):
+        """Длительности фаз и общая длительность в миллисекундах"""
+        return {
+            'total_ms': round(self.total * 1000, 1),
+            'phases': {name: round(duration * 1000, 1) for name, duration in self.phases},
+        }
+
+    def report(self, app):
+        """Сохранение замера в app.extensions['startup_timings'] и запись в лог"""
+        timings = self.as_dict()
+        app.extensions.setdefault('startup_timings', {})[self.name] = timings
+        phases = ', '.join(f'{name} {duration} ms' for name, duration in timings['phases'].items())
+        logger.info(f"Startup {self.name}: {timings['total_ms']} ms ({phases})")
+        return timings
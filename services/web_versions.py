@@ -0,0 +1,243 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_
+from models import db, Book, BookWebVersion
+
+logger = logging.getLogger(__name__)
+
+# Поля издания, которые сохраняются из ответа API Gateway
+EDITION_FIELDS = (
+    'title', 'authors', 'cover_url', 'borrow_links', 'ebook_count',
+    'publish_year', 'edition_count', 'openlibrary_url',
+)
+
+# Способы сортировки результатов поиска: значение хранится в ключе сохраненных веб-версий
+SORT_OPTIONS = (
+    ('new', 'Новые издания'),
+    ('editions', 'По количеству изданий'),
+)
+SORT_VALUES = tuple(value for value, _ in SORT_OPTIONS)
+
+
+def normalize_editions(result):
+    """Издания из ответа API Gateway только с сохраняемыми полями"""
+    editions = []
+    for edition in result.get('results') or []:
+        normalized = {field: edition.get(field) for field in EDITION_FIELDS}
+        normalized['authors'] = normalized['authors'] or []
+        normalized['borrow_links'] = normalized['borrow_links'] or []
+        normalized['ebook_count'] = normalized['ebook_count'] or 0
+        editions.append(normalized)
+    return editions
+
+
+def find_web_versions(book, sort, max_age):
+    """
+    Сохраненные веб-версии книги
+
+    Args:
+        book: Книга
+        sort (str): Способ сортировки
+        max_age (int): Срок, после которого запись считается устаревшей, секунды
+
+    Returns:
+        tuple: (BookWebVersion или None, свежая ли запись)
+    """
+    stored = BookWebVersion.query.filter_by(book_id=book.id, sort=sort).first()
+    if stored is None:
+        return None, False
+
+    # После переименования книги прежние результаты поиска не подходят
+    is_fresh = (
+        stored.title == book.title
+        and stored.refreshed_at >= datetime.utcnow() - timedelta(seconds=max_age)
+    )
+    return stored, is_fresh
+
+
+def _upsert_statement():
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+
+    statement = insert(BookWebVersion.__table__)
+    updated = ('title', 'editions', 'total_results', 'results_with_ia', 'refreshed_at', 'updated_at')
+    return statement.on_conflict_do_update(
+        index_elements=['book_id', 'sort'],
+        set_={column: statement.excluded[column] for column in updated}
+    )
+
+
+def save_web_versions(entries):
+    """
+    Сохранение результатов поиска одной командой INSERT ... ON CONFLICT
+
+    Args:
+        entries (list): Кортежи (book_id, title, sort, результат API Gateway)
+
+    Returns:
+        int: Число сохраненных записей
+    """
+    now = datetime.utcnow()
+    rows = [
+        {
+            'book_id': book_id,
+            'title': title,
+            'sort': sort,
+            'editions': normalize_editions(result),
+            'total_results': result.get('total_results', 0),
+            'results_with_ia': result.get('results_with_ia', 0),
+            'refreshed_at': now,
+            'created_at': now,
+            'updated_at': now,
+        }
+        for book_id, title, sort, result in entries
+        if result.get('success')
+    ]
+    if rows:
+        db.session.execute(_upsert_statement(), rows)
+        db.session.commit()
+    return len(rows)
+
+
+class WebVersionsPrefetcher:
+    """
+    Пакетное обновление сохраненных веб-версий книг
+
+    Запросы к API Gateway выполняются ограниченным пулом потоков, а запись
+    в базу - в вызывающем потоке, пакетами по batch_size книг.
+
+    Args:
+        service: OpenLibraryService
+        max_workers (int): Размер пула потоков
+        batch_size (int): Книг в одном пакете
+        max_age (int): Возраст записи, после которого она обновляется, секунды
+    """
+
+    def __init__(self, service, max_workers=8, batch_size=200, max_age=604800):
+        self.service = service
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.max_age = max_age
+
+    def select_books(self, sort='new', book_ids=None, refresh_all=False, limit=None):
+        """Книги без записи, с устаревшей записью или переименованные после поиска"""
+        query = (
+            db.session.query(Book.id, Book.title)
+            .outerjoin(BookWebVersion, and_(BookWebVersion.book_id == Book.id, BookWebVersion.sort == sort))
+        )
+        if not refresh_all:
+            stale_before = datetime.utcnow() - timedelta(seconds=self.max_age)
+            query = query.filter(or_(
+                BookWebVersion.id.is_(None),
+                BookWebVersion.refreshed_at < stale_before,
+                BookWebVersion.title != Book.title
+            ))
+        if book_ids:
+            query = query.filter(Book.id.in_(book_ids))
+        query = query.order_by(Book.id)
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+
+    def prefetch(self, sort='new', book_ids=None, refresh_all=False, limit=None, progress=None):
+        """
+        Обновление веб-версий выбранных книг
+
+        Args:
+            sort (str): Способ сортировки
+            book_ids (list): Только указанные книги
+            refresh_all (bool): Обновить и свежие записи
+            limit (int): Максимум книг за запуск
+            progress (callable): Вызывается после каждого пакета со статистикой
+
+        Returns:
+            dict: Число книг, сохраненных и неуспешных запросов, длительность
+        """
+        books = self.select_books(sort, book_ids, refresh_all, limit)
+        stats = {'books': len(books), 'stored': 0, 'failed': 0, 'seconds': 0.0}
+        start = time.perf_counter()
+
+        def fetch(book):
+            book_id, title = book
+            return book_id, title, sort, self.service.search_books_by_title(title, sort)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='web-versions') as executor:
+            for offset in range(0, len(books), self.batch_size):
+                entries = list(executor.map(fetch, books[offset:offset + self.batch_size]))
+                stored = save_web_versions(entries)
+                stats['stored'] += stored
+                stats['failed'] += len(entries) - stored
+                if progress:
+                    progress(dict(stats, seconds=time.perf_counter() - start))
+
+        stats['seconds'] = time.perf_counter() - start
+        logger.info(
+            f"Веб-версии обновлены: книг {stats['books']}, сохранено {stats['stored']}, "
+            f"ошибок {stats['failed']}, {stats['seconds']:.1f} с"
+        )
+        return stats
+
+
+def create_prefetcher(app, service):
+    """Создание WebVersionsPrefetcher по настройкам приложения"""
+    return WebVersionsPrefetcher(
+        service,
+        max_workers=app.config.get('WEB_VERSIONS_PREFETCH_WORKERS', 8),
+        batch_size=app.config.get('WEB_VERSIONS_PREFETCH_BATCH_SIZE', 200),
+        max_age=app.config.get('WEB_VERSIONS_MAX_AGE', 604800)
+    )
+
+
+# Состояние фонового обновления, запускаемого из админки
+prefetch_job = {
+    'running': False,
+    'started_at': None,
+    'finished_at': None,
+    'stats': None,
+    'error': None,
+}
+_job_lock = threading.Lock()
+
+
+def start_prefetch_job(app, service, **kwargs):
+    """
+    Запуск обновления веб-версий в фоновом потоке
+
+    Returns:
+        bool: False, если обновление уже выполняется
+    """
+    with _job_lock:
+        if prefetch_job['running']:
+            return False
+        prefetch_job.update(running=True, started_at=datetime.utcnow(), finished_at=None, stats=None, error=None)
+
+    def run():
+        try:
+            with app.app_context():
+                prefetcher = create_prefetcher(app, service)
+                stats = prefetcher.prefetch(
+                    progress=lambda current: prefetch_job.update(stats=current),
+                    **kwargs
+                )
+                prefetch_job['stats'] = stats
+        except Exception as e:
+            logger.error(f"Ошибка обновления веб-версий: {str(e)}")
+            prefetch_job['error'] = str(e)
+        finally:
+            with _job_lock:
+                prefetch_job.update(running=False, finished_at=datetime.utcnow())
+
+    threading.Thread(target=run, name='web-versions-prefetch', daemon=True).start()
+    return True
+
+
+def get_prefetch_job():
+    """Состояние последнего фонового обновления"""
+    with _job_lock:
+        return dict(prefetch_job)